@@ -14,7 +14,10 @@ from src.routes.notion_routes import notion_bp
 from src.routes.tasks_routes import tasks_bp
 from src.routes.daily_update_routes import daily_update_bp
 from src.routes.notion_unified_routes import notion_unified_bp
+from src.routes.metrics_routes import metrics_bp
 from src.services.notion_unified_service import NotionUnifiedService
+from src.services.local_read_cache import get_local_read_cache
+from src.services.service_registry import get_service, warm_up_in_background
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
@@ -27,6 +30,14 @@ app.register_blueprint(notion_bp, url_prefix='/api/notion')
 app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
 app.register_blueprint(daily_update_bp, url_prefix='/api')
 app.register_blueprint(notion_unified_bp, url_prefix='')
+app.register_blueprint(metrics_bp, url_prefix='/api')
+
+# Notionの読み取り結果をSQLiteに保持するローカルキャッシュ（正本はNotion）
+get_local_read_cache().init_app(app)
+
+# コールドスタート時にDB ID解決と接続確立を先に済ませる
+if os.getenv('NOTION_API_KEY') and os.getenv('NOTION_WARMUP', 'false').lower() in ('1', 'true', 'yes'):
+    warm_up_in_background()
 
 # ヘルスチェック
 @app.route('/api/health', methods=['GET'])
@@ -52,7 +63,7 @@ def get_notion_config():
         error_message = None
         if configured:
             try:
-                service = NotionUnifiedService(api_key)
+                service = get_service(NotionUnifiedService, api_key)
                 connection_test = service.test_connection()
                 if not connection_test:
                     error_message = "Notion APIへの接続に失敗しました"
@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+"""
+Notion APIのローカルスタンドイン（オフラインでのベンチマーク・回帰確認用）
+
+サービス層が使うエンドポイントだけを実装する:
+  POST  /v1/search
+  POST  /v1/databases            GET /v1/databases/{id}
+  POST  /v1/databases/{id}/query （フィルタ・ソート・ページネーション対応）
+  POST  /v1/pages                GET/PATCH /v1/pages/{id}
+  GET   /v1/blocks/{id}/children （ページネーション対応）
+  GET   /v1/users                GET /v1/users/me
+
+レイテンシ、レート制限（429 + Retry-After）、ランダムな429の注入を設定できる。
+サービス側は NOTION_API_BASE_URL をこのサーバーに向けて使う:
+
+    python -m bench.notion_stub_server --port 8765 --latency-ms 80 --rate-limit 3
+    export NOTION_API_BASE_URL=http://127.0.0.1:8765/v1
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.notion_enhanced_service import NotionEnhancedService
+from src.services.rate_limiter import TokenBucket
+
+BENCHMARK_PAGE_TITLE = "Benchmark Page"
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _rich_text(content: str) -> List[Dict]:
+    return [{
+        "type": "text",
+        "text": {"content": content, "link": None},
+        "plain_text": content
+    }]
+
+
+def _normalize_rich_text(items: List[Dict]) -> List[Dict]:
+    """入力形式のrich_text/titleをAPIの出力形式（type・plain_text付き）に揃える"""
+    normalized = []
+    for item in items or []:
+        content = item.get("text", {}).get("content", item.get("plain_text", ""))
+        normalized.extend(_rich_text(content))
+    return normalized
+
+
+def _normalize_property(name: str, value: Dict, schema: Dict) -> Dict:
+    if value is None:
+        return None
+    prop_type = schema.get(name, {}).get("type")
+    if not prop_type:
+        prop_type = next((key for key in value if key not in ("id", "type")), None)
+    if prop_type in ("title", "rich_text"):
+        return {"id": name, "type": prop_type, prop_type: _normalize_rich_text(value.get(prop_type, []))}
+    return {"id": name, "type": prop_type, prop_type: value.get(prop_type)}
+
+
+def _plain_text(prop: Dict) -> str:
+    prop_type = prop.get("type")
+    if prop_type in ("title", "rich_text"):
+        return "".join(item.get("plain_text", "") for item in prop.get(prop_type) or [])
+    if prop_type == "select":
+        return (prop.get("select") or {}).get("name", "")
+    return ""
+
+
+def _property_value(prop: Dict):
+    prop_type = prop.get("type")
+    if prop_type in ("title", "rich_text", "select"):
+        return _plain_text(prop)
+    if prop_type == "date":
+        return (prop.get("date") or {}).get("start")
+    return prop.get(prop_type)
+
+
+class NotionStubState:
+    """スタブサーバーのインメモリデータと統計"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.databases: Dict[str, Dict] = {}
+        self.pages: Dict[str, Dict] = {}
+        self.children: Dict[str, List[Dict]] = {}
+        self.requests = Counter()
+
+    # ===== データ投入 =====
+
+    def add_database(self, title: str, properties: Dict, database_id: str = None, parent: Dict = None) -> Dict:
+        database_id = database_id or str(uuid.uuid4())
+        now = _now_iso()
+        schema = {}
+        for name, definition in properties.items():
+            prop_type = next(iter(definition))
+            schema[name] = {"id": name, "name": name, "type": prop_type, prop_type: definition[prop_type]}
+        database = {
+            "object": "database",
+            "id": database_id,
+            "created_time": now,
+            "last_edited_time": now,
+            "title": _normalize_rich_text(title if isinstance(title, list) else [{"text": {"content": title}}]),
+            "parent": parent or {"type": "workspace", "workspace": True},
+            "properties": schema,
+            "archived": False
+        }
+        with self.lock:
+            self.databases[database_id] = database
+        return database
+
+    def add_page(self, parent: Dict, properties: Dict, page_id: str = None, edited_at: str = None) -> Dict:
+        page_id = page_id or str(uuid.uuid4())
+        now = edited_at or _now_iso()
+        schema = {}
+        if parent.get("database_id"):
+            database = self.databases.get(parent["database_id"])
+            schema = database["properties"] if database else {}
+        normalized = {}
+        for name, value in properties.items():
+            prop = _normalize_property(name, value, schema)
+            if prop is not None:
+                normalized[name] = prop
+        page = {
+            "object": "page",
+            "id": page_id,
+            "created_time": now,
+            "last_edited_time": now,
+            "archived": False,
+            "parent": dict(parent, type="database_id" if parent.get("database_id") else "page_id"),
+            "properties": normalized,
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}"
+        }
+        with self.lock:
+            self.pages[page_id] = page
+        return page
+
+    def add_block(self, parent_id: str, block_type: str, text: str) -> Dict:
+        block = {
+            "object": "block",
+            "id": str(uuid.uuid4()),
+            "type": block_type,
+            "has_children": False,
+            "archived": False,
+            "created_time": _now_iso(),
+            "last_edited_time": _now_iso(),
+            block_type: {"rich_text": _rich_text(text)}
+        }
+        with self.lock:
+            siblings = self.children.setdefault(parent_id, [])
+            siblings.append(block)
+            parent = self._find_block(parent_id)
+            if parent is not None:
+                parent["has_children"] = True
+        return block
+
+    def _find_block(self, block_id: str) -> Optional[Dict]:
+        for blocks in self.children.values():
+            for block in blocks:
+                if block["id"] == block_id:
+                    return block
+        return None
+
+    def seed(self, days: int = 14, blocks_per_level: int = 20, block_depth: int = 3, toggles_per_level: int = 4):
+        """ベンチマーク用のデータを投入"""
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+        categories = ["静寂", "深い仕事", "運動", "学習", "感謝", "リセット"]
+        task_names = ["静寂10分", "深い仕事1ブロック", "身体を動かす", "学習15分", "感謝/連絡1件", "5分リセット"]
+
+        taiki = self.add_database("Taiki Task", {
+            "Name": {"title": {}},
+            "Completed": {"checkbox": {}},
+            "Date": {"date": {}},
+            "Category": {"select": {"options": [{"name": c} for c in categories]}}
+        })
+        enhanced_daily = self.add_database("Daily Tasks", {
+            "Name": {"title": {}},
+            "Completed": {"checkbox": {}},
+            "Date": {"date": {}},
+            "Category": {"select": {}},
+            "Duration": {"number": {}},
+            "Notes": {"rich_text": {}}
+        }, database_id=NotionEnhancedService.DAILY_TASKS_DB_ID)
+        for offset in range(-days, days + 1):
+            day = (today + timedelta(days=offset)).isoformat()
+            for index, name in enumerate(task_names):
+                self.add_page({"database_id": taiki["id"]}, {
+                    "Name": {"title": [{"text": {"content": name}}]},
+                    "Completed": {"checkbox": offset < 0 or index % 2 == 0},
+                    "Date": {"date": {"start": day}},
+                    "Category": {"select": {"name": categories[index]}}
+                })
+                self.add_page({"database_id": enhanced_daily["id"]}, {
+                    "Name": {"title": [{"text": {"content": name}}]},
+                    "Completed": {"checkbox": offset < 0},
+                    "Date": {"date": {"start": day}},
+                    "Category": {"select": {"name": categories[index]}},
+                    "Duration": {"number": 10}
+                })
+
+        goal_names = [("運動", 4), ("ふたり時間", 2), ("部屋リセット", 1), ("お金＆画面の棚卸し", 1), ("次週の最重要1つを決定", 1)]
+        weekly = self.add_database("Weekly Goals", {
+            "Name": {"title": {}},
+            "Current": {"number": {}},
+            "Target": {"number": {}},
+            "Week": {"date": {}},
+            "Unit": {"select": {}}
+        })
+        enhanced_weekly = self.add_database("週間目標", {
+            "Name": {"title": {}},
+            "Current": {"number": {}},
+            "Target": {"number": {}},
+            "Week": {"date": {}},
+            "Unit": {"rich_text": {}}
+        }, database_id=NotionEnhancedService.WEEKLY_GOALS_DB_ID)
+        for weeks_ago in range(0, max(1, days // 7) + 1):
+            start = (week_start - timedelta(weeks=weeks_ago)).isoformat()
+            for name, target in goal_names:
+                self.add_page({"database_id": weekly["id"]}, {
+                    "Name": {"title": [{"text": {"content": name}}]},
+                    "Current": {"number": target // 2},
+                    "Target": {"number": target},
+                    "Week": {"date": {"start": start}},
+                    "Unit": {"select": {"name": "回"}}
+                })
+                self.add_page({"database_id": enhanced_weekly["id"]}, {
+                    "Name": {"title": [{"text": {"content": name}}]},
+                    "Current": {"number": 0},
+                    "Target": {"number": target},
+                    "Week": {"date": {"start": start}},
+                    "Unit": {"rich_text": [{"text": {"content": "回"}}]}
+                })
+
+        self.add_database("Metrics", {
+            "Name": {"title": {}},
+            "Score": {"number": {}},
+            "Date": {"date": {}},
+            "Week": {"date": {}},
+            "Completed": {"checkbox": {}}
+        }, database_id=NotionEnhancedService.METRICS_DB_ID)
+        self.add_database("Task Management", {
+            "タスク名": {"title": {}},
+            "完了": {"checkbox": {}},
+            "期日": {"date": {}},
+            "優先度": {"select": {}},
+            "プロジェクト": {"select": {}},
+            "メモ": {"rich_text": {}}
+        }, database_id=NotionEnhancedService.TASK_MANAGEMENT_DB_ID)
+
+        life_plan = self.add_database("人生計画", {
+            "Name": {"title": {}},
+            "自己哲学": {"rich_text": {}},
+            "仕事哲学": {"rich_text": {}},
+            "Created": {"created_time": {}}
+        })
+        self.add_page({"database_id": life_plan["id"]}, {
+            "Name": {"title": [{"text": {"content": "人生計画"}}]},
+            "自己哲学": {"rich_text": [{"text": {"content": "静かに、深く、誠実に"}}]},
+            "仕事哲学": {"rich_text": [{"text": {"content": "価値を生む仕事に集中する"}}]}
+        })
+
+        life_rules = self.add_database("LIFEルール", {
+            "Title": {"title": {}},
+            "Content": {"rich_text": {}}
+        })
+        for index in range(11):
+            self.add_page({"database_id": life_rules["id"]}, {
+                "Title": {"title": [{"text": {"content": f"ルール{index + 1}"}}]},
+                "Content": {"rich_text": [{"text": {"content": f"LIFEルール{index + 1}の内容"}}]}
+            })
+
+        page = self.add_page({"page_id": "workspace"}, {
+            "title": {"title": [{"text": {"content": BENCHMARK_PAGE_TITLE}}]}
+        })
+        self._seed_blocks(page["id"], blocks_per_level, block_depth, toggles_per_level)
+
+    def _seed_blocks(self, parent_id: str, count: int, depth: int, toggles: int):
+        for index in range(count):
+            block_type = "toggle" if index < toggles and depth > 1 else "paragraph"
+            block = self.add_block(parent_id, block_type, f"ブロック {parent_id[:8]}-{index} のテキスト")
+            if block_type == "toggle":
+                self._seed_blocks(block["id"], max(1, count // 2), depth - 1, toggles)
+
+    @property
+    def benchmark_page_id(self) -> Optional[str]:
+        for page in self.pages.values():
+            if _plain_text(page["properties"].get("title", {})) == BENCHMARK_PAGE_TITLE:
+                return page["id"]
+        return None
+
+    # ===== クエリ =====
+
+    def query(self, database_id: str, body: Dict) -> Optional[List[Dict]]:
+        with self.lock:
+            if database_id not in self.databases:
+                return None
+            pages = [
+                page for page in self.pages.values()
+                if page["parent"].get("database_id") == database_id and not page["archived"]
+            ]
+        if body.get("filter"):
+            pages = [page for page in pages if self._matches(page, body["filter"])]
+        for sort in reversed(body.get("sorts") or []):
+            pages.sort(key=lambda page: self._sort_key(page, sort) or "", reverse=sort.get("direction") == "descending")
+        return pages
+
+    def _sort_key(self, page: Dict, sort: Dict):
+        if "timestamp" in sort:
+            return page.get(sort["timestamp"])
+        prop = page["properties"].get(sort.get("property"))
+        if prop is None:
+            return page.get("created_time") if sort.get("property") == "Created" else None
+        return _property_value(prop)
+
+    def _matches(self, page: Dict, condition: Dict) -> bool:
+        if "and" in condition:
+            return all(self._matches(page, sub) for sub in condition["and"])
+        if "or" in condition:
+            return any(self._matches(page, sub) for sub in condition["or"])
+        if "timestamp" in condition:
+            value = page.get(condition["timestamp"])
+            return self._compare(value, condition.get(condition["timestamp"], {}))
+        prop = page["properties"].get(condition.get("property"))
+        value = _property_value(prop) if prop else None
+        for prop_type in ("title", "rich_text", "select", "checkbox", "number", "date"):
+            if prop_type in condition:
+                return self._compare(value, condition[prop_type])
+        return True
+
+    def _compare(self, value, operators: Dict) -> bool:
+        for operator, expected in operators.items():
+            if operator == "equals":
+                if isinstance(expected, str) and isinstance(value, str) and len(expected) == 10:
+                    value = value[:10]
+                if value != expected:
+                    return False
+            elif operator == "does_not_equal" and value == expected:
+                return False
+            elif operator == "contains" and (value is None or str(expected) not in str(value)):
+                return False
+            elif operator in ("on_or_after", "greater_than_or_equal_to") and (value is None or value < expected):
+                return False
+            elif operator in ("after", "greater_than") and (value is None or value <= expected):
+                return False
+            elif operator in ("on_or_before", "less_than_or_equal_to") and (value is None or value > expected):
+                return False
+            elif operator in ("before", "less_than") and (value is None or value >= expected):
+                return False
+            elif operator == "is_empty" and expected and value not in (None, "", []):
+                return False
+            elif operator == "is_not_empty" and expected and value in (None, "", []):
+                return False
+        return True
+
+    def search(self, body: Dict) -> List[Dict]:
+        query = (body.get("query") or "").lower()
+        object_type = (body.get("filter") or {}).get("value")
+        with self.lock:
+            candidates = []
+            if object_type in (None, "database"):
+                candidates.extend(self.databases.values())
+            if object_type in (None, "page"):
+                candidates.extend(page for page in self.pages.values() if not page["archived"])
+        results = []
+        for item in candidates:
+            if item["object"] == "database":
+                title = "".join(part.get("plain_text", "") for part in item["title"])
+            else:
+                title = next((_plain_text(prop) for prop in item["properties"].values() if prop.get("type") == "title"), "")
+            if query in title.lower():
+                results.append(item)
+        results.sort(key=lambda item: item["last_edited_time"], reverse=True)
+        return results
+
+    def update_page(self, page_id: str, body: Dict) -> Optional[Dict]:
+        with self.lock:
+            page = self.pages.get(page_id)
+            if page is None:
+                return None
+            schema = {}
+            database = self.databases.get(page["parent"].get("database_id"))
+            if database:
+                schema = database["properties"]
+            for name, value in (body.get("properties") or {}).items():
+                prop = _normalize_property(name, value, schema)
+                if prop is not None:
+                    page["properties"][name] = prop
+            if "archived" in body:
+                page["archived"] = bool(body["archived"])
+            page["last_edited_time"] = _now_iso()
+            return page
+
+
+def paginate(items: List[Dict], start_cursor: Optional[str], page_size) -> Dict:
+    try:
+        page_size = max(1, min(int(page_size or 100), 100))
+    except (TypeError, ValueError):
+        page_size = 100
+    try:
+        start = int(start_cursor or 0)
+    except ValueError:
+        start = 0
+    end = start + page_size
+    has_more = end < len(items)
+    return {
+        "object": "list",
+        "results": items[start:end],
+        "has_more": has_more,
+        "next_cursor": str(end) if has_more else None
+    }
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, rate_limit: float = 0,
+                 burst: float = None, inject_429: float = 0, retry_after: float = 1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.inject_429 = inject_429
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.bucket = TokenBucket(rate_limit, burst)
+
+
+ROUTES: List[Tuple[str, "re.Pattern", str]] = [
+    ("POST", re.compile(r"^/v1/search$"), "search"),
+    ("POST", re.compile(r"^/v1/databases$"), "create_database"),
+    ("GET", re.compile(r"^/v1/databases/(?P<id>[^/]+)$"), "get_database"),
+    ("POST", re.compile(r"^/v1/databases/(?P<id>[^/]+)/query$"), "query_database"),
+    ("POST", re.compile(r"^/v1/pages$"), "create_page"),
+    ("GET", re.compile(r"^/v1/pages/(?P<id>[^/]+)$"), "get_page"),
+    ("PATCH", re.compile(r"^/v1/pages/(?P<id>[^/]+)$"), "update_page"),
+    ("GET", re.compile(r"^/v1/blocks/(?P<id>[^/]+)/children$"), "get_block_children"),
+    ("GET", re.compile(r"^/v1/users$"), "list_users"),
+    ("GET", re.compile(r"^/v1/users/me$"), "get_me"),
+]
+
+
+class NotionStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-aliveを有効にする
+    disable_nagle_algorithm = True  # ヘッダーと本文の分割送信で遅延ACKを待たない
+    server_version = "NotionStub/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def _dispatch(self, method: str):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        state: NotionStubState = self.server.state
+        config: StubConfig = self.server.config
+
+        if parsed.path.startswith("/__stub/"):
+            return self._handle_control(method, parsed.path)
+
+        for route_method, pattern, name in ROUTES:
+            match = pattern.match(parsed.path)
+            if route_method == method and match:
+                break
+        else:
+            return self._send_error(404, "invalid_request_url", f"Invalid request URL: {method} {parsed.path}")
+
+        with state.lock:
+            state.requests[name] += 1
+            state.requests["total"] += 1
+
+        if config.latency_ms or config.jitter_ms:
+            delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+            time.sleep(max(0.0, delay) / 1000.0)
+
+        if not config.bucket.try_acquire() or (config.inject_429 and random.random() < config.inject_429):
+            with state.lock:
+                state.requests["rate_limited"] += 1
+            return self._send_error(429, "rate_limited", "You have been rate limited.",
+                                    headers={"Retry-After": str(config.retry_after)})
+
+        if self.headers.get("Authorization", "") in ("", "Bearer "):
+            return self._send_error(401, "unauthorized", "API token is invalid.")
+
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+        except ValueError:
+            return self._send_error(400, "invalid_json", "Request body is not valid JSON.")
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        getattr(self, f"_{name}")(match.groupdict().get("id"), body, query)
+
+    # ===== エンドポイント =====
+
+    def _search(self, _, body: Dict, query: Dict):
+        results = self.server.state.search(body)
+        self._send_json(200, paginate(results, body.get("start_cursor"), body.get("page_size")))
+
+    def _create_database(self, _, body: Dict, query: Dict):
+        database = self.server.state.add_database(body.get("title", []), body.get("properties", {}), parent=body.get("parent"))
+        self._send_json(200, database)
+
+    def _get_database(self, database_id: str, body: Dict, query: Dict):
+        database = self.server.state.databases.get(database_id)
+        if database is None:
+            return self._send_error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+        self._send_json(200, database)
+
+    def _query_database(self, database_id: str, body: Dict, query: Dict):
+        pages = self.server.state.query(database_id, body)
+        if pages is None:
+            return self._send_error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+        self._send_json(200, paginate(pages, body.get("start_cursor"), body.get("page_size")))
+
+    def _create_page(self, _, body: Dict, query: Dict):
+        parent = body.get("parent") or {}
+        if parent.get("database_id") and parent["database_id"] not in self.server.state.databases:
+            return self._send_error(404, "object_not_found", f"Could not find database with ID: {parent['database_id']}.")
+        page = self.server.state.add_page({k: v for k, v in parent.items() if k != "type"}, body.get("properties", {}))
+        self._send_json(200, page)
+
+    def _get_page(self, page_id: str, body: Dict, query: Dict):
+        page = self.server.state.pages.get(page_id)
+        if page is None:
+            return self._send_error(404, "object_not_found", f"Could not find page with ID: {page_id}.")
+        self._send_json(200, page)
+
+    def _update_page(self, page_id: str, body: Dict, query: Dict):
+        page = self.server.state.update_page(page_id, body)
+        if page is None:
+            return self._send_error(404, "object_not_found", f"Could not find page with ID: {page_id}.")
+        self._send_json(200, page)
+
+    def _get_block_children(self, block_id: str, body: Dict, query: Dict):
+        state = self.server.state
+        with state.lock:
+            known = block_id in state.pages or block_id in state.children or state._find_block(block_id) is not None
+            blocks = list(state.children.get(block_id, []))
+        if not known:
+            return self._send_error(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        self._send_json(200, paginate(blocks, query.get("start_cursor"), query.get("page_size")))
+
+    def _list_users(self, _, body: Dict, query: Dict):
+        self._send_json(200, paginate([self._bot_user()], None, 100))
+
+    def _get_me(self, _, body: Dict, query: Dict):
+        self._send_json(200, self._bot_user())
+
+    def _bot_user(self) -> Dict:
+        return {"object": "user", "id": "00000000-0000-0000-0000-000000000001", "type": "bot", "name": "Notion Stub"}
+
+    # ===== 制御用エンドポイント =====
+
+    def _handle_control(self, method: str, path: str):
+        state = self.server.state
+        if path == "/__stub/stats" and method == "GET":
+            with state.lock:
+                return self._send_json(200, dict(state.requests))
+        if path == "/__stub/reset" and method == "POST":
+            with state.lock:
+                state.requests.clear()
+            return self._send_json(200, {"reset": True})
+        if path == "/__stub/fixtures" and method == "GET":
+            return self._send_json(200, {"benchmark_page_id": state.benchmark_page_id})
+        self._send_error(404, "invalid_request_url", f"Invalid request URL: {method} {path}")
+
+    # ===== レスポンス =====
+
+    def _send_json(self, status: int, payload: Dict, headers: Dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, code: str, message: str, headers: Dict = None):
+        self._send_json(status, {"object": "error", "status": status, "code": code, "message": message}, headers)
+
+
+class NotionStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], state: NotionStubState, config: StubConfig, verbose: bool = False):
+        super().__init__(address, NotionStubHandler)
+        self.state = state
+        self.config = config
+        self.verbose = verbose
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, config: StubConfig = None,
+                      state: NotionStubState = None, verbose: bool = False) -> NotionStubServer:
+    """スタブサーバーをバックグラウンドスレッドで起動（port=0なら空きポート）"""
+    if state is None:
+        state = NotionStubState()
+        state.seed()
+    server = NotionStubServer((host, port), state, config or StubConfig(), verbose)
+    threading.Thread(target=server.serve_forever, name="notion-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notion APIのローカルスタンドインサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="各リクエストに加える平均レイテンシ")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="レイテンシの揺らぎ幅（±）")
+    parser.add_argument("--rate-limit", type=float, default=0, help="1秒あたりの許容リクエスト数（0で無制限）")
+    parser.add_argument("--burst", type=float, default=None, help="レート制限のバースト上限")
+    parser.add_argument("--inject-429", type=float, default=0, help="ランダムに429を返す確率（0〜1）")
+    parser.add_argument("--retry-after", type=float, default=1, help="429に付けるRetry-After秒数")
+    parser.add_argument("--days", type=int, default=14, help="今日の前後何日分のタスクを投入するか")
+    parser.add_argument("--blocks", type=int, default=20, help="ベンチマーク用ページの1階層あたりのブロック数")
+    parser.add_argument("--depth", type=int, default=3, help="ベンチマーク用ページのブロックの深さ")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    state = NotionStubState()
+    state.seed(days=args.days, blocks_per_level=args.blocks, block_depth=args.depth)
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.rate_limit, args.burst, args.inject_429, args.retry_after)
+    server = NotionStubServer((args.host, args.port), state, config, args.verbose)
+
+    print(f"Notionスタブサーバーを起動しました: {server.base_url}")
+    print(f"  export NOTION_API_BASE_URL={server.base_url}")
+    print(f"  ベンチマーク用ページID: {state.benchmark_page_id}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
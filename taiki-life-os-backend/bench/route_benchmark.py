@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+ルートのエンドツーエンドベンチマーク
+
+main.py のFlaskアプリ（全ブループリント登録済み）をNotionスタブサーバーに向けて動かし、
+ルートごとに p50/p95/p99 レイテンシ、スループット、1リクエストあたりのNotion呼び出し数を計測する。
+結果はコミット間でdiffできるようにJSONファイルへ書き出す。
+
+    python -m bench.route_benchmark --iterations 50 --latency-ms 80 --output bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench.notion_stub_server import NotionStubState, StubConfig, start_stub_server
+
+
+class RouteCase:
+    """ベンチマーク対象の1ルート"""
+
+    def __init__(self, name: str, method: str, path: str, payload: Dict = None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.payload = payload
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """nearest-rank方式のパーセンタイル"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def configure_environment(stub_base_url: str, cache_dir: str, client_rate_limit: float):
+    """アプリのimport前にNotion関連の環境変数をスタブ向けに設定"""
+    os.environ["NOTION_API_KEY"] = os.environ.get("BENCH_NOTION_API_KEY", "bench-secret")
+    os.environ["NOTION_API_BASE_URL"] = stub_base_url
+    os.environ["NOTION_CACHE_DIR"] = cache_dir
+    os.environ["NOTION_PARENT_PAGE_ID"] = "bench-parent-page"
+    os.environ["NOTION_RATE_LIMIT_RPS"] = str(client_rate_limit)
+    for name in ("NOTION_DB_TAIKI_TASK", "NOTION_DB_WEEKLY_GOALS", "NOTION_DB_LIFE_PLAN", "NOTION_DB_LIFE_RULES"):
+        os.environ.pop(name, None)
+
+
+def load_app():
+    """main.py のアプリを読み込み、main.py で未登録のブループリントも登録する"""
+    from main import app
+    from src.routes.sync_routes import sync_bp
+    from src.routes.notion_enhanced_routes import notion_enhanced_bp
+
+    if "sync" not in app.blueprints:
+        app.register_blueprint(sync_bp, url_prefix="/api")
+    if "notion_enhanced" not in app.blueprints:
+        # 統合ルートと重複するURLは先に登録された統合ルートが優先される
+        app.register_blueprint(notion_enhanced_bp, url_prefix="")
+    app.config["TESTING"] = True
+    return app
+
+
+def build_cases(app, state: NotionStubState) -> List[RouteCase]:
+    """スタブのデータを元にベンチマーク対象のルートを組み立てる"""
+    client = app.test_client()
+    page_id = state.benchmark_page_id
+
+    # 同期系は既存ページの更新になるよう、今日のタスク・今週の目標のIDを使う
+    tasks = client.get("/api/notion/taiki-tasks").get_json().get("tasks", [])
+    goals = client.get("/api/notion/weekly-goals").get_json().get("goals", [])
+    client.post("/api/sync/setup")
+
+    sync_tasks = [{"text": task["name"], "completed": not task["completed"]} for task in tasks]
+    sync_goals = [{"text": goal["name"], "current": goal["current"], "target": goal["target"]} for goal in goals]
+    unified_tasks = [dict(task, text=task["name"]) for task in tasks]
+
+    return [
+        RouteCase("tasks_daily", "GET", "/api/tasks/daily"),
+        RouteCase("tasks_summary", "GET", "/api/tasks/summary"),
+        RouteCase("page_content", "GET", f"/api/notion/pages/{page_id}/content"),
+        RouteCase("page_blocks", "GET", f"/api/notion/pages/{page_id}/blocks"),
+        RouteCase("life_rules", "GET", "/api/notion/life-rules"),
+        RouteCase("taiki_tasks_sync", "POST", "/api/notion/taiki-tasks/sync", {"tasks": unified_tasks}),
+        RouteCase("weekly_goals_sync", "POST", "/api/notion/weekly-goals/sync", {"goals": goals}),
+        RouteCase("sync_daily_tasks", "POST", "/api/sync/daily-tasks", {"tasks": sync_tasks}),
+        RouteCase("sync_weekly_goals", "POST", "/api/sync/weekly-goals", {"goals": sync_goals}),
+        RouteCase("sync_daily_data", "GET", "/api/notion/sync/daily"),
+    ]
+
+
+def run_case(app, state: NotionStubState, case: RouteCase, iterations: int, warmup: int, concurrency: int) -> Dict:
+    local = threading.local()
+
+    def call() -> Tuple[float, int]:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        started_at = time.perf_counter()
+        if case.method == "GET":
+            response = client.get(case.path)
+        else:
+            response = client.open(case.path, method=case.method, json=case.payload)
+        response.get_data()
+        return time.perf_counter() - started_at, response.status_code
+
+    for _ in range(warmup):
+        call()
+
+    with state.lock:
+        calls_before = state.requests["total"]
+        throttled_before = state.requests["rate_limited"]
+
+    started_at = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda _: call(), range(iterations)))
+    else:
+        results = [call() for _ in range(iterations)]
+    wall_seconds = time.perf_counter() - started_at
+
+    with state.lock:
+        notion_calls = state.requests["total"] - calls_before
+        throttled = state.requests["rate_limited"] - throttled_before
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    statuses = Counter(str(status) for _, status in results)
+    return {
+        "method": case.method,
+        "path": case.path,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "min": round(latencies[0], 3) if latencies else 0.0,
+            "max": round(latencies[-1], 3) if latencies else 0.0
+        },
+        "throughput_rps": round(iterations / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "notion_calls_per_request": round(notion_calls / iterations, 3) if iterations else 0.0,
+        "notion_429_per_request": round(throttled / iterations, 3) if iterations else 0.0,
+        "status_codes": dict(statuses)
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results: Dict):
+    header = f"{'route':<20} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8} {'calls/req':>10}  status"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        latency = result["latency_ms"]
+        print(f"{name:<20} {latency['p50']:>9.2f} {latency['p95']:>9.2f} {latency['p99']:>9.2f} "
+              f"{result['throughput_rps']:>8.1f} {result['notion_calls_per_request']:>10.2f}  {result['status_codes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ルートのエンドツーエンドベンチマーク（Notionスタブ使用）")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=50, help="スタブのNotion APIレイテンシ")
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--stub-rate-limit", type=float, default=0, help="スタブ側のレート制限（0で無制限）")
+    parser.add_argument("--client-rate-limit", type=float, default=0, help="アプリ側のレート制限（0で無制限）")
+    parser.add_argument("--routes", nargs="*", help="計測するルート名（省略時は全て）")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.stub_rate_limit)
+    server = start_stub_server(config=config)
+    cache_dir = tempfile.mkdtemp(prefix="taiki-bench-")
+    configure_environment(server.base_url, cache_dir, args.client_rate_limit)
+
+    app = load_app()
+    cases = build_cases(app, server.state)
+    if args.routes:
+        cases = [case for case in cases if case.name in args.routes]
+
+    results = {}
+    for case in cases:
+        results[case.name] = run_case(app, server.state, case, args.iterations, args.warmup, args.concurrency)
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "stub": {
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "rate_limit": args.stub_rate_limit
+            },
+            "client_rate_limit": args.client_rate_limit
+        },
+        "routes": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+    print_table(results)
+    print(f"\n結果を書き出しました: {args.output}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,11 @@ from src.routes.notion_routes import notion_bp
 from src.routes.tasks_routes import tasks_bp
 from src.routes.daily_update_routes import daily_update_bp
 from src.routes.notion_unified_routes import notion_unified_bp
+from src.routes.metrics_routes import metrics_bp
+from src.services.local_read_cache import get_local_read_cache
+from src.services.notion_unified_service import NotionUnifiedService
+from src.services.outbox import get_outbox_worker
+from src.services.service_registry import get_service, warm_up_in_background
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
@@ -21,6 +26,10 @@ app.register_blueprint(notion_bp, url_prefix='/api/notion')
 app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
 app.register_blueprint(daily_update_bp, url_prefix='/api')
 app.register_blueprint(notion_unified_bp, url_prefix='')
+app.register_blueprint(metrics_bp, url_prefix='/api')
+
+# Notionの読み取り結果をSQLiteに保持するローカルキャッシュ（正本はNotion）
+get_local_read_cache().init_app(app)
 
 # Notion APIキーの確認（SQLiteは不要、Notion中心）
 api_key = os.getenv('NOTION_API_KEY')
@@ -28,6 +37,13 @@ if not api_key:
     print("警告: NOTION_API_KEY環境変数が設定されていません")
 else:
     print("Notion APIキーが設定されています")
+    # 起動直後のリクエストでDB ID解決や接続確立を待たないよう先に済ませる
+    if os.getenv('NOTION_WARMUP', 'false').lower() in ('1', 'true', 'yes'):
+        warm_up_in_background(api_key)
+    # タスク・目標の書き込みはローカルで受け付け、バックグラウンドでNotionに反映する
+    # （リローダーの監視プロセスはリクエストを処理しないため起動しない）
+    if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        get_outbox_worker().start(app, lambda: get_service(NotionUnifiedService, api_key))
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
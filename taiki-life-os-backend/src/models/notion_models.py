@@ -20,6 +20,7 @@ class NotionConfig(db.Model):
 class DailyTask(db.Model):
     """日次タスクのローカルキャッシュ"""
     __tablename__ = 'daily_tasks'
+    __table_args__ = {'sqlite_autoincrement': True}  # アウトボックスが参照するIDを削除後に再利用しない
     
     id = db.Column(db.Integer, primary_key=True)
     notion_id = db.Column(db.String(255), unique=True, nullable=True)
@@ -36,6 +37,7 @@ class DailyTask(db.Model):
 class WeeklyGoal(db.Model):
     """週間目標のローカルキャッシュ"""
     __tablename__ = 'weekly_goals'
+    __table_args__ = {'sqlite_autoincrement': True}  # アウトボックスが参照するIDを削除後に再利用しない
     
     id = db.Column(db.Integer, primary_key=True)
     notion_id = db.Column(db.String(255), unique=True, nullable=True)
@@ -101,8 +103,31 @@ class SyncLog(db.Model):
     operation = db.Column(db.String(50), nullable=False)  # CREATE, UPDATE, DELETE
     record_id = db.Column(db.Integer, nullable=True)
     notion_id = db.Column(db.String(255), nullable=True)
-    status = db.Column(db.String(50), default='PENDING')  # PENDING, SUCCESS, FAILED
+    status = db.Column(db.String(50), default='PENDING')  # PENDING, IN_FLIGHT, SUCCESS, FAILED, DEAD, COALESCED
     error_message = db.Column(db.Text, nullable=True)
+    payload = db.Column(db.Text, nullable=True)  # Notionに送る内容（JSON）
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)  # FAILEDの再試行時刻
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     processed_at = db.Column(db.DateTime, nullable=True)
 
+class SyncWatermark(db.Model):
+    """差分同期のウォーターマーク（データベースごとの取り込み済み位置）"""
+    __tablename__ = 'sync_watermarks'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    database_id = db.Column(db.String(255), unique=True, nullable=False)
+    last_edited_time = db.Column(db.String(40), nullable=True)  # 取り込んだページのlast_edited_timeの最大値（ISO 8601）
+    full_synced_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class NotionPageSnapshot(db.Model):
+    """差分同期で取り込んだNotionページ（ページのJSONをそのまま保持）"""
+    __tablename__ = 'notion_page_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    notion_id = db.Column(db.String(255), unique=True, nullable=False)
+    database_id = db.Column(db.String(255), nullable=False, index=True)
+    data = db.Column(db.Text, nullable=False)
+    last_edited_time = db.Column(db.String(40), nullable=True)
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,29 @@
+"""
+メトリクスのAPIエンドポイント
+Notion API呼び出しの計測値をPrometheusのテキスト形式で公開する
+"""
+
+from flask import Blueprint, Response
+from src.services.notion_http_client import get_notion_http_client
+from src.services.outbox import get_outbox_worker
+
+metrics_bp = Blueprint('metrics', __name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Notion呼び出しのカウンタ・レイテンシヒストグラム・再送/スロットリング数を取得"""
+    body = get_notion_http_client().render_metrics()
+    outbox = get_outbox_worker()
+    if outbox.enabled:
+        stats = outbox.get_stats()
+        lines = [
+            "# HELP notion_outbox_entries Outbox entries waiting for or finished with Notion, by status.",
+            "# TYPE notion_outbox_entries gauge"
+        ]
+        for status in ('PENDING', 'IN_FLIGHT', 'FAILED', 'DEAD', 'SUCCESS', 'COALESCED'):
+            lines.append(f'notion_outbox_entries{{status="{status}"}} {stats.get(status, 0)}')
+        body += "\n".join(lines) + "\n"
+    return Response(body, content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,16 +1,14 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, date, timedelta
 from src.services.notion_enhanced_service import NotionEnhancedService
-import os
+from src.services.outbox import get_outbox_worker
+from src.services.service_registry import get_service
 
 notion_enhanced_bp = Blueprint('notion_enhanced', __name__)
 
 def get_notion_service():
-    """Notion強化サービスのインスタンスを取得"""
-    api_key = os.getenv('NOTION_API_KEY')
-    if not api_key:
-        raise ValueError("NOTION_API_KEY environment variable is required")
-    return NotionEnhancedService(api_key)
+    """Notion強化サービスのインスタンスを取得（プロセス内で共有）"""
+    return get_service(NotionEnhancedService)
 
 # ===== Daily Tasks API =====
 
@@ -87,6 +85,18 @@ def update_daily_task_completion(task_id):
         if not data or 'completed' not in data:
             return jsonify({"error": "Completed status is required"}), 400
         
+        outbox = get_outbox_worker()
+        if outbox.enabled:
+            # ローカルで受け付けて即座に応答し、Notionへはバックグラウンドで反映する
+            properties = {"Completed": {"checkbox": data['completed']}}
+            outbox_id = outbox.queue_task_update(task_id, {"completed": data['completed']}, properties)
+            return jsonify({
+                "success": True,
+                "queued": True,
+                "outbox_id": outbox_id,
+                "message": "Task completion status update accepted"
+            }), 202
+        
         service = get_notion_service()
         success = service.update_daily_task_completion(task_id, data['completed'])
         
@@ -206,6 +216,17 @@ def update_weekly_goal_progress(goal_id):
         if not data or 'current' not in data:
             return jsonify({"error": "Current progress is required"}), 400
         
+        outbox = get_outbox_worker()
+        if outbox.enabled:
+            properties = {"Current": {"number": data['current']}}
+            outbox_id = outbox.queue_goal_update(goal_id, {"current": data['current']}, properties)
+            return jsonify({
+                "success": True,
+                "queued": True,
+                "outbox_id": outbox_id,
+                "message": "Weekly goal progress update accepted"
+            }), 202
+        
         service = get_notion_service()
         success = service.update_weekly_goal_progress(goal_id, data['current'])
         
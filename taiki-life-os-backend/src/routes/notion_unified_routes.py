@@ -1,19 +1,50 @@
 """
 統合Notionルート - Taiki Task、Weekly Goals、人生計画、LIFEルールの統合API
 """
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from datetime import datetime, date, timedelta
+from typing import Dict, Iterator
 from src.services.notion_unified_service import NotionUnifiedService
-import os
+from src.services.page_search_index import get_page_search_index
+from src.services.local_read_cache import LIFE_PLAN, LIFE_RULES, TAIKI_TASK, WEEKLY_GOALS, get_local_read_cache
+from src.services.service_registry import get_service
 
 notion_unified_bp = Blueprint('notion_unified', __name__)
 
 def get_notion_service():
-    """統合Notionサービスのインスタンスを取得"""
-    api_key = os.getenv('NOTION_API_KEY')
-    if not api_key:
-        raise ValueError("NOTION_API_KEY environment variable is required")
-    return NotionUnifiedService(api_key)
+    """統合Notionサービスのインスタンスを取得（プロセス内で共有）"""
+    return get_service(NotionUnifiedService)
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson; charset=utf-8'
+SEARCH_DEFAULT_LIMIT = 100
+
+def wants_stream() -> bool:
+    """?stream=ndjson（または stream=true）でNDJSONのストリーミングを要求されたか"""
+    return request.args.get('stream', '').lower() in ('ndjson', 'true', '1')
+
+def ndjson_response(lines: Iterator[Dict]) -> Response:
+    """辞書を1行ずつJSONにして返すストリーミングレスポンス"""
+    def generate():
+        for line in lines:
+            yield json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n"
+    
+    response = Response(stream_with_context(generate()), content_type=NDJSON_CONTENT_TYPE)
+    # プロキシにバッファリングさせず、届いた分から表示できるようにする
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def stream_blocks(blocks: Iterator[Dict]) -> Iterator[Dict]:
+    """ブロックを {"type": "block"} の行として流し、最後に件数（失敗時はエラー）の行を送る"""
+    count = 0
+    try:
+        for block in blocks:
+            count += 1
+            yield {"type": "block", "block": block}
+    except Exception as e:
+        yield {"type": "error", "error": str(e), "count": count}
+        return
+    yield {"type": "end", "count": count}
 
 # ===== Taiki Task API =====
 
@@ -31,13 +62,14 @@ def get_taiki_tasks():
                 return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
         
         service = get_notion_service()
-        tasks = service.get_taiki_tasks(target_date)
+        tasks = get_local_read_cache().get_taiki_tasks(service, target_date)
         
         return jsonify({
             "success": True,
             "date": target_date.isoformat(),
             "tasks": tasks,
-            "count": len(tasks)
+            "count": len(tasks),
+            "stale": getattr(tasks, "stale", False)
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -51,6 +83,8 @@ def sync_taiki_tasks():
         
         service = get_notion_service()
         result = service.sync_taiki_tasks(tasks)
+        if result.get("created") or result.get("updated"):
+            get_local_read_cache().invalidate(TAIKI_TASK)
         
         return jsonify(result)
     except Exception as e:
@@ -62,6 +96,7 @@ def delete_taiki_task(task_id):
     try:
         service = get_notion_service()
         success = service.delete_taiki_task(task_id)
+        get_local_read_cache().invalidate(TAIKI_TASK)
         
         if success:
             return jsonify({"success": True, "message": "タスクを削除しました"})
@@ -87,12 +122,13 @@ def get_weekly_goals():
                 return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
         
         service = get_notion_service()
-        goals = service.get_weekly_goals(week_start)
+        goals = get_local_read_cache().get_weekly_goals(service, week_start)
         
         return jsonify({
             "success": True,
             "goals": goals,
-            "count": len(goals)
+            "count": len(goals),
+            "stale": getattr(goals, "stale", False)
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -106,6 +142,8 @@ def sync_weekly_goals():
         
         service = get_notion_service()
         result = service.sync_weekly_goals(goals)
+        if result.get("created") or result.get("updated"):
+            get_local_read_cache().invalidate(WEEKLY_GOALS)
         
         return jsonify(result)
     except Exception as e:
@@ -118,7 +156,7 @@ def get_life_plan():
     """人生計画データベースからデータを取得"""
     try:
         service = get_notion_service()
-        life_plan = service.get_life_plan()
+        life_plan = get_local_read_cache().get_life_plan(service)
         
         if life_plan:
             return jsonify({
@@ -142,6 +180,7 @@ def sync_life_plan():
         
         service = get_notion_service()
         success = service.update_life_plan(life_plan_data)
+        get_local_read_cache().invalidate(LIFE_PLAN)
         
         if success:
             return jsonify({"success": True, "message": "人生計画を同期しました"})
@@ -157,12 +196,13 @@ def get_life_rules():
     """LIFEルールデータベースからルールを取得"""
     try:
         service = get_notion_service()
-        rules = service.get_life_rules()
+        rules = get_local_read_cache().get_life_rules(service)
         
         return jsonify({
             "success": True,
             "rules": rules,
-            "count": len(rules)
+            "count": len(rules),
+            "stale": getattr(rules, "stale", False)
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -185,6 +225,7 @@ def sync_life_rules():
             else:
                 # 新規作成（必要に応じて実装）
                 pass
+        get_local_read_cache().invalidate(LIFE_RULES)
         
         return jsonify({
             "success": True,
@@ -202,6 +243,7 @@ def update_life_rule(rule_id):
         
         service = get_notion_service()
         success = service.update_life_rule(rule_id, data)
+        get_local_read_cache().invalidate(LIFE_RULES)
         
         if success:
             return jsonify({"success": True, "message": "ルールを更新しました"})
@@ -234,27 +276,49 @@ def get_page_content(page_id):
 
 @notion_unified_bp.route('/api/notion/pages/<page_id>/blocks', methods=['GET'])
 def get_page_blocks(page_id):
-    """Notionページのブロック（コンテンツ）を取得"""
+    """Notionページのブロック（コンテンツ）を取得（?stream=ndjson で1ブロック1行のNDJSONを順次返す）"""
     try:
         recursive = request.args.get('recursive', 'true').lower() == 'true'
         
         service = get_notion_service()
-        blocks = service.get_page_blocks(page_id, recursive=recursive)
+        if wants_stream():
+            return ndjson_response(stream_blocks(service.iter_page_blocks(page_id, recursive=recursive)))
+        
+        tree = service.fetch_block_tree(page_id, recursive=recursive)
+        blocks = tree["blocks"]
         
         return jsonify({
             "success": True,
             "page_id": page_id,
             "blocks": blocks,
-            "count": len(blocks)
+            "count": len(blocks),
+            "api_calls": tree["api_calls"]
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @notion_unified_bp.route('/api/notion/pages/<page_id>/content', methods=['GET'])
 def get_page_full_content(page_id):
-    """ページのプロパティとブロックを含む完全なコンテンツを取得"""
+    """ページのプロパティとブロックを含む完全なコンテンツを取得
+    
+    ?stream=ndjson の場合、最初の行でページのプロパティ（{"type": "page"}）を、続けてブロックを1行ずつ返す。
+    """
     try:
         service = get_notion_service()
+        if wants_stream():
+            page = service.get_page(page_id)
+            if not page:
+                return jsonify({
+                    "success": False,
+                    "error": "ページが見つかりません"
+                }), 404
+            
+            def lines():
+                yield {"type": "page", "page": page}
+                yield from stream_blocks(service.iter_page_blocks_cached(page_id, page))
+            
+            return ndjson_response(lines())
+        
         content = service.get_page_full_content(page_id)
         
         if content:
@@ -291,9 +355,14 @@ def search_pages():
     try:
         data = request.get_json() or {}
         query = data.get('query', '')
+        # 指定がなければ /search 1回分に抑える（全件が必要な内部処理はサービスを直接使う）
+        try:
+            limit = max(1, int(data.get('limit', SEARCH_DEFAULT_LIMIT)))
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "limit must be an integer"}), 400
         
         service = get_notion_service()
-        pages = service.search_pages(query)
+        pages = service.search_pages(query, limit=limit)
         
         return jsonify({
             "success": True,
@@ -303,6 +372,47 @@ def search_pages():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@notion_unified_bp.route('/api/notion/pages/index', methods=['POST'])
+def reindex_pages():
+    """ページ本文の全文検索インデックスを更新（前回から編集されたページだけ本文を取り直す）"""
+    try:
+        data = request.get_json(silent=True) or {}
+        full = bool(data.get('full', False))
+        
+        service = get_notion_service()
+        # 全ページを1件ずつ辿る。一覧の取得に失敗した場合は途中で止め、full でもページを外さない
+        pages = service.iter_search("", "page", raise_errors=True)
+        result = get_page_search_index().reindex(service, pages, full=full)
+        
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@notion_unified_bp.route('/api/notion/pages/local-search', methods=['GET'])
+def local_search_pages():
+    """全文検索インデックスからページを検索（Notionには問い合わせない）"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "q is required"}), 400
+        try:
+            limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        
+        index = get_page_search_index()
+        results = index.search(query, limit=limit)
+        
+        return jsonify({
+            "success": True,
+            "query": query,
+            "results": results,
+            "count": len(results),
+            "index": index.get_stats()
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # ===== データベース検索API =====
 
 @notion_unified_bp.route('/api/notion/databases/search', methods=['POST'])
@@ -133,7 +133,7 @@ def get_sync_status():
         return jsonify({
             'success': True,
             'connection': connection_ok,
-            'databases': notion_sync.database_ids,
+            'databases': notion_sync.ensure_database_ids() if connection_ok else notion_sync.database_ids,
             'message': 'Notion接続正常' if connection_ok else 'Notion接続エラー'
         })
         
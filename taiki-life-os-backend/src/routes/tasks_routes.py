@@ -1,19 +1,25 @@
 """
 タスク関連API - Notion中心の実装（SQLite不要）
 """
+import asyncio
+import os
+import time
 from flask import Blueprint, request, jsonify
 from datetime import datetime, date, timedelta
-import os
+from typing import Dict
+from src.services.dashboard_snapshot import get_dashboard_snapshot
+from src.services.notion_async_service import AsyncNotionService
 from src.services.notion_unified_service import NotionUnifiedService
+from src.services.local_read_cache import TAIKI_TASK, WEEKLY_GOALS, get_local_read_cache
+from src.services.notion_http_client import request_deadline
+from src.services.outbox import get_outbox_worker
+from src.services.service_registry import get_service
 
 tasks_bp = Blueprint('tasks', __name__)
 
 def get_notion_service():
-    """Notionサービスのインスタンスを取得"""
-    api_key = os.getenv('NOTION_API_KEY')
-    if not api_key:
-        raise ValueError("NOTION_API_KEY environment variable is required")
-    return NotionUnifiedService(api_key)
+    """Notionサービスのインスタンスを取得（プロセス内で共有）"""
+    return get_service(NotionUnifiedService)
 
 @tasks_bp.route('/daily', methods=['GET'])
 def get_daily_tasks():
@@ -26,10 +32,11 @@ def get_daily_tasks():
             return jsonify({"error": "無効な日付形式です"}), 400
         
         service = get_notion_service()
-        tasks = service.get_taiki_tasks(target_date)
+        tasks = get_local_read_cache().get_taiki_tasks(service, target_date)
         
         return jsonify({
-            "tasks": tasks
+            "tasks": tasks,
+            "stale": getattr(tasks, "stale", False)
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -50,6 +57,23 @@ def create_daily_task():
             except ValueError:
                 return jsonify({"error": "無効な日付形式です"}), 400
         
+        outbox = get_outbox_worker()
+        if outbox.enabled:
+            # ローカルに保存して即座に応答し、Notionへはバックグラウンドで反映する
+            outbox_id, record_id = outbox.queue_task_create(
+                name=data['name'],
+                completed=data.get('completed', False),
+                target_date=target_date,
+                category=data.get('category')
+            )
+            return jsonify({
+                "id": record_id,
+                "notion_id": None,
+                "outbox_id": outbox_id,
+                "queued": True,
+                "message": "タスクを受け付けました"
+            }), 202
+        
         service = get_notion_service()
         task_id = service.create_taiki_task(
             name=data['name'],
@@ -57,6 +81,7 @@ def create_daily_task():
             target_date=target_date,
             category=data.get('category')
         )
+        get_local_read_cache().invalidate(TAIKI_TASK)
         
         if task_id:
             return jsonify({
@@ -90,7 +115,14 @@ def update_daily_task(task_id):
             }
         
         if properties:
+            outbox = get_outbox_worker()
+            if outbox.enabled:
+                fields = {key: data[key] for key in ('name', 'completed', 'category') if key in data}
+                outbox_id = outbox.queue_task_update(task_id, fields, properties)
+                return jsonify({"message": "タスクの更新を受け付けました", "queued": True, "outbox_id": outbox_id}), 202
+            
             success = service.update_taiki_task(task_id, properties)
+            get_local_read_cache().invalidate(TAIKI_TASK)
             if success:
                 return jsonify({"message": "タスクが更新されました"}), 200
             else:
@@ -104,8 +136,14 @@ def update_daily_task(task_id):
 def delete_daily_task(task_id):
     """日次タスクを削除（Notionから）"""
     try:
+        outbox = get_outbox_worker()
+        if outbox.enabled:
+            outbox_id = outbox.queue_task_delete(task_id)
+            return jsonify({"message": "タスクの削除を受け付けました", "queued": True, "outbox_id": outbox_id}), 202
+        
         service = get_notion_service()
         success = service.delete_taiki_task(task_id)
+        get_local_read_cache().invalidate(TAIKI_TASK)
         
         if success:
             return jsonify({"message": "タスクが削除されました"}), 200
@@ -131,11 +169,12 @@ def get_weekly_goals():
             week_start = today - timedelta(days=today.weekday())
         
         service = get_notion_service()
-        goals = service.get_weekly_goals(week_start)
+        goals = get_local_read_cache().get_weekly_goals(service, week_start)
         
         return jsonify({
             "goals": goals,
-            "week_start": week_start.isoformat()
+            "week_start": week_start.isoformat(),
+            "stale": getattr(goals, "stale", False)
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -159,6 +198,23 @@ def create_weekly_goal():
         else:
             week_start = week_start - timedelta(days=week_start.weekday())
         
+        outbox = get_outbox_worker()
+        if outbox.enabled:
+            outbox_id, record_id = outbox.queue_goal_create(
+                name=data['name'],
+                current=data.get('current', 0),
+                target=data['target'],
+                unit=data.get('unit', '回'),
+                week_start=week_start
+            )
+            return jsonify({
+                "id": record_id,
+                "notion_id": None,
+                "outbox_id": outbox_id,
+                "queued": True,
+                "message": "週間目標を受け付けました"
+            }), 202
+        
         service = get_notion_service()
         goal_id = service.create_weekly_goal(
             name=data['name'],
@@ -167,6 +223,7 @@ def create_weekly_goal():
             unit=data.get('unit', '回'),
             week_start=week_start
         )
+        get_local_read_cache().invalidate(WEEKLY_GOALS)
         
         if goal_id:
             return jsonify({
@@ -204,7 +261,14 @@ def update_weekly_goal(goal_id):
             }
         
         if properties:
+            outbox = get_outbox_worker()
+            if outbox.enabled:
+                fields = {key: data[key] for key in ('name', 'current', 'target', 'unit') if key in data}
+                outbox_id = outbox.queue_goal_update(goal_id, fields, properties)
+                return jsonify({"message": "週間目標の更新を受け付けました", "queued": True, "outbox_id": outbox_id}), 202
+            
             success = service.update_page(goal_id, properties)
+            get_local_read_cache().invalidate(WEEKLY_GOALS)
             if success:
                 return jsonify({"message": "週間目標が更新されました"}), 200
             else:
@@ -218,8 +282,14 @@ def update_weekly_goal(goal_id):
 def delete_weekly_goal(goal_id):
     """週間目標を削除（Notionから）"""
     try:
+        outbox = get_outbox_worker()
+        if outbox.enabled:
+            outbox_id = outbox.queue_goal_delete(goal_id)
+            return jsonify({"message": "週間目標の削除を受け付けました", "queued": True, "outbox_id": outbox_id}), 202
+        
         service = get_notion_service()
         success = service.delete_page(goal_id)
+        get_local_read_cache().invalidate(WEEKLY_GOALS)
         
         if success:
             return jsonify({"message": "週間目標が削除されました"}), 200
@@ -245,43 +315,82 @@ def update_metric():
 
 @tasks_bp.route('/summary', methods=['GET'])
 def get_summary():
-    """ダッシュボード用のサマリーデータを取得（Notionから）"""
+    """ダッシュボード用のサマリーデータを取得（書き込みがあるまでは計算済みのスナップショットを返す）"""
     try:
         today = date.today()
         week_start = today - timedelta(days=today.weekday())
         
-        service = get_notion_service()
-        
-        # 今日のタスク
-        daily_tasks = service.get_taiki_tasks(today)
-        completed_tasks = sum(1 for task in daily_tasks if task.get('completed', False))
-        
-        # 今週の目標
-        weekly_goals = service.get_weekly_goals(week_start)
-        weekly_progress = 0
-        if weekly_goals:
-            total_progress = sum(
-                (goal.get('current', 0) / goal.get('target', 1)) if goal.get('target', 0) > 0 else 0
-                for goal in weekly_goals
-            )
-            weekly_progress = (total_progress / len(weekly_goals)) * 100
-        
-        return jsonify({
-            "daily": {
-                "completed": completed_tasks,
-                "total": len(daily_tasks),
-                "progress": (completed_tasks / len(daily_tasks) * 100) if daily_tasks else 0
-            },
-            "weekly": {
-                "progress": weekly_progress,
-                "goals_count": len(weekly_goals)
-            },
-            "metrics": {
-                "score": 0,
-                "max_score": 0,
-                "percentage": 0,
-                "message": "メトリクス機能は削除されました"
-            }
-        }), 200
+        summary = get_dashboard_snapshot().get(
+            (today.isoformat(), week_start.isoformat()),
+            lambda: _build_summary(today, week_start)
+        )
+        return jsonify(summary), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+def _build_summary(today: date, week_start: date) -> Dict:
+    """ダッシュボード用のサマリーをNotion（ローカル読み取りキャッシュ経由）から計算"""
+    service = get_notion_service()
+    cache = get_local_read_cache()
+    deadline = float(os.getenv("NOTION_SUMMARY_DEADLINE", "5.0"))
+    
+    # 今日のタスクと今週の目標は独立しているので並行して取得し、全体で deadline 秒までしか待たない。
+    # 待つのをやめてもスレッドプール上の取得は止まらないため、Notionへのリクエスト自体も
+    # 同じ期限で打ち切り、時間切れのセクションが共有のワーカーを使い続けないようにする
+    deadline_at = time.monotonic() + deadline
+    async_service = AsyncNotionService(service)
+    (daily_status, daily_tasks), (weekly_status, weekly_goals) = async_service.run(async_service.gather(
+        _summary_section(async_service.call(_within_deadline, deadline_at, cache.get_taiki_tasks, service, today), deadline),
+        _summary_section(async_service.call(_within_deadline, deadline_at, cache.get_weekly_goals, service, week_start), deadline)
+    ), deadline + 1)
+    completed_tasks = sum(1 for task in daily_tasks if task.get('completed', False))
+    
+    weekly_progress = 0
+    if weekly_goals:
+        total_progress = sum(
+            (goal.get('current', 0) / goal.get('target', 1)) if goal.get('target', 0) > 0 else 0
+            for goal in weekly_goals
+        )
+        weekly_progress = (total_progress / len(weekly_goals)) * 100
+    
+    return {
+        "daily": {
+            "completed": completed_tasks,
+            "total": len(daily_tasks),
+            "progress": (completed_tasks / len(daily_tasks) * 100) if daily_tasks else 0
+        },
+        "weekly": {
+            "progress": weekly_progress,
+            "goals_count": len(weekly_goals)
+        },
+        "metrics": {
+            "score": 0,
+            "max_score": 0,
+            "percentage": 0,
+            "message": "メトリクス機能は削除されました"
+        },
+        "stale": getattr(daily_tasks, "stale", False) or getattr(weekly_goals, "stale", False),
+        # セクションごとの取得結果（ok / stale / timeout / error）。ok以外を含む場合は partial
+        "status": {
+            "daily": daily_status,
+            "weekly": weekly_status
+        },
+        "partial": daily_status != "ok" or weekly_status != "ok",
+        "generated_at": datetime.now().isoformat()
+    }
+
+def _within_deadline(deadline_at: float, func, *args):
+    """func の中で送るNotionへのリクエストを deadline_at（time.monotonic() の値）までに打ち切る"""
+    with request_deadline(max(0.0, deadline_at - time.monotonic())):
+        return func(*args)
+
+async def _summary_section(aw, deadline: float):
+    """サマリーの1セクションを取得し、(状態, データ) を返す。時間切れ・失敗時は空のデータ"""
+    try:
+        items = await asyncio.wait_for(aw, timeout=deadline)
+    except asyncio.TimeoutError:
+        return "timeout", []
+    except Exception as e:
+        print(f"サマリーの取得エラー: {e}")
+        return "error", []
+    return ("stale" if getattr(items, "stale", False) else "ok"), items
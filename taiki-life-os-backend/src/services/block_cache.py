@@ -0,0 +1,153 @@
+"""
+ブロックツリーキャッシュ - ページのブロックをlast_edited_timeと一緒にディスクへ保存し、変更がなければ再取得を省く
+"""
+import gzip
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from src.services.local_storage import get_cache_dir
+
+# 中身が別ページのブロック。中身の編集では親ページの last_edited_time は変わらない
+SUBPAGE_BLOCK_TYPES = ("child_page", "child_database")
+
+
+def _parse_time(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+
+
+class BlockTreeCache:
+    """ページIDごとのブロックツリー（文書順のブロックのリスト）をgzip圧縮したJSONで保存する
+
+    保存時のページの last_edited_time と一致する場合だけキャッシュを使う。
+    Notionの last_edited_time は分単位に丸められるため、更新時刻から settle_seconds 以内に
+    取得したツリーは、同じ分のうちに更に編集された可能性があるものとして使わない。
+    子ページ・子データベースを含むツリーは、子ページ側の編集を last_edited_time で検出できないため、
+    取得から subpage_ttl_seconds を過ぎたら使わない。
+    """
+
+    def __init__(self, cache_dir: str = None, max_pages: int = None, settle_seconds: float = None,
+                 subpage_ttl_seconds: float = None):
+        if max_pages is None:
+            max_pages = int(os.getenv("NOTION_BLOCK_CACHE_MAX_PAGES", "500"))
+        if settle_seconds is None:
+            settle_seconds = float(os.getenv("NOTION_BLOCK_CACHE_SETTLE_SECONDS", "60"))
+        if subpage_ttl_seconds is None:
+            subpage_ttl_seconds = float(os.getenv("NOTION_BLOCK_CACHE_SUBPAGE_TTL", "300"))
+        self.directory = os.path.join(cache_dir or get_cache_dir(), "blocks")
+        self.max_pages = max_pages
+        self.settle_seconds = settle_seconds
+        self.subpage_ttl_seconds = subpage_ttl_seconds
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return os.getenv("NOTION_BLOCK_CACHE", "true").lower() not in ("0", "false", "no")
+
+    def _path(self, page_id: str) -> str:
+        # ハイフンの有無が違うIDも同じファイルにする
+        name = re.sub(r"[^0-9A-Za-z]", "", page_id).lower()
+        return os.path.join(self.directory, f"{name}.json.gz")
+
+    def get(self, page_id: str, last_edited_time: Optional[str]) -> Optional[List[Dict]]:
+        """ページが保存時から変わっていなければブロックのリストを返す"""
+        if not self.enabled or not last_edited_time:
+            return None
+        try:
+            with gzip.open(self._path(page_id), "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            entry = None
+        except (OSError, ValueError) as e:
+            print(f"ブロックキャッシュの読み込みエラー: {e}")
+            entry = None
+
+        if (
+            entry is None
+            or entry.get("last_edited_time") != last_edited_time
+            or not self._settled(entry)
+            or self._subpages_expired(entry)
+        ):
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return entry.get("blocks", [])
+
+    def _settled(self, entry: Dict) -> bool:
+        edited_at = _parse_time(entry.get("last_edited_time"))
+        fetched_at = _parse_time(entry.get("fetched_at"))
+        if edited_at is None or fetched_at is None:
+            return False
+        return (fetched_at - edited_at).total_seconds() >= self.settle_seconds
+
+    def _subpages_expired(self, entry: Dict) -> bool:
+        if not entry.get("has_subpages"):
+            return False
+        fetched_at = _parse_time(entry.get("fetched_at"))
+        if fetched_at is None:
+            return True
+        return (datetime.now(timezone.utc) - fetched_at).total_seconds() > self.subpage_ttl_seconds
+
+    def put(self, page_id: str, last_edited_time: Optional[str], blocks: List[Dict], fetched_at: datetime = None):
+        """取得したブロックを保存する。fetched_at はブロックの取得を始めた時刻（UTC）"""
+        if not self.enabled or not last_edited_time:
+            return
+        if fetched_at is None:
+            fetched_at = datetime.now(timezone.utc)
+        entry = {
+            "last_edited_time": last_edited_time,
+            "fetched_at": fetched_at.isoformat(),
+            "has_subpages": any(block.get("type") in SUBPAGE_BLOCK_TYPES for block in blocks),
+            "blocks": blocks
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            os.replace(tmp_path, self._path(page_id))
+        except OSError as e:
+            print(f"ブロックキャッシュの保存エラー: {e}")
+            return
+        self._evict()
+
+    def _evict(self):
+        """保存数が上限を超えたら古いものから削除"""
+        try:
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json.gz")]
+            if len(paths) <= self.max_pages:
+                return
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:len(paths) - self.max_pages]:
+                os.remove(path)
+        except OSError as e:
+            print(f"ブロックキャッシュの整理エラー: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses}
+
+
+_cache: Optional[BlockTreeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_block_tree_cache() -> BlockTreeCache:
+    """プロセス共有のブロックツリーキャッシュを取得"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = BlockTreeCache()
+    return _cache
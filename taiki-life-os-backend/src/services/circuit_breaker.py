@@ -0,0 +1,128 @@
+"""
+サーキットブレーカー - Notionの障害・遅延時に呼び出しを即座に失敗させ、ワーカーの滞留を防ぐ
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """ブレーカーが開いているため呼び出しを送らなかった"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"Notion APIへの呼び出しを一時停止中です（{retry_in:.1f}秒後に再試行）")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """連続した失敗・低速応答で開くサーキットブレーカー
+
+    - closed: 通常通り呼び出す。失敗（または slow_call_seconds を超える応答）が
+      failure_threshold 回連続すると open へ
+    - open: reset_timeout 秒間は呼び出しを送らず CircuitOpenError にする
+    - half_open: 試行として1件だけ通し、成功なら closed、失敗なら再び open へ
+    """
+
+    def __init__(self, failure_threshold: int = 5, slow_call_seconds: float = 5.0, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._rejected = 0
+        self._opened_count = 0
+        self._probe_thread: Optional[threading.Thread] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self):
+        """呼び出し前の確認。送れない場合は CircuitOpenError を送出"""
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self._rejected += 1
+                    raise CircuitOpenError(remaining)
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == HALF_OPEN:
+                if self._trial_in_flight:
+                    self._rejected += 1
+                    raise CircuitOpenError(0.0)
+                self._trial_in_flight = True
+
+    def record_success(self, duration: float):
+        """応答を受け取った（上流の障害ではない）呼び出しを記録。遅すぎる場合は失敗として扱う"""
+        if self.slow_call_seconds and duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            self._state = CLOSED
+
+    def release_trial(self):
+        """before_call() を通ったが上流の成否が分からないまま終わった呼び出し（送信前の中止など）を記録
+
+        half_open の試行枠を空け、次の呼び出しで改めて試行できるようにする。状態と失敗回数は変えない。
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """通信エラー・タイムアウト・5xx・低速応答を記録"""
+        with self._lock:
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._opened_count += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def start_probe(self, probe: Callable[[], object]):
+        """ブレーカーが開いている間、バックグラウンドで定期的に probe を呼んで復旧を試みる
+
+        probe はこのブレーカーを通る軽いリクエスト（接続テスト等）を想定。プローブは同時に1本だけ動かす。
+        """
+        with self._lock:
+            if self._state == CLOSED or (self._probe_thread and self._probe_thread.is_alive()):
+                return
+            self._probe_thread = threading.Thread(target=self._probe_loop, args=(probe,), daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self, probe: Callable[[], object]):
+        while True:
+            with self._lock:
+                if self._state == CLOSED:
+                    return
+                wait = self._opened_at + self.reset_timeout - time.monotonic() if self._state == OPEN else 0.0
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                probe()
+            except Exception as e:
+                if not isinstance(e, CircuitOpenError):
+                    print(f"Notion復旧プローブエラー: {e}")
+            if self.state != CLOSED:
+                # 他のリクエストが試行中の場合もあるので、少し待ってから状態を見直す
+                time.sleep(min(1.0, self.reset_timeout))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "opened": self._opened_count,
+                "rejected": self._rejected
+            }
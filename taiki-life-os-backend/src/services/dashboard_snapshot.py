@@ -0,0 +1,80 @@
+"""
+ダッシュボードのスナップショット - 計算済みのサマリーを保持し、タスク・目標の書き込みで無効化する
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+
+class DashboardSnapshot:
+    """計算済みのダッシュボードサマリー（1件）
+
+    読み取りは保持しているサマリーをそのまま返す。タスク・目標の書き込み
+    （Notionへの書き込み、アウトボックスへの受け付け、ローカルキャッシュの更新）で
+    invalidate() が呼ばれると、次の読み取りで作り直す。Notion側で直接編集された
+    場合に備え、ttl_seconds を過ぎたサマリーも作り直す。
+    """
+
+    def __init__(self, ttl_seconds: float = None):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("NOTION_DASHBOARD_SNAPSHOT_TTL", "60"))
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._key: Optional[Hashable] = None
+        self._summary: Optional[Dict] = None
+        self._built_at = 0.0
+        self._version = 0
+        self._built_version = -1
+        self._hits = 0
+        self._builds = 0
+
+    def get(self, key: Hashable, build: Callable[[], Dict]) -> Dict:
+        """key（日付など）のサマリーを返す。保持していなければ build で作る
+
+        一部のセクションが取得できなかった（partial）サマリーは保持せず、次回また作り直す。
+        """
+        with self._lock:
+            if (
+                self._summary is not None
+                and self._key == key
+                and self._built_version == self._version
+                and time.monotonic() - self._built_at < self.ttl_seconds
+            ):
+                self._hits += 1
+                return self._summary
+            version = self._version
+
+        summary = build()
+        with self._lock:
+            self._builds += 1
+            # 作っている間に書き込みがあった場合は、古い内容を保持しない
+            if version == self._version and not summary.get("partial"):
+                self._key = key
+                self._summary = summary
+                self._built_at = time.monotonic()
+                self._built_version = version
+        return summary
+
+    def invalidate(self):
+        """タスク・目標が書き込まれた時に呼ぶ"""
+        with self._lock:
+            self._version += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self._hits, "builds": self._builds}
+
+
+_snapshot: Optional[DashboardSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_dashboard_snapshot() -> DashboardSnapshot:
+    """プロセス共有のダッシュボードスナップショットを取得"""
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = DashboardSnapshot()
+    return _snapshot
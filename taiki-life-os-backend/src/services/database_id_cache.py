@@ -0,0 +1,82 @@
+"""
+データベース名→IDの永続キャッシュ - 再起動やコールドスタート後も/searchを省略する
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src.services.local_storage import JsonFileStore
+
+
+class DatabaseIdCache:
+    """ディスクに保存するデータベース名→IDのキャッシュ
+
+    エントリはAPIキーごとに分けて保存する。TTLを過ぎたエントリは削除せず
+    「要検証」として返し、呼び出し側が GET /databases/{id} で有効性を確認する。
+    """
+
+    def __init__(self, store: JsonFileStore = None, ttl_seconds: float = None):
+        if store is None:
+            store = JsonFileStore("database_ids.json")
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("NOTION_DB_ID_CACHE_TTL", "86400"))
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+
+    def _key(self, api_key: Optional[str], name: str) -> str:
+        namespace = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+        return f"{namespace}:{name}"
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            self._entries = self.store.load(default={}) or {}
+        return self._entries
+
+    def get(self, api_key: Optional[str], name: str) -> Optional[Tuple[str, bool]]:
+        """(データベースID, TTL内かどうか) を返す。エントリがなければNone"""
+        with self._lock:
+            entry = self._load().get(self._key(api_key, name))
+        if not entry:
+            return None
+        fresh = time.time() - entry.get("validated_at", 0) < self.ttl_seconds
+        return entry["id"], fresh
+
+    def set(self, api_key: Optional[str], name: str, database_id: str):
+        """IDを登録（または検証済みとして更新）してディスクに保存"""
+        with self._lock:
+            entries = self._load()
+            entries[self._key(api_key, name)] = {"id": database_id, "validated_at": time.time()}
+            self.store.save(entries)
+
+    def invalidate_id(self, api_key: Optional[str], database_id: str) -> int:
+        """使えなくなったIDを指すエントリを全て削除し、削除件数を返す"""
+        prefix = self._key(api_key, "")
+        with self._lock:
+            entries = self._load()
+            stale_keys = [
+                key for key, entry in entries.items()
+                if key.startswith(prefix) and entry.get("id") == database_id
+            ]
+            for key in stale_keys:
+                del entries[key]
+            if stale_keys:
+                self.store.save(entries)
+        return len(stale_keys)
+
+
+_cache: Optional[DatabaseIdCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_database_id_cache() -> DatabaseIdCache:
+    """プロセス共有のデータベースIDキャッシュを取得"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DatabaseIdCache()
+    return _cache
@@ -0,0 +1,159 @@
+"""
+差分同期 - last_edited_time のウォーターマーク以降に更新されたページだけをNotionから取り込む
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.services.local_read_cache import get_local_read_cache
+
+
+class DeltaSync:
+    """データベースごとのウォーターマークを使った差分取り込み
+
+    取り込んだページは NotionPageSnapshot にJSONのまま保存し、同期処理はそこから
+    対象のページを読み出す。Notionのlast_edited_timeは分単位に丸められるため、
+    ウォーターマークと同じ時刻のページも含めて（on_or_after で）取り込み直す。
+
+    アーカイブされたページはクエリ結果に現れないので、full_sync_interval ごとに
+    全件を取り込み直して削除を反映する。
+    """
+
+    def __init__(self, full_sync_interval: float = None):
+        if full_sync_interval is None:
+            full_sync_interval = float(os.getenv("NOTION_DELTA_FULL_SYNC_INTERVAL", "86400"))
+        self.full_sync_interval = full_sync_interval
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """ローカルのDBが使える場合のみ有効"""
+        if os.getenv("NOTION_INCREMENTAL_SYNC", "true").lower() in ("0", "false", "no"):
+            return False
+        return get_local_read_cache().enabled
+
+    def _lock_for(self, database_id: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(database_id, threading.Lock())
+
+    def load_pages(self, service, database_id: str) -> Optional[Tuple[List[Dict], Dict]]:
+        """変更分を取り込んだうえで、データベースの全ページ（ローカル保存分）と取り込み結果を返す
+
+        差分同期が使えない場合や取り込みに失敗した場合はNoneを返す（呼び出し側で従来通り全件取得する）。
+        """
+        if not self.enabled:
+            return None
+        try:
+            with self._lock_for(database_id):
+                stats = self.pull(service, database_id)
+                return self.pages(database_id), stats
+        except Exception as e:
+            # Notionの失敗に限らず、ローカルのDBのエラーや想定外のページでも全件取得に切り替える
+            print(f"差分同期エラー（全件取得に切り替えます）: {e}")
+            try:
+                cache = get_local_read_cache()
+                with cache.app.app_context():
+                    cache.db.session.rollback()
+            except Exception as rollback_error:
+                print(f"差分同期のロールバックエラー: {rollback_error}")
+            return None
+
+    def pull(self, service, database_id: str) -> Dict:
+        """ウォーターマーク以降に更新されたページを取り込み、ウォーターマークを進める"""
+        from src.models.notion_models import NotionPageSnapshot, SyncWatermark
+
+        cache = get_local_read_cache()
+        with cache.app.app_context():
+            watermark = SyncWatermark.query.filter_by(database_id=database_id).first()
+            full = (
+                watermark is None
+                or watermark.last_edited_time is None
+                or watermark.full_synced_at is None
+                or (datetime.utcnow() - watermark.full_synced_at).total_seconds() > self.full_sync_interval
+            )
+            since = None if full else watermark.last_edited_time
+
+        filter_conditions = None
+        if since:
+            filter_conditions = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": since}
+            }
+        pages = service.query_database(database_id, filter_conditions, raise_errors=True)
+
+        now = datetime.utcnow()
+        with cache.app.app_context():
+            db = cache.db
+            try:
+                existing = {
+                    row.notion_id: row
+                    for row in NotionPageSnapshot.query.filter_by(database_id=database_id)
+                }
+                newest = since
+                for page in pages:
+                    page_id = page.get("id")
+                    if not page_id:
+                        continue
+                    row = existing.pop(page_id, None)
+                    if row is None:
+                        row = NotionPageSnapshot(notion_id=page_id, database_id=database_id)
+                        db.session.add(row)
+                    row.data = json.dumps(page, ensure_ascii=False, separators=(",", ":"))
+                    row.last_edited_time = page.get("last_edited_time")
+                    row.synced_at = now
+                    if row.last_edited_time and (newest is None or row.last_edited_time > newest):
+                        newest = row.last_edited_time
+                if full:
+                    # 全件取り込みで見つからなかったページはNotion側で削除（アーカイブ）されている
+                    for row in existing.values():
+                        db.session.delete(row)
+
+                watermark = SyncWatermark.query.filter_by(database_id=database_id).first()
+                if watermark is None:
+                    watermark = SyncWatermark(database_id=database_id)
+                    db.session.add(watermark)
+                watermark.last_edited_time = newest
+                if full:
+                    watermark.full_synced_at = now
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        return {"mode": "full" if full else "incremental", "changed": len(pages)}
+
+    def pages(self, database_id: str) -> List[Dict]:
+        """取り込み済みのページを返す"""
+        from src.models.notion_models import NotionPageSnapshot
+
+        with get_local_read_cache().app.app_context():
+            rows = NotionPageSnapshot.query.filter_by(database_id=database_id).order_by(NotionPageSnapshot.id).all()
+            return [json.loads(row.data) for row in rows]
+
+    def forget(self, page_id: str):
+        """アプリから削除したページを取り込み済みのページから外す"""
+        if not self.enabled:
+            return
+        from src.models.notion_models import NotionPageSnapshot
+
+        cache = get_local_read_cache()
+        with cache.app.app_context():
+            NotionPageSnapshot.query.filter_by(notion_id=page_id).delete()
+            cache.db.session.commit()
+
+
+_delta_sync: Optional[DeltaSync] = None
+_delta_sync_lock = threading.Lock()
+
+
+def get_delta_sync() -> DeltaSync:
+    """プロセス共有の差分同期を取得"""
+    global _delta_sync
+    if _delta_sync is None:
+        with _delta_sync_lock:
+            if _delta_sync is None:
+                _delta_sync = DeltaSync()
+    return _delta_sync
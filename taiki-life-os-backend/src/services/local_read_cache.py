@@ -0,0 +1,360 @@
+"""
+ローカル読み取りキャッシュ - notion_models のSQLiteテーブルにNotionの読み取り結果を保持する
+
+ダッシュボードの読み取りはローカルのテーブルから返し、TTLを過ぎたらバックグラウンドでNotionから更新する。
+"""
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.services.dashboard_snapshot import get_dashboard_snapshot
+from src.services.local_storage import get_cache_dir
+
+# 種類ごとのキャッシュキーの先頭要素
+TAIKI_TASK = "taiki_task"
+WEEKLY_GOALS = "weekly_goals"
+LIFE_PLAN = "life_plan"
+LIFE_RULES = "life_rules"
+
+# LifePlanItem.category に入れる値（人生計画とLIFEルールは同じテーブルに保存する）
+LIFE_PLAN_CATEGORY = "life_plan"
+LIFE_RULE_CATEGORY = "life_rule"
+
+
+def _to_date(value: Any) -> date:
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)).date()
+    except (TypeError, ValueError):
+        return date.today()
+
+
+class LocalReadCache:
+    """notion_models のテーブルを使ったリードスルーキャッシュ
+
+    - ローカルにデータがなければNotionから同期的に取得して保存する
+    - TTL以内ならローカルのデータをそのまま返す
+    - TTLを過ぎていればローカルのデータを返しつつ、バックグラウンドでNotionから更新する
+
+    init_app() でSQLAlchemyを設定するまで（またはNOTION_LOCAL_CACHE=falseの場合）は
+    全ての読み取りをそのままNotionに流す。
+    """
+
+    def __init__(self, ttl_seconds: float = None):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("NOTION_LOCAL_CACHE_TTL", "60"))
+        self.ttl_seconds = ttl_seconds
+        self.app = None
+        self.db = None
+        self._lock = threading.Lock()
+        # キーごとの最終更新時刻（UTC）
+        self._refreshed_at: Dict[Hashable, datetime] = {}
+        # 種類ごとの無効化時刻。これより前に取得したデータは次の読み取りで同期的に取り直す
+        self._invalidated_at: Dict[str, datetime] = {}
+        self._refreshing = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.app is not None
+
+    def init_app(self, app) -> bool:
+        """FlaskアプリにSQLiteを設定し、テーブルを作成する"""
+        if os.getenv("NOTION_LOCAL_CACHE", "true").lower() in ("0", "false", "no"):
+            return False
+        try:
+            from src.models.user import db
+            import src.models.notion_models  # noqa: F401  テーブル定義を登録する
+        except ImportError as e:
+            print(f"ローカルキャッシュを無効化します（依存関係がありません）: {e}")
+            return False
+
+        app.config.setdefault(
+            "SQLALCHEMY_DATABASE_URI", f"sqlite:///{os.path.join(get_cache_dir(), 'notion_cache.db')}"
+        )
+        app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
+        try:
+            if "sqlalchemy" not in app.extensions:
+                db.init_app(app)
+            with app.app_context():
+                db.create_all()
+        except Exception as e:
+            print(f"ローカルキャッシュの初期化に失敗しました: {e}")
+            return False
+
+        self.db = db
+        self.app = app
+        return True
+
+    # ===== 読み取り =====
+
+    def get_taiki_tasks(self, service, target_date: date = None) -> List[Dict]:
+        if target_date is None:
+            target_date = date.today()
+        return self._read(
+            (TAIKI_TASK, target_date.isoformat()),
+            lambda: service.get_taiki_tasks(target_date),
+            lambda: self._load_tasks(target_date),
+            lambda tasks: self._store_tasks(target_date, tasks)
+        )
+
+    def get_weekly_goals(self, service, week_start: date = None) -> List[Dict]:
+        if week_start is None:
+            today = date.today()
+            week_start = today - timedelta(days=today.weekday())
+        return self._read(
+            (WEEKLY_GOALS, week_start.isoformat()),
+            lambda: service.get_weekly_goals(week_start),
+            lambda: self._load_goals(week_start),
+            lambda goals: self._store_goals(week_start, goals)
+        )
+
+    def get_life_rules(self, service) -> List[Dict]:
+        return self._read(
+            (LIFE_RULES,),
+            service.get_life_rules,
+            self._load_life_rules,
+            self._store_life_rules
+        )
+
+    def get_life_plan(self, service) -> Optional[Dict]:
+        return self._read(
+            (LIFE_PLAN,),
+            service.get_life_plan,
+            self._load_life_plan,
+            self._store_life_plan
+        )
+
+    def invalidate(self, kind: str):
+        """書き込み後に呼ぶ。該当する種類のキーは次の読み取りでNotionから同期的に取り直す"""
+        with self._lock:
+            self._invalidated_at[kind] = datetime.utcnow()
+        if kind in (TAIKI_TASK, WEEKLY_GOALS):
+            get_dashboard_snapshot().invalidate()
+
+    def _read(self, key: Tuple, fetch: Callable[[], Any], load: Callable[[], Tuple[Any, Optional[datetime]]],
+              store: Callable[[Any], None]) -> Any:
+        if not self.enabled:
+            return fetch()
+
+        try:
+            with self.app.app_context():
+                items, synced_at = load()
+        except Exception as e:
+            print(f"ローカルキャッシュの読み込みエラー: {e}")
+            return fetch()
+
+        with self._lock:
+            # 再起動直後などメモリに記録がない場合は、テーブルの同期時刻を使う
+            refreshed_at = self._refreshed_at.get(key) or synced_at
+            invalidated_at = self._invalidated_at.get(key[0])
+        if refreshed_at is None or (invalidated_at is not None and refreshed_at <= invalidated_at):
+            return self._refresh(key, fetch, load, store)
+
+        if (datetime.utcnow() - refreshed_at).total_seconds() > self.ttl_seconds:
+            self._refresh_in_background(key, fetch, load, store)
+        return items
+
+    def _refresh(self, key: Tuple, fetch: Callable[[], Any], load: Callable[[], Tuple[Any, Optional[datetime]]],
+                 store: Callable[[Any], None]) -> Any:
+        """Notionから取得してテーブルに保存し、保存後のテーブルの内容を返す
+
+        反映待ちの書き込みがある行はローカルの内容が残るため、取得結果ではなく
+        テーブルから読み直したものを返す（書き込んだ内容がすぐ読めるようにする）。
+        """
+        started_at = datetime.utcnow()
+        result = fetch()
+        if getattr(result, "stale", False):
+            # Notionに問い合わせられなかった結果は保存しない
+            return result
+        try:
+            with self.app.app_context():
+                store(result)
+                self.db.session.commit()
+                items, _ = load()
+        except Exception as e:
+            print(f"ローカルキャッシュの保存エラー: {e}")
+            with self.app.app_context():
+                self.db.session.rollback()
+            return result
+
+        with self._lock:
+            # 取得中に無効化された場合に備え、取得開始時刻を記録する
+            self._refreshed_at[key] = started_at
+        return items
+
+    def _refresh_in_background(self, key: Tuple, fetch: Callable[[], Any],
+                               load: Callable[[], Tuple[Any, Optional[datetime]]], store: Callable[[Any], None]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._refresh(key, fetch, load, store)
+                if key[0] in (TAIKI_TASK, WEEKLY_GOALS):
+                    # Notion側で直接編集された内容を取り込んだ可能性がある
+                    get_dashboard_snapshot().invalidate()
+            except Exception as e:
+                print(f"ローカルキャッシュのバックグラウンド更新エラー: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"local-cache-refresh-{key[0]}", daemon=True).start()
+
+    # ===== テーブルとの変換 =====
+
+    def _load_tasks(self, target_date: date) -> Tuple[List[Dict], Optional[datetime]]:
+        from src.models.notion_models import DailyTask
+        # Notionへの反映待ちの新規タスク（notion_idなし）も含める
+        rows = DailyTask.query.filter(DailyTask.date == target_date).order_by(DailyTask.id).all()
+        tasks = [{
+            "id": row.id,
+            "notion_id": row.notion_id,
+            "name": row.name,
+            "title": row.name,  # 互換性のため
+            "completed": bool(row.completed),
+            "date": row.date.isoformat(),
+            "category": row.category
+        } for row in rows]
+        return tasks, self._oldest_sync(rows)
+
+    def _store_tasks(self, target_date: date, tasks: List[Dict]):
+        from src.models.notion_models import DailyTask
+        from src.services.outbox import DAILY_TASKS_TABLE, pending_targets
+        now = datetime.utcnow()
+        pending_notion_ids, pending_record_ids = pending_targets(DAILY_TASKS_TABLE)
+        existing = {
+            row.notion_id: row
+            for row in DailyTask.query.filter(DailyTask.date == target_date, DailyTask.notion_id.isnot(None))
+            if row.id not in pending_record_ids
+        }
+        for task in tasks:
+            notion_id = task.get("notion_id")
+            if not notion_id or notion_id in pending_notion_ids:
+                # 反映待ちの書き込みがあるタスクはローカルの内容を優先する
+                continue
+            row = existing.pop(notion_id, None) or DailyTask.query.filter_by(notion_id=notion_id).first()
+            if row is None:
+                row = DailyTask(notion_id=notion_id)
+                self.db.session.add(row)
+            row.name = task.get("name", "")
+            row.completed = bool(task.get("completed", False))
+            row.date = _to_date(task.get("date", target_date))
+            row.category = task.get("category")
+            row.synced_at = now
+        # Notion側で削除された（または別の日に移された）タスク
+        for row in existing.values():
+            self.db.session.delete(row)
+
+    def _load_goals(self, week_start: date) -> Tuple[List[Dict], Optional[datetime]]:
+        from src.models.notion_models import WeeklyGoal
+        rows = WeeklyGoal.query.filter(WeeklyGoal.week_start == week_start).order_by(WeeklyGoal.id).all()
+        goals = [{
+            "id": row.id,
+            "notion_id": row.notion_id,
+            "name": row.name,
+            "current": row.current or 0,
+            "target": row.target or 0,
+            "unit": row.unit or "回",
+            "week_start": row.week_start.isoformat()
+        } for row in rows]
+        return goals, self._oldest_sync(rows)
+
+    def _store_goals(self, week_start: date, goals: List[Dict]):
+        from src.models.notion_models import WeeklyGoal
+        from src.services.outbox import WEEKLY_GOALS_TABLE, pending_targets
+        now = datetime.utcnow()
+        pending_notion_ids, pending_record_ids = pending_targets(WEEKLY_GOALS_TABLE)
+        existing = {
+            row.notion_id: row
+            for row in WeeklyGoal.query.filter(WeeklyGoal.week_start == week_start, WeeklyGoal.notion_id.isnot(None))
+            if row.id not in pending_record_ids
+        }
+        for goal in goals:
+            notion_id = goal.get("notion_id")
+            if not notion_id or notion_id in pending_notion_ids:
+                # 反映待ちの書き込みがある目標はローカルの内容を優先する
+                continue
+            row = existing.pop(notion_id, None) or WeeklyGoal.query.filter_by(notion_id=notion_id).first()
+            if row is None:
+                row = WeeklyGoal(notion_id=notion_id)
+                self.db.session.add(row)
+            row.name = goal.get("name", "")
+            row.current = goal.get("current") or 0
+            row.target = goal.get("target") or 0
+            row.unit = goal.get("unit") or "回"
+            row.week_start = _to_date(goal.get("week_start", week_start))
+            row.synced_at = now
+        for row in existing.values():
+            self.db.session.delete(row)
+
+    def _load_life_rules(self) -> Tuple[List[Dict], Optional[datetime]]:
+        from src.models.notion_models import LifePlanItem
+        rows = LifePlanItem.query.filter_by(category=LIFE_RULE_CATEGORY).order_by(LifePlanItem.priority, LifePlanItem.id).all()
+        rules = [{"notion_id": row.notion_id, "title": row.title, "content": row.content or ""} for row in rows]
+        return rules, self._oldest_sync(rows)
+
+    def _store_life_rules(self, rules: List[Dict]):
+        from src.models.notion_models import LifePlanItem
+        now = datetime.utcnow()
+        existing = {row.notion_id: row for row in LifePlanItem.query.filter_by(category=LIFE_RULE_CATEGORY)}
+        for index, rule in enumerate(rules):
+            notion_id = rule.get("notion_id")
+            if not notion_id:
+                continue
+            row = existing.pop(notion_id, None)
+            if row is None:
+                row = LifePlanItem(notion_id=notion_id, category=LIFE_RULE_CATEGORY)
+                self.db.session.add(row)
+            row.title = rule.get("title", "")
+            row.content = rule.get("content", "")
+            row.priority = index  # Notionから返ってきた順序を保つ
+            row.synced_at = now
+        for row in existing.values():
+            self.db.session.delete(row)
+
+    def _load_life_plan(self) -> Tuple[Optional[Dict], Optional[datetime]]:
+        from src.models.notion_models import LifePlanItem
+        row = LifePlanItem.query.filter_by(category=LIFE_PLAN_CATEGORY).first()
+        if row is None:
+            return None, None
+        try:
+            return json.loads(row.content or "null"), row.synced_at
+        except ValueError:
+            return None, None
+
+    def _store_life_plan(self, life_plan: Optional[Dict]):
+        if life_plan is None:
+            # 取得失敗と区別できないため、保存済みの人生計画は残しておく
+            return
+        from src.models.notion_models import LifePlanItem
+        row = LifePlanItem.query.filter_by(category=LIFE_PLAN_CATEGORY).first()
+        if row is None:
+            row = LifePlanItem(category=LIFE_PLAN_CATEGORY, title="人生計画")
+            self.db.session.add(row)
+        row.notion_id = life_plan.get("notion_id") or row.notion_id
+        row.content = json.dumps(life_plan, ensure_ascii=False)
+        row.synced_at = datetime.utcnow()
+
+    def _oldest_sync(self, rows) -> Optional[datetime]:
+        synced = [row.synced_at for row in rows if row.synced_at is not None]
+        return min(synced) if synced else None
+
+
+_cache: Optional[LocalReadCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_local_read_cache() -> LocalReadCache:
+    """プロセス共有のローカル読み取りキャッシュを取得"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LocalReadCache()
+    return _cache
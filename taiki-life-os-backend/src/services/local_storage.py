@@ -0,0 +1,52 @@
+"""
+ローカルキャッシュファイルの保存先と、JSONファイルの読み書きユーティリティ
+"""
+import json
+import os
+import tempfile
+import threading
+from typing import Any
+
+
+def get_cache_dir() -> str:
+    """キャッシュの保存先ディレクトリ（サーバーレス環境でも書き込める/tmp配下が既定）"""
+    cache_dir = os.getenv("NOTION_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "taiki-life-os")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+class JsonFileStore:
+    """1つのJSONファイルを読み書きするスレッドセーフなストア
+
+    書き込みは一時ファイル経由で置き換えるため、途中でプロセスが落ちても
+    壊れたファイルが残らない。
+    """
+
+    def __init__(self, filename: str, cache_dir: str = None):
+        self.path = os.path.join(cache_dir or get_cache_dir(), filename)
+        self.lock = threading.RLock()
+
+    def load(self, default: Any = None) -> Any:
+        with self.lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return default
+            except (OSError, ValueError) as e:
+                print(f"Error loading {self.path}: {e}")
+                return default
+
+    def save(self, data: Any) -> bool:
+        with self.lock:
+            try:
+                directory = os.path.dirname(self.path)
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+                return True
+            except OSError as e:
+                print(f"Error saving {self.path}: {e}")
+                return False
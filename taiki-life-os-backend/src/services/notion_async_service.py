@@ -0,0 +1,124 @@
+"""
+非同期Notionサービス - 独立した読み取りを1つのイベントループ上で並行実行する
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.services.notion_service import NotionService
+
+
+class _EventLoopThread:
+    """バックグラウンドスレッドで動き続ける共有イベントループ
+
+    Flaskのリクエストスレッドからは run() でコルーチンを投入して結果を待つ。
+    HTTP呼び出し自体は共有HTTPクライアント（レート制限付き）をスレッドプール上で実行する。
+    """
+
+    def __init__(self, max_workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="notion-async")
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="notion-event-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro: Awaitable, timeout: float = None) -> Any:
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("イベントループのスレッド内から run() は呼び出せません。await を使ってください")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+
+_loop_thread: Optional[_EventLoopThread] = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop_thread() -> _EventLoopThread:
+    global _loop_thread
+    if _loop_thread is None:
+        with _loop_lock:
+            if _loop_thread is None:
+                _loop_thread = _EventLoopThread(int(os.getenv("NOTION_ASYNC_MAX_WORKERS", "10")))
+    return _loop_thread
+
+
+class AsyncNotionService:
+    """NotionService（およびそのサブクラス）の非同期ラッパー
+
+    query_database/create_page/update_page/delete_page/get_database_schema を
+    awaitable として提供する。ラップしたサービスの他の公開メソッド
+    （NotionUnifiedService.get_taiki_tasks など）も同じ名前で await できる。
+    同時実行数は max_concurrency で制限される。
+    """
+
+    def __init__(self, service: NotionService = None, max_concurrency: int = None):
+        if service is None:
+            service = NotionService()
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("NOTION_ASYNC_CONCURRENCY", "3"))
+        self.service = service
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # セマフォは共有イベントループ上で初めて使われた時に生成する
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        """同期関数を並行度の上限内でスレッドプール上で実行"""
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                _get_loop_thread().executor,
+                functools.partial(func, *args, **kwargs)
+            )
+
+    async def query_database(self, database_id: str, filter_conditions: Dict = None, sorts: List = None, page_size: int = 100) -> List[Dict]:
+        return await self.call(self.service.query_database, database_id, filter_conditions, sorts, page_size)
+
+    async def create_page(self, database_id: str, properties: Dict) -> Optional[str]:
+        return await self.call(self.service.create_page, database_id, properties)
+
+    async def update_page(self, page_id: str, properties: Dict) -> bool:
+        return await self.call(self.service.update_page, page_id, properties)
+
+    async def delete_page(self, page_id: str) -> bool:
+        return await self.call(self.service.delete_page, page_id)
+
+    async def get_database_schema(self, database_id: str) -> Optional[Dict]:
+        return await self.call(self.service.get_database_schema, database_id)
+
+    def __getattr__(self, name: str):
+        # ラップしたサービスの公開メソッドを非同期版として公開する
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self.service, name)
+        if not callable(attr):
+            return attr
+
+        async def async_method(*args, **kwargs):
+            return await self.call(attr, *args, **kwargs)
+
+        async_method.__name__ = name
+        return async_method
+
+    @staticmethod
+    async def gather(*aws: Awaitable, return_exceptions: bool = False) -> List[Any]:
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+
+    @staticmethod
+    def run(coro: Awaitable, timeout: float = None) -> Any:
+        """同期コード（Flaskのルートなど）から共有イベントループ上でコルーチンを実行"""
+        return _get_loop_thread().run(coro, timeout)
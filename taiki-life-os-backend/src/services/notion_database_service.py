@@ -1,8 +1,8 @@
-import requests
 import json
 from datetime import datetime, date
 from typing import Dict, List, Optional, Any
 from src.services.notion_service import NotionService
+from src.services.notion_http_client import get_notion_base_url, get_notion_http_client
 
 class NotionDatabaseService:
     """Notionデータベースの検索・分析を行うサービス"""
@@ -10,42 +10,22 @@ class NotionDatabaseService:
     def __init__(self, api_key: str = None):
         self.notion_service = NotionService(api_key)
         self.api_key = api_key
-        self.base_url = "https://api.notion.com/v1"
+        self.base_url = get_notion_base_url()
         self.headers = {
             "Authorization": f"Bearer {api_key}" if api_key else "",
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
+        self.http = get_notion_http_client()
     
-    def search_databases(self, query: str = "") -> List[Dict]:
-        """データベースを検索"""
-        payload = {
-            "filter": {
-                "value": "database",
-                "property": "object"
-            }
-        }
-        
-        if query:
-            payload["query"] = query
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/search",
-                headers=self.headers,
-                json=payload
-            )
-            if response.status_code == 200:
-                return response.json()["results"]
-            return []
-        except Exception as e:
-            print(f"Error searching databases: {e}")
-            return []
+    def search_databases(self, query: str = "", limit: int = None) -> List[Dict]:
+        """データベースを検索（最大 limit 件。Noneの場合は全件）"""
+        return self.notion_service.search(query, "database", limit)
     
     def get_page_children(self, page_id: str) -> List[Dict]:
         """ページの子要素（データベースを含む）を取得"""
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/blocks/{page_id}/children",
                 headers=self.headers
             )
@@ -59,7 +39,7 @@ class NotionDatabaseService:
     def get_database_info(self, database_id: str) -> Optional[Dict]:
         """データベースの詳細情報を取得"""
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/databases/{database_id}",
                 headers=self.headers
             )
@@ -110,7 +90,7 @@ class NotionDatabaseService:
             payload = {
                 "page_size": limit
             }
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/databases/{database_id}/query",
                 headers=self.headers,
                 json=payload
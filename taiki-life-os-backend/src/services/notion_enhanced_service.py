@@ -1,8 +1,10 @@
 import requests
 import json
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 from src.services.notion_service import NotionService
+from src.services.notion_async_service import AsyncNotionService
+from src.services.delta_sync import get_delta_sync
 
 class NotionEnhancedService(NotionService):
     """強化されたNotion連携サービス - 特定のデータベースとの連携に特化"""
@@ -441,15 +443,37 @@ class NotionEnhancedService(NotionService):
         if target_date is None:
             target_date = date.today()
         
+        # 日次タスクとメトリクスは独立しているので並行して取得する
+        # （差分同期が使えれば、前回以降に更新されたページだけをNotionから取り込む）
+        async_service = AsyncNotionService(self)
+        (daily_tasks, tasks_pull), (metrics, metrics_pull) = async_service.run(async_service.gather(
+            async_service.call(self._load_for_sync, self.DAILY_TASKS_DB_ID, self._parse_daily_task, target_date, self.get_daily_tasks),
+            async_service.call(self._load_for_sync, self.METRICS_DB_ID, self._parse_metric, target_date, self.get_metrics)
+        ))
+        
         result = {
             "date": target_date.isoformat(),
-            "daily_tasks": self.get_daily_tasks(target_date),
-            "metrics": self.get_metrics(target_date),
+            "daily_tasks": daily_tasks,
+            "metrics": metrics,
+            "pull": {
+                "daily_tasks": tasks_pull,
+                "metrics": metrics_pull
+            },
             "sync_time": datetime.now().isoformat()
         }
         
         return result
     
+    def _load_for_sync(self, database_id: str, parse: Callable[[Dict], Dict], target_date: date,
+                       fallback: Callable[[date], List[Dict]]) -> Tuple[List[Dict], Optional[Dict]]:
+        """差分同期で取り込んだページから指定日の分を返す。差分同期が使えなければ fallback で全件取得する"""
+        loaded = get_delta_sync().load_pages(self, database_id)
+        if loaded is None:
+            return fallback(target_date), None
+        pages, pull = loaded
+        items = [parse(page) for page in pages]
+        return [item for item in items if item.get("date") == target_date], pull
+    
     def sync_weekly_data(self, week_start: date = None) -> Dict:
         """指定週の全データを同期"""
         if week_start is None:
@@ -0,0 +1,302 @@
+"""
+Notion API用の共有HTTPクライアント - プロセス全体で1つのコネクションプールを使い回す
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.services.circuit_breaker import CircuitBreaker
+from src.services.notion_metrics import NotionMetrics, get_notion_metrics, operation_name
+from src.services.rate_limiter import TokenBucket
+
+NOTION_API_BASE_URL = "https://api.notion.com/v1"
+NOTION_API_VERSION = "2022-06-28"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 5xx/通信エラー時に再送してよいメソッド（PATCHはプロパティの上書きのみなので冪等として扱う）
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PATCH", "DELETE"}
+# POSTでも読み取り専用のエンドポイント
+READ_ONLY_POST_SUFFIXES = ("/query", "/search")
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+
+# request_deadline() で設定した、このスレッドから送るリクエストの期限（time.monotonic() の値）
+_deadline = threading.local()
+
+
+@contextmanager
+def request_deadline(seconds: float) -> Iterator[None]:
+    """このブロック内でこのスレッドから送るリクエストを、開始から seconds 秒で打ち切る
+
+    タイムアウトを残り時間に縮め、期限までに終わらない再送は行わない。
+    期限を過ぎてから送ろうとしたリクエストは requests.Timeout になる。
+    """
+    previous = getattr(_deadline, "at", None)
+    deadline_at = time.monotonic() + seconds
+    _deadline.at = deadline_at if previous is None else min(previous, deadline_at)
+    try:
+        yield
+    finally:
+        _deadline.at = previous
+
+
+def _remaining_time() -> Optional[float]:
+    """request_deadline() の期限までの残り秒数（期限がなければNone）"""
+    deadline_at = getattr(_deadline, "at", None)
+    if deadline_at is None:
+        return None
+    return deadline_at - time.monotonic()
+
+
+def has_request_deadline() -> bool:
+    """このスレッドに request_deadline() の期限が設定されているか"""
+    return getattr(_deadline, "at", None) is not None
+
+
+def get_notion_base_url() -> str:
+    """Notion APIのベースURL（NOTION_API_BASE_URLでローカルのスタブサーバー等に向けられる）"""
+    return (os.getenv("NOTION_API_BASE_URL") or NOTION_API_BASE_URL).rstrip("/")
+
+
+class NotionHttpClient:
+    """keep-aliveを有効にしたrequests.Sessionのラッパー
+
+    全てのNotionサービスクラスが同じインスタンスを共有するため、
+    2回目以降のリクエストはTCP/TLSハンドシェイクを省略できる。
+    送信前にトークンバケットで流量を平準化し、429はRetry-Afterに従って再送する。
+    通信エラー・5xx・低速応答が続くとサーキットブレーカーが開き、
+    以降の呼び出しは上流を待たずに CircuitOpenError で即座に失敗する。
+    """
+
+    def __init__(self, pool_size: int = None, connect_timeout: float = None, read_timeout: float = None,
+                 rate_limiter: TokenBucket = None, max_retries: int = None, metrics: NotionMetrics = None,
+                 circuit_breaker: CircuitBreaker = None):
+        if pool_size is None:
+            pool_size = _env_int("NOTION_HTTP_POOL_SIZE", 10)
+        if connect_timeout is None:
+            connect_timeout = _env_float("NOTION_HTTP_CONNECT_TIMEOUT", 3.05)
+        if read_timeout is None:
+            read_timeout = _env_float("NOTION_HTTP_READ_TIMEOUT", 20.0)
+        if rate_limiter is None:
+            rate = _env_float("NOTION_RATE_LIMIT_RPS", 3.0)
+            rate_limiter = TokenBucket(rate, _env_float("NOTION_RATE_LIMIT_BURST", max(rate, 1)))
+        if max_retries is None:
+            max_retries = _env_int("NOTION_MAX_RETRIES", 3)
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker(
+                failure_threshold=_env_int("NOTION_CIRCUIT_FAILURE_THRESHOLD", 5),
+                slow_call_seconds=_env_float("NOTION_CIRCUIT_SLOW_CALL_SECONDS", 5.0),
+                reset_timeout=_env_float("NOTION_CIRCUIT_RESET_TIMEOUT", 30.0)
+            )
+
+        self.pool_size = pool_size
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.metrics = metrics or get_notion_metrics()
+        self.circuit_breaker = circuit_breaker
+        self.backoff_base = _env_float("NOTION_RETRY_BASE_DELAY", 0.5)
+        self.backoff_max = _env_float("NOTION_RETRY_MAX_DELAY", 8.0)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._stats_lock = threading.Lock()
+        self._retries = 0
+        self._throttled = 0
+        self._backoff_seconds_total = 0.0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """レート制限・再送・既定タイムアウトを適用してリクエストを送信
+
+        ブレーカーが開いている場合は CircuitOpenError を送出する。
+        """
+        base_timeout = kwargs.pop("timeout", self.timeout)
+        if not isinstance(base_timeout, tuple):
+            base_timeout = (base_timeout, base_timeout)
+        method = method.upper()
+        retryable = self._is_idempotent(method, url)
+
+        operation = operation_name(method, url)
+        attempt = 0
+        while True:
+            self._check_deadline(operation)
+            self.circuit_breaker.before_call()
+            self.rate_limiter.acquire()
+            remaining = _remaining_time()
+            if remaining is not None and remaining <= 0:
+                # レート制限の待機中に期限を過ぎた。送っていないので上流の成否としては数えない
+                self.circuit_breaker.release_trial()
+                self._check_deadline(operation)
+            # 期限のためにタイムアウトを縮めたか（その場合のタイムアウトは上流の障害ではない）
+            cut_short = remaining is not None and remaining < max(base_timeout)
+            kwargs["timeout"] = base_timeout if remaining is None else tuple(min(t, remaining) for t in base_timeout)
+            started_at = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if isinstance(e, requests.Timeout) and cut_short:
+                    self.metrics.observe_request(operation, "deadline", time.perf_counter() - started_at)
+                    self.circuit_breaker.release_trial()
+                    raise
+                status = "timeout" if isinstance(e, requests.Timeout) else "connection_error"
+                self.metrics.observe_request(operation, status, time.perf_counter() - started_at)
+                self.circuit_breaker.record_failure()
+                delay = self._backoff_delay(attempt)
+                if not retryable or attempt >= self.max_retries or self._past_deadline(delay):
+                    raise
+                self.metrics.record_retry(operation, status)
+                self._sleep_before_retry(delay)
+                attempt += 1
+                continue
+            except Exception:
+                self.circuit_breaker.record_failure()
+                raise
+            elapsed = time.perf_counter() - started_at
+            self.metrics.observe_request(operation, str(response.status_code), elapsed)
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                # 429を含め応答が返っていれば上流は生きている（遅すぎる応答は失敗として数える）
+                self.circuit_breaker.record_success(elapsed)
+
+            if response.status_code == 429:
+                self.metrics.record_throttled(operation)
+
+            if response.status_code == 429 and attempt < self.max_retries:
+                # Notionは429のリクエストを処理しないので、メソッドに関係なく再送できる
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                self.rate_limiter.pause(delay)
+                if self._past_deadline(delay):
+                    return response
+                with self._stats_lock:
+                    self._throttled += 1
+                self.metrics.record_retry(operation, "429")
+                self._sleep_before_retry(0)
+                attempt += 1
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES and retryable and attempt < self.max_retries:
+                delay = self._backoff_delay(attempt)
+                if self._past_deadline(delay):
+                    return response
+                self.metrics.record_retry(operation, str(response.status_code))
+                self._sleep_before_retry(delay)
+                attempt += 1
+                continue
+
+            return response
+
+    def _check_deadline(self, operation: str):
+        """request_deadline() の期限を過ぎていれば requests.Timeout を送出する"""
+        remaining = _remaining_time()
+        if remaining is not None and remaining <= 0:
+            raise requests.Timeout(f"期限を過ぎたため送信しません: {operation}")
+
+    def _past_deadline(self, delay: float) -> bool:
+        """delay 秒待つと request_deadline() の期限を過ぎるか"""
+        remaining = _remaining_time()
+        return remaining is not None and remaining <= delay
+
+    def _is_idempotent(self, method: str, url: str) -> bool:
+        if method in IDEMPOTENT_METHODS:
+            return True
+        return method == "POST" and urlparse(url).path.rstrip("/").endswith(READ_ONLY_POST_SUFFIXES)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """ジッター付き指数バックオフ"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Retry-Afterヘッダー（秒数またはHTTP日付）を秒数に変換"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def _sleep_before_retry(self, delay: float):
+        with self._stats_lock:
+            self._retries += 1
+            self._backoff_seconds_total += delay
+        if delay > 0:
+            time.sleep(delay)
+
+    def get_stats(self) -> Dict:
+        """レート制限・再送の統計を取得"""
+        with self._stats_lock:
+            stats = {
+                "retries": self._retries,
+                "throttled": self._throttled,
+                "backoff_seconds_total": round(self._backoff_seconds_total, 6)
+            }
+        stats["rate_limiter"] = self.rate_limiter.get_stats()
+        stats["circuit_breaker"] = self.circuit_breaker.get_stats()
+        return stats
+
+    def render_metrics(self) -> str:
+        """呼び出しメトリクスとレート制限の統計をPrometheus形式で出力"""
+        return self.metrics.render_prometheus(self.rate_limiter.get_stats(), self.circuit_breaker.get_stats())
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client: Optional[NotionHttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_notion_http_client() -> NotionHttpClient:
+    """プロセス共有のHTTPクライアントを取得（初回呼び出し時に生成）"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = NotionHttpClient()
+    return _client
@@ -0,0 +1,162 @@
+"""
+Notion API呼び出しの計測 - 操作ごとのカウンタ・レイテンシヒストグラムをPrometheus形式で出力する
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# レイテンシヒストグラムのバケット境界（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# サーキットブレーカーの状態をゲージの値に変換
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+# パス中でIDではない固定のセグメント
+_PATH_KEYWORDS = {"v1", "search", "databases", "pages", "blocks", "children", "query", "users", "me", "comments", "properties"}
+
+
+def operation_name(method: str, url: str) -> str:
+    """メソッドとURLから、IDを {id} に置き換えた操作名を作る（例: POST /databases/{id}/query）"""
+    segments = [segment for segment in urlparse(url).path.split("/") if segment]
+    if "v1" in segments:
+        segments = segments[segments.index("v1") + 1:]
+    normalized = [segment if segment in _PATH_KEYWORDS else "{id}" for segment in segments]
+    return f"{method.upper()} /{'/'.join(normalized)}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+class NotionMetrics:
+    """スレッドセーフなNotion呼び出しメトリクス"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._bucket_counts: Dict[str, List[int]] = {}
+        self._latency_sum: Dict[str, float] = defaultdict(float)
+        self._latency_count: Dict[str, int] = defaultdict(int)
+        self._retries: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._throttled: Dict[str, int] = defaultdict(int)
+
+    def observe_request(self, operation: str, status: str, seconds: float):
+        """1回の送信（再送も1回として数える）の結果とレイテンシを記録"""
+        with self._lock:
+            self._requests[(operation, str(status))] += 1
+            counts = self._bucket_counts.setdefault(operation, [0] * len(self.buckets))
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[index] += 1
+                    break
+            self._latency_sum[operation] += seconds
+            self._latency_count[operation] += 1
+
+    def record_retry(self, operation: str, reason: str):
+        with self._lock:
+            self._retries[(operation, reason)] += 1
+
+    def record_throttled(self, operation: str):
+        with self._lock:
+            self._throttled[operation] += 1
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._bucket_counts.clear()
+            self._latency_sum.clear()
+            self._latency_count.clear()
+            self._retries.clear()
+            self._throttled.clear()
+
+    def render_prometheus(self, rate_limiter_stats: Optional[Dict] = None, circuit_breaker_stats: Optional[Dict] = None) -> str:
+        """Prometheusのテキスト形式（version 0.0.4）で出力"""
+        with self._lock:
+            requests = dict(self._requests)
+            bucket_counts = {op: list(counts) for op, counts in self._bucket_counts.items()}
+            latency_sum = dict(self._latency_sum)
+            latency_count = dict(self._latency_count)
+            retries = dict(self._retries)
+            throttled = dict(self._throttled)
+
+        lines = [
+            "# HELP notion_requests_total Notion API requests sent, by operation and HTTP status.",
+            "# TYPE notion_requests_total counter"
+        ]
+        for (operation, status), value in sorted(requests.items()):
+            lines.append(f"notion_requests_total{{{_labels(operation=operation, status=status)}}} {value}")
+
+        lines += [
+            "# HELP notion_request_duration_seconds Notion API request latency.",
+            "# TYPE notion_request_duration_seconds histogram"
+        ]
+        for operation in sorted(bucket_counts):
+            cumulative = 0
+            for bound, count in zip(self.buckets, bucket_counts[operation]):
+                cumulative += count
+                lines.append(f"notion_request_duration_seconds_bucket{{{_labels(operation=operation, le=bound)}}} {cumulative}")
+            lines.append(f"notion_request_duration_seconds_bucket{{{_labels(operation=operation, le='+Inf')}}} {latency_count[operation]}")
+            lines.append(f"notion_request_duration_seconds_sum{{{_labels(operation=operation)}}} {latency_sum[operation]:.6f}")
+            lines.append(f"notion_request_duration_seconds_count{{{_labels(operation=operation)}}} {latency_count[operation]}")
+
+        lines += [
+            "# HELP notion_retries_total Notion API retries, by operation and reason.",
+            "# TYPE notion_retries_total counter"
+        ]
+        for (operation, reason), value in sorted(retries.items()):
+            lines.append(f"notion_retries_total{{{_labels(operation=operation, reason=reason)}}} {value}")
+
+        lines += [
+            "# HELP notion_throttled_total Notion API responses with HTTP 429, by operation.",
+            "# TYPE notion_throttled_total counter"
+        ]
+        for operation, value in sorted(throttled.items()):
+            lines.append(f"notion_throttled_total{{{_labels(operation=operation)}}} {value}")
+
+        if rate_limiter_stats is not None:
+            lines += [
+                "# HELP notion_rate_limiter_acquired_total Tokens taken from the client-side rate limiter.",
+                "# TYPE notion_rate_limiter_acquired_total counter",
+                f"notion_rate_limiter_acquired_total {rate_limiter_stats.get('acquired', 0)}",
+                "# HELP notion_rate_limiter_waits_total Requests that had to wait for the rate limiter.",
+                "# TYPE notion_rate_limiter_waits_total counter",
+                f"notion_rate_limiter_waits_total {rate_limiter_stats.get('waited', 0)}",
+                "# HELP notion_rate_limiter_wait_seconds_total Time spent waiting for the rate limiter.",
+                "# TYPE notion_rate_limiter_wait_seconds_total counter",
+                f"notion_rate_limiter_wait_seconds_total {rate_limiter_stats.get('wait_seconds_total', 0.0):.6f}"
+            ]
+
+        if circuit_breaker_stats is not None:
+            lines += [
+                "# HELP notion_circuit_state Circuit breaker state (0=closed, 1=half_open, 2=open).",
+                "# TYPE notion_circuit_state gauge",
+                f"notion_circuit_state {_CIRCUIT_STATES.get(circuit_breaker_stats.get('state'), 0)}",
+                "# HELP notion_circuit_opened_total Times the circuit breaker opened.",
+                "# TYPE notion_circuit_opened_total counter",
+                f"notion_circuit_opened_total {circuit_breaker_stats.get('opened', 0)}",
+                "# HELP notion_circuit_rejected_total Calls rejected while the circuit breaker was open.",
+                "# TYPE notion_circuit_rejected_total counter",
+                f"notion_circuit_rejected_total {circuit_breaker_stats.get('rejected', 0)}"
+            ]
+
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[NotionMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_notion_metrics() -> NotionMetrics:
+    """プロセス共有のメトリクスを取得"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = NotionMetrics()
+    return _metrics
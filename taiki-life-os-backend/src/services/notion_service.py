@@ -1,8 +1,19 @@
-import requests
 import json
 import os
 from datetime import datetime, date
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
+from src.services.notion_http_client import get_notion_base_url, get_notion_http_client, has_request_deadline
+from src.services.search_cache import get_search_cache
+from src.services.single_flight import get_single_flight
+
+
+class NotionApiError(Exception):
+    """Notion APIの呼び出しが失敗した（raise_errors=True の読み取りでのみ送出）"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
 
 class NotionService:
     """Notion APIとの連携を管理するサービスクラス"""
@@ -11,17 +22,19 @@ class NotionService:
         if api_key is None:
             api_key = os.getenv('NOTION_API_KEY')
         self.api_key = api_key
-        self.base_url = "https://api.notion.com/v1"
+        self.base_url = get_notion_base_url()
         self.headers = {
             "Authorization": f"Bearer {api_key}" if api_key else "",
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
+        self.http = get_notion_http_client()
+        self.single_flight = get_single_flight()
     
     def test_connection(self) -> bool:
         """Notion APIへの接続をテスト"""
         try:
-            response = requests.get(f"{self.base_url}/users", headers=self.headers)
+            response = self.http.get(f"{self.base_url}/users", headers=self.headers)
             return response.status_code == 200
         except Exception:
             return False
@@ -45,7 +58,7 @@ class NotionService:
         }
         
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/databases",
                 headers=self.headers,
                 json=payload
@@ -56,25 +69,127 @@ class NotionService:
         except Exception:
             return None
     
-    def query_database(self, database_id: str, filter_conditions: Dict = None, sorts: List = None) -> List[Dict]:
-        """データベースをクエリ"""
-        payload = {}
+    def query_database(self, database_id: str, filter_conditions: Dict = None, sorts: List = None, page_size: int = 100,
+                       raise_errors: bool = False) -> List[Dict]:
+        """データベースをクエリ（全ページ分の結果をリストで返す）
+
+        同じ条件のクエリが同時に実行中なら、その結果を共有して上流へのリクエストを1回にまとめる。
+        raise_errors=True の場合、失敗時に途中までの結果を返さず NotionApiError を送出する。
+        2ページ目以降の失敗は raise_errors=False でも NotionApiError を送出する。
+        request_deadline() の期限付きのクエリは、期限切れの失敗を他の呼び出し元と共有しないようまとめない。
+        """
+        if has_request_deadline():
+            return list(self.iter_database_query(database_id, filter_conditions, sorts, page_size, raise_errors))
+        key = (
+            self.api_key,
+            database_id,
+            json.dumps(filter_conditions, sort_keys=True, ensure_ascii=False),
+            json.dumps(sorts, sort_keys=True, ensure_ascii=False),
+            page_size,
+            raise_errors
+        )
+        results = self.single_flight.do(
+            key, lambda: list(self.iter_database_query(database_id, filter_conditions, sorts, page_size, raise_errors))
+        )
+        # 呼び出し元ごとにリストを分け、並べ替えや追加が他の呼び出し元に影響しないようにする
+        return list(results)
+
+    def iter_database_query(self, database_id: str, filter_conditions: Dict = None, sorts: List = None, page_size: int = 100,
+                            raise_errors: bool = False) -> Iterator[Dict]:
+        """データベースをクエリし、has_more/next_cursorを辿って結果を1件ずつ返す
+
+        次のページは前のページを読み切った時点で初めて取得するため、
+        大きなデータベースでも一定のメモリで処理できる。
+        2ページ目以降の取得に失敗した場合は、途中までの結果を完全な結果と取り違えないよう
+        raise_errors に関わらず NotionApiError を送出する。
+        """
+        payload = {"page_size": max(1, min(page_size, 100))}
         if filter_conditions:
             payload["filter"] = filter_conditions
         if sorts:
             payload["sorts"] = sorts
+
+        while True:
+            # 最初のページの失敗だけは従来通り空の結果として扱える
+            must_raise = raise_errors or "start_cursor" in payload
+            try:
+                response = self.http.post(
+                    f"{self.base_url}/databases/{database_id}/query",
+                    headers=self.headers,
+                    json=payload
+                )
+                if response.status_code == 404:
+                    self._on_database_not_found(database_id)
+                    if "start_cursor" in payload:
+                        raise NotionApiError("データベースクエリエラー: 404（ページ取得の途中）", 404)
+                    return
+                if response.status_code != 200:
+                    if must_raise:
+                        raise NotionApiError(f"データベースクエリエラー: {response.status_code}", response.status_code)
+                    return
+                data = response.json()
+            except NotionApiError:
+                raise
+            except Exception as e:
+                if must_raise:
+                    raise NotionApiError(f"データベースクエリエラー: {e}") from e
+                return
+
+            yield from data.get("results", [])
+
+            next_cursor = data.get("next_cursor")
+            if not data.get("has_more") or not next_cursor:
+                return
+            payload["start_cursor"] = next_cursor
+    
+    def search(self, query: str = "", object_type: str = None, limit: int = None) -> List[Dict]:
+        """ワークスペースを検索（最大 limit 件。同じ検索の結果は短時間キャッシュして共有する）
         
-        try:
-            response = requests.post(
-                f"{self.base_url}/databases/{database_id}/query",
-                headers=self.headers,
-                json=payload
-            )
-            if response.status_code == 200:
-                return response.json()["results"]
-            return []
-        except Exception:
-            return []
+        object_type は "page" または "database"（Noneなら両方）。失敗時は空のリスト。
+        """
+        return get_search_cache().search(self, query, object_type, limit)
+    
+    def iter_search(self, query: str = "", object_type: str = None, page_size: int = 100,
+                    raise_errors: bool = False) -> Iterator[Dict]:
+        """/search の結果を next_cursor を辿って1件ずつ返す（次のページは必要になった時点で取得）"""
+        payload = {"page_size": max(1, min(page_size, 100))}
+        if query:
+            payload["query"] = query
+        if object_type:
+            payload["filter"] = {"value": object_type, "property": "object"}
+        
+        while True:
+            try:
+                response = self.http.post(
+                    f"{self.base_url}/search",
+                    headers=self.headers,
+                    json=payload
+                )
+                if response.status_code != 200:
+                    if raise_errors:
+                        raise NotionApiError(f"検索エラー: {response.status_code}", response.status_code)
+                    return
+                data = response.json()
+            except NotionApiError:
+                raise
+            except Exception as e:
+                if raise_errors:
+                    raise NotionApiError(f"検索エラー: {e}") from e
+                return
+            
+            yield from data.get("results", [])
+            
+            next_cursor = data.get("next_cursor")
+            if not data.get("has_more") or not next_cursor:
+                return
+            payload["start_cursor"] = next_cursor
+    
+    def _on_database_not_found(self, database_id: str):
+        """データベースが見つからなかった（削除・共有解除された）時のフック
+
+        サブクラスでデータベースIDのキャッシュを破棄するために使う。
+        """
+        pass
     
     def create_page(self, database_id: str, properties: Dict) -> Optional[str]:
         """データベースに新しいページを作成"""
@@ -87,7 +202,7 @@ class NotionService:
         }
         
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/pages",
                 headers=self.headers,
                 json=payload
@@ -105,7 +220,7 @@ class NotionService:
         }
         
         try:
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.base_url}/pages/{page_id}",
                 headers=self.headers,
                 json=payload
@@ -121,7 +236,7 @@ class NotionService:
         }
         
         try:
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.base_url}/pages/{page_id}",
                 headers=self.headers,
                 json=payload
@@ -133,7 +248,7 @@ class NotionService:
     def get_database_schema(self, database_id: str) -> Optional[Dict]:
         """データベースのスキーマを取得"""
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/databases/{database_id}",
                 headers=self.headers
             )
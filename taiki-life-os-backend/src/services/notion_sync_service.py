@@ -1,8 +1,18 @@
+import hashlib
 import os
-import requests
 import json
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+from src.services.local_storage import JsonFileStore
+from src.services.notion_http_client import get_notion_base_url, get_notion_http_client
+
+# setup_life_os_databases が作成するデータベースのタイトル
+DATABASE_TITLES = {
+    'daily_tasks': "Life OS - 日次タスク",
+    'weekly_goals': "Life OS - 週次目標",
+    'metrics': "Life OS - メトリクス"
+}
 
 class NotionSyncService:
     def __init__(self):
@@ -11,13 +21,98 @@ class NotionSyncService:
         
         if not self.api_key:
             raise ValueError("NOTION_API_KEY environment variable is required")
-        self.base_url = "https://api.notion.com/v1"
+        self.base_url = get_notion_base_url()
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
-        self.database_ids = {}
+        self.http = get_notion_http_client()
+        
+        # 作成済みデータベースのIDはディスクに保存し、再起動後も setup を呼ばずに使えるようにする
+        self.store = JsonFileStore("sync_database_ids.json")
+        self.store_key = hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:12]
+        self.database_ids = dict((self.store.load(default={}) or {}).get(self.store_key, {}))
+        self._validated = False
+        self._validate_lock = threading.Lock()
+    
+    def _save_database_ids(self):
+        with self.store.lock:
+            data = self.store.load(default={}) or {}
+            data[self.store_key] = self.database_ids
+            self.store.save(data)
+    
+    def ensure_database_ids(self) -> Dict[str, str]:
+        """保存済みのIDを /search 1回で検証する（プロセスごとに最初の1回だけ）
+        
+        削除・共有解除されたIDは外し、保存がなくても同じタイトルのデータベースがあれば引き継ぐ。
+        検索に失敗した場合は保存済みのIDをそのまま使い、次回また検証する。
+        """
+        if self._validated:
+            return self.database_ids
+        with self._validate_lock:
+            if self._validated:
+                return self.database_ids
+            found = self.find_life_os_databases()
+            if found is None:
+                return self.database_ids
+            
+            database_ids = {}
+            for key, title in DATABASE_TITLES.items():
+                candidates = found.get(title, [])
+                if self.database_ids.get(key) in candidates:
+                    database_ids[key] = self.database_ids[key]
+                elif candidates:
+                    database_ids[key] = candidates[0]
+            if database_ids != self.database_ids:
+                self.database_ids = database_ids
+                self._save_database_ids()
+            self._validated = True
+            return self.database_ids
+    
+    def find_life_os_databases(self) -> Optional[Dict[str, List[str]]]:
+        """アクセスできる「Life OS - 」データベースをタイトル→IDのリスト（作成が古い順）で返す（失敗時はNone）"""
+        try:
+            payload = {
+                "query": "Life OS - ",
+                "filter": {"property": "object", "value": "database"},
+                "page_size": 100
+            }
+            databases = []
+            while True:
+                response = self.http.post(
+                    f"{self.base_url}/search",
+                    headers=self.headers,
+                    json=payload
+                )
+                
+                if response.status_code != 200:
+                    print(f"Database search failed: {response.status_code} - {response.text}")
+                    return None
+                
+                data = response.json()
+                databases.extend(data.get('results', []))
+                if not data.get('has_more') or not data.get('next_cursor'):
+                    break
+                payload["start_cursor"] = data['next_cursor']
+            
+            found: Dict[str, List[Dict]] = {}
+            for database in databases:
+                if database.get('archived') or database.get('in_trash'):
+                    continue
+                title = "".join(
+                    part.get('plain_text') or part.get('text', {}).get('content', '')
+                    for part in database.get('title', [])
+                )
+                found.setdefault(title, []).append(database)
+            return {
+                title: [database['id'] for database in sorted(items, key=lambda d: d.get('created_time', ''))]
+                for title, items in found.items()
+            }
+            
+        except Exception as e:
+            print(f"Error searching databases: {e}")
+            return None
         
     def create_database(self, title: str, properties: Dict) -> Optional[str]:
         """Notionデータベースを作成"""
@@ -28,7 +123,7 @@ class NotionSyncService:
                 "properties": properties
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/databases",
                 headers=self.headers,
                 json=data
@@ -46,8 +141,8 @@ class NotionSyncService:
             return None
     
     def setup_life_os_databases(self) -> Dict[str, str]:
-        """Life OS用のデータベースをセットアップ"""
-        databases = {}
+        """Life OS用のデータベースをセットアップ（作成済みのデータベースは作り直さない）"""
+        databases = dict(self.ensure_database_ids())
         
         # 日次タスクデータベース
         daily_tasks_properties = {
@@ -68,9 +163,10 @@ class NotionSyncService:
             }
         }
         
-        daily_db_id = self.create_database("Life OS - 日次タスク", daily_tasks_properties)
-        if daily_db_id:
-            databases['daily_tasks'] = daily_db_id
+        if 'daily_tasks' not in databases:
+            daily_db_id = self.create_database(DATABASE_TITLES['daily_tasks'], daily_tasks_properties)
+            if daily_db_id:
+                databases['daily_tasks'] = daily_db_id
         
         # 週次目標データベース
         weekly_goals_properties = {
@@ -81,9 +177,10 @@ class NotionSyncService:
             "達成率": {"formula": {"expression": "prop(\"現在値\") / prop(\"目標値\") * 100"}}
         }
         
-        weekly_db_id = self.create_database("Life OS - 週次目標", weekly_goals_properties)
-        if weekly_db_id:
-            databases['weekly_goals'] = weekly_db_id
+        if 'weekly_goals' not in databases:
+            weekly_db_id = self.create_database(DATABASE_TITLES['weekly_goals'], weekly_goals_properties)
+            if weekly_db_id:
+                databases['weekly_goals'] = weekly_db_id
         
         # メトリクスデータベース
         metrics_properties = {
@@ -93,32 +190,39 @@ class NotionSyncService:
             "週": {"formula": {"expression": "formatDate(prop(\"日付\"), \"YYYY-[W]WW\")"}}
         }
         
-        metrics_db_id = self.create_database("Life OS - メトリクス", metrics_properties)
-        if metrics_db_id:
-            databases['metrics'] = metrics_db_id
+        if 'metrics' not in databases:
+            metrics_db_id = self.create_database(DATABASE_TITLES['metrics'], metrics_properties)
+            if metrics_db_id:
+                databases['metrics'] = metrics_db_id
         
         self.database_ids = databases
+        self._save_database_ids()
         return databases
     
     def sync_daily_tasks(self, tasks: List[Dict]) -> bool:
         """日次タスクをNotionに同期"""
-        if 'daily_tasks' not in self.database_ids:
+        if 'daily_tasks' not in self.ensure_database_ids():
             return False
             
         try:
             today = datetime.now().strftime("%Y-%m-%d")
             
+            # 今日のタスクを1回のクエリでまとめて取得し、タスク名で引けるようにする
+            pages = self.query_pages(
+                self.database_ids['daily_tasks'],
+                {"property": "日付", "date": {"equals": today}}
+            )
+            if pages is None:
+                return False
+            existing_tasks = self.index_by_title(pages, "タスク名")
+            
             for task in tasks:
-                # 既存のタスクをチェック
-                existing = self.find_task_by_name_and_date(
-                    self.database_ids['daily_tasks'], 
-                    task['text'], 
-                    today
-                )
+                existing = existing_tasks.get(task['text'])
                 
                 if existing:
-                    # 更新
-                    self.update_task(existing['id'], task['completed'])
+                    # 更新（完了状態が変わっていなければ送らない）
+                    if existing.get('properties', {}).get('完了', {}).get('checkbox') != task['completed']:
+                        self.update_task(existing['id'], task['completed'])
                 else:
                     # 新規作成
                     self.create_task(
@@ -137,7 +241,7 @@ class NotionSyncService:
     
     def sync_weekly_goals(self, goals: List[Dict]) -> bool:
         """週次目標をNotionに同期"""
-        if 'weekly_goals' not in self.database_ids:
+        if 'weekly_goals' not in self.ensure_database_ids():
             return False
             
         try:
@@ -146,17 +250,25 @@ class NotionSyncService:
             monday = today - timedelta(days=today.weekday())
             week_start = monday.strftime("%Y-%m-%d")
             
+            # 今週の目標を1回のクエリでまとめて取得し、目標名で引けるようにする
+            pages = self.query_pages(
+                self.database_ids['weekly_goals'],
+                {"property": "週", "date": {"equals": week_start}}
+            )
+            if pages is None:
+                return False
+            existing_goals = self.index_by_title(pages, "目標名")
+            
             for goal in goals:
-                # 既存の目標をチェック
-                existing = self.find_goal_by_name_and_week(
-                    self.database_ids['weekly_goals'],
-                    goal['text'],
-                    week_start
-                )
+                existing = existing_goals.get(goal['text'])
                 
                 if existing:
-                    # 更新
-                    self.update_goal(existing['id'], goal['current'], goal['target'])
+                    # 更新（値が変わっていなければ送らない）
+                    props = existing.get('properties', {})
+                    current = props.get('現在値', {}).get('number')
+                    target = props.get('目標値', {}).get('number')
+                    if (current, target) != (goal['current'], goal['target']):
+                        self.update_goal(existing['id'], goal['current'], goal['target'])
                 else:
                     # 新規作成
                     self.create_goal(
@@ -173,69 +285,40 @@ class NotionSyncService:
             print(f"Error syncing weekly goals: {e}")
             return False
     
-    def find_task_by_name_and_date(self, database_id: str, task_name: str, date: str) -> Optional[Dict]:
-        """タスク名と日付でタスクを検索"""
+    def query_pages(self, database_id: str, filter_data: Dict) -> Optional[List[Dict]]:
+        """条件に合うページをページネーションを辿って全件取得（失敗時はNone）"""
         try:
-            filter_data = {
-                "and": [
-                    {
-                        "property": "タスク名",
-                        "title": {"equals": task_name}
-                    },
-                    {
-                        "property": "日付",
-                        "date": {"equals": date}
-                    }
-                ]
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/databases/{database_id}/query",
-                headers=self.headers,
-                json={"filter": filter_data}
-            )
-            
-            if response.status_code == 200:
-                results = response.json()['results']
-                return results[0] if results else None
-            
-            return None
-            
+            payload = {"filter": filter_data, "page_size": 100}
+            pages = []
+            while True:
+                response = self.http.post(
+                    f"{self.base_url}/databases/{database_id}/query",
+                    headers=self.headers,
+                    json=payload
+                )
+                
+                if response.status_code != 200:
+                    print(f"Database query failed: {response.status_code} - {response.text}")
+                    return None
+                
+                data = response.json()
+                pages.extend(data.get('results', []))
+                if not data.get('has_more') or not data.get('next_cursor'):
+                    return pages
+                payload["start_cursor"] = data['next_cursor']
+                
         except Exception as e:
-            print(f"Error finding task: {e}")
+            print(f"Error querying database: {e}")
             return None
     
-    def find_goal_by_name_and_week(self, database_id: str, goal_name: str, week_start: str) -> Optional[Dict]:
-        """目標名と週でゴールを検索"""
-        try:
-            filter_data = {
-                "and": [
-                    {
-                        "property": "目標名",
-                        "title": {"equals": goal_name}
-                    },
-                    {
-                        "property": "週",
-                        "date": {"equals": week_start}
-                    }
-                ]
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/databases/{database_id}/query",
-                headers=self.headers,
-                json={"filter": filter_data}
-            )
-            
-            if response.status_code == 200:
-                results = response.json()['results']
-                return results[0] if results else None
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error finding goal: {e}")
-            return None
+    def index_by_title(self, pages: List[Dict], title_property: str) -> Dict[str, Dict]:
+        """ページをタイトルで引ける辞書にする（同名のページは最初のものを使う）"""
+        index = {}
+        for page in pages:
+            title = page.get('properties', {}).get(title_property, {}).get('title', [])
+            name = "".join(part.get('plain_text') or part.get('text', {}).get('content', '') for part in title)
+            index.setdefault(name, page)
+        return index
     
     def create_task(self, database_id: str, task_name: str, completed: bool, date: str, category: str):
         """新しいタスクを作成"""
@@ -250,7 +333,7 @@ class NotionSyncService:
                 }
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/pages",
                 headers=self.headers,
                 json=data
@@ -275,7 +358,7 @@ class NotionSyncService:
                 }
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/pages",
                 headers=self.headers,
                 json=data
@@ -296,7 +379,7 @@ class NotionSyncService:
                 }
             }
             
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.base_url}/pages/{page_id}",
                 headers=self.headers,
                 json=data
@@ -318,7 +401,7 @@ class NotionSyncService:
                 }
             }
             
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.base_url}/pages/{page_id}",
                 headers=self.headers,
                 json=data
@@ -350,7 +433,7 @@ class NotionSyncService:
     def test_connection(self) -> bool:
         """Notion API接続をテスト"""
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/users/me",
                 headers=self.headers
             )
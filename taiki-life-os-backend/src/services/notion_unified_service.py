@@ -2,10 +2,25 @@
 統合Notionサービス - Taiki Task、Weekly Goals、人生計画、LIFEルールの統合管理
 """
 import os
-import requests
-from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional, Any
-from src.services.notion_service import NotionService
+import threading
+from collections import OrderedDict
+from datetime import datetime, date, timedelta, timezone
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple, Any
+from src.services.notion_service import NotionApiError, NotionService
+from src.services.notion_async_service import AsyncNotionService
+from src.services.block_cache import get_block_tree_cache
+from src.services.dashboard_snapshot import get_dashboard_snapshot
+from src.services.database_id_cache import get_database_id_cache
+from src.services.delta_sync import get_delta_sync
+
+# 最後に取得できた読み取り結果を保持する件数（日付・週ごとにキーが分かれるため上限を設ける）
+LAST_GOOD_MAX_ENTRIES = 64
+
+
+class StaleList(list):
+    """Notionに問い合わせられず、最後に取得できた結果（またはその代わりの空リスト）を返したことを示すリスト"""
+    stale = True
+
 
 class NotionUnifiedService(NotionService):
     """統合Notionサービス - 複数データベースの統合管理"""
@@ -13,17 +28,66 @@ class NotionUnifiedService(NotionService):
     def __init__(self, api_key: str = None):
         super().__init__(api_key)
         self._database_cache = {}  # データベースIDのキャッシュ
+        self._database_id_cache = get_database_id_cache()  # 再起動後も使える永続キャッシュ
         # 環境変数によるDB ID固定（あれば最優先で利用）
         self.db_id_taiki_task = self._normalize_id(os.getenv("NOTION_DB_TAIKI_TASK"))
         self.db_id_weekly_goals = self._normalize_id(os.getenv("NOTION_DB_WEEKLY_GOALS"))
         self.db_id_life_plan = self._normalize_id(os.getenv("NOTION_DB_LIFE_PLAN"))
         self.db_id_life_rules = self._normalize_id(os.getenv("NOTION_DB_LIFE_RULES"))
+        self._last_good: "OrderedDict[Hashable, List[Dict]]" = OrderedDict()
+        self._last_good_lock = threading.Lock()
 
-    def _get_db_id(self, fallback_name: str, env_db_id: Optional[str]) -> Optional[str]:
+    def _get_db_id(self, fallback_name: str, env_db_id: Optional[str], raise_errors: bool = False) -> Optional[str]:
         """DB IDを環境変数優先で取得し、なければ名称検索にフォールバック"""
         if env_db_id:
             return env_db_id
-        return self.find_database_by_name(fallback_name)
+        return self.find_database_by_name(fallback_name, raise_errors=raise_errors)
+
+    def resolve_database_ids(self) -> Dict[str, Optional[str]]:
+        """統合対象の全データベースIDを解決（未解決の名前はここで検索してキャッシュする）"""
+        return {
+            "taiki_task": self._get_db_id("Taiki Task", self.db_id_taiki_task),
+            "weekly_goals": self._get_db_id("Weekly Goals", self.db_id_weekly_goals),
+            "life_plan": self._get_db_id("人生計画", self.db_id_life_plan),
+            "life_rules": self._get_db_id("LIFEルール", self.db_id_life_rules)
+        }
+
+    def _read_with_fallback(self, key: Hashable, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        """読み取りを実行し、失敗したら最後に取得できた結果を StaleList で返す
+
+        障害中（サーキットブレーカーが開いている間）は上流を待たずに即座に古い結果を返し、
+        バックグラウンドで接続テストを繰り返して復旧を確認する。
+        """
+        try:
+            results = fetch()
+        except NotionApiError as e:
+            print(f"Notion読み取りエラー（保存済みの結果を返します）: {e}")
+            self.http.circuit_breaker.start_probe(self.test_connection)
+            with self._last_good_lock:
+                cached = self._last_good.get(key)
+            return StaleList(cached or [])
+
+        with self._last_good_lock:
+            self._last_good[key] = list(results)
+            self._last_good.move_to_end(key)
+            while len(self._last_good) > LAST_GOOD_MAX_ENTRIES:
+                self._last_good.popitem(last=False)
+        return results
+
+    def _read_database(self, key: Hashable, database_name: str, env_db_id: Optional[str],
+                       read: Callable[[str], List[Dict]]) -> List[Dict]:
+        """DB IDの解決を含めた読み取りを _read_with_fallback で実行する
+
+        IDの検索に失敗した場合も最後に取得できた結果を StaleList で返す。
+        データベースが本当に見つからない場合だけ空のリストを返す。
+        """
+        def fetch() -> List[Dict]:
+            db_id = self._get_db_id(database_name, env_db_id, raise_errors=True)
+            if not db_id:
+                return []
+            return read(db_id)
+
+        return self._read_with_fallback(key, fetch)
 
     def _normalize_id(self, db_id: Optional[str]) -> Optional[str]:
         """NotionのIDが32桁の連結形式ならハイフン区切りに正規化"""
@@ -35,14 +99,35 @@ class NotionUnifiedService(NotionService):
         # 8-4-4-4-12 に挿入
         return f"{raw[0:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:32]}"
     
-    def find_database_by_name(self, database_name: str) -> Optional[str]:
-        """データベース名でデータベースIDを検索"""
+    def find_database_by_name(self, database_name: str, raise_errors: bool = False) -> Optional[str]:
+        """データベース名でデータベースIDを検索
+        
+        メモリ→ディスクの順にキャッシュを参照し、TTLを過ぎたIDは
+        GET /databases/{id} で有効性を確かめてから使う。
+        /search はキャッシュがない時か、キャッシュしたIDが使えなくなった時だけ実行する。
+        raise_errors=True の場合、検索に失敗したら（見つからなかった場合と区別できるよう）
+        None ではなく NotionApiError を送出する。
+        """
         if database_name in self._database_cache:
             return self._database_cache[database_name]
         
+        cached = self._database_id_cache.get(self.api_key, database_name)
+        if cached:
+            db_id, fresh = cached
+            if not fresh:
+                valid = self._validate_database_id(db_id)
+                if valid:
+                    self._database_id_cache.set(self.api_key, database_name, db_id)
+                elif valid is False:
+                    self._database_id_cache.invalidate_id(self.api_key, db_id)
+                    db_id = None
+            if db_id:
+                self._database_cache[database_name] = db_id
+                return db_id
+        
         try:
             # Notion検索APIでデータベースを検索
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/search",
                 headers=self.headers,
                 json={
@@ -61,12 +146,42 @@ class NotionUnifiedService(NotionService):
                     if database_name.lower() in title.lower() or title.lower() in database_name.lower():
                         db_id = result["id"]
                         self._database_cache[database_name] = db_id
+                        self._database_id_cache.set(self.api_key, database_name, db_id)
                         return db_id
+            elif raise_errors:
+                raise NotionApiError(f"データベース検索エラー: {response.status_code}", response.status_code)
             return None
+        except NotionApiError:
+            raise
         except Exception as e:
+            if raise_errors:
+                raise NotionApiError(f"データベース検索エラー: {e}") from e
             print(f"Error finding database {database_name}: {e}")
             return None
     
+    def _validate_database_id(self, database_id: str) -> Optional[bool]:
+        """キャッシュしたIDがまだ有効か確認（判定できない場合はNone）"""
+        try:
+            response = self.http.get(
+                f"{self.base_url}/databases/{database_id}",
+                headers=self.headers
+            )
+            if response.status_code == 200:
+                return True
+            if response.status_code == 404:
+                return False
+            return None
+        except Exception as e:
+            print(f"Error validating database {database_id}: {e}")
+            return None
+    
+    def _on_database_not_found(self, database_id: str):
+        """使えなくなったIDをキャッシュから外し、次回は名前検索からやり直す"""
+        for name, cached_id in list(self._database_cache.items()):
+            if cached_id == database_id:
+                self._database_cache.pop(name, None)
+        self._database_id_cache.invalidate_id(self.api_key, database_id)
+    
     def _extract_database_title(self, database: Dict) -> str:
         """データベースからタイトルを抽出"""
         title_array = database.get("title", [])
@@ -81,10 +196,6 @@ class NotionUnifiedService(NotionService):
         if target_date is None:
             target_date = date.today()
         
-        db_id = self._get_db_id("Taiki Task", self.db_id_taiki_task)
-        if not db_id:
-            return []
-        
         filter_conditions = {
             "property": "Date",
             "date": {
@@ -92,8 +203,10 @@ class NotionUnifiedService(NotionService):
             }
         }
         
-        results = self.query_database(db_id, filter_conditions)
-        return [self._parse_task(result) for result in results]
+        return self._read_database(
+            ("taiki_task", target_date.isoformat()), "Taiki Task", self.db_id_taiki_task,
+            lambda db_id: [self._parse_task(result) for result in self.query_database(db_id, filter_conditions, raise_errors=True)]
+        )
     
     def create_taiki_task(self, name: str, completed: bool = False, target_date: date = None, category: str = None) -> Optional[str]:
         """Taiki Taskデータベースにタスクを作成"""
@@ -123,13 +236,38 @@ class NotionUnifiedService(NotionService):
         
         return self.create_page(db_id, properties)
     
+    def create_page(self, database_id: str, properties: Dict) -> Optional[str]:
+        """ページを作成し、ダッシュボードのスナップショットを無効化する"""
+        page_id = super().create_page(database_id, properties)
+        if page_id:
+            get_dashboard_snapshot().invalidate()
+        return page_id
+    
+    def update_page(self, page_id: str, properties: Dict) -> bool:
+        """ページを更新し、ダッシュボードのスナップショットを無効化する"""
+        success = super().update_page(page_id, properties)
+        if success:
+            get_dashboard_snapshot().invalidate()
+        return success
+    
+    def delete_page(self, page_id: str) -> bool:
+        """ページをアーカイブし、ダッシュボードのスナップショットを無効化する"""
+        success = super().delete_page(page_id)
+        if success:
+            get_dashboard_snapshot().invalidate()
+        return success
+    
     def update_taiki_task(self, task_id: str, properties: Dict) -> bool:
         """Taiki Taskを更新"""
         return self.update_page(task_id, properties)
     
     def delete_taiki_task(self, task_id: str) -> bool:
         """Taiki Taskを削除"""
-        return self.delete_page(task_id)
+        success = self.delete_page(task_id)
+        if success:
+            # アーカイブしたページは差分取り込みでは検出できないので、取り込み済みのページから外す
+            get_delta_sync().forget(task_id)
+        return success
     
     def sync_taiki_tasks(self, tasks: List[Dict]) -> Dict:
         """Taiki Taskを双方向同期"""
@@ -138,24 +276,39 @@ class NotionUnifiedService(NotionService):
             return {"success": False, "error": "Taiki Taskデータベースが見つかりません"}
         
         today = date.today()
-        result = {"created": 0, "updated": 0, "errors": []}
+        result = {"created": 0, "updated": 0, "skipped": 0, "errors": []}
         
-        # Notionから今日のタスクを取得
-        notion_tasks = self.get_taiki_tasks(today)
+        # Notionから今日のタスクを取得（差分同期が使えれば前回以降の変更分だけ取り込む）
+        loaded = self._load_synced_pages(db_id, "Date", today)
+        if loaded is not None:
+            notion_tasks = [self._parse_task(page) for page in loaded[0]]
+            result["pull"] = loaded[1]
+        else:
+            notion_tasks = self.get_taiki_tasks(today)
         notion_task_map = {task.get("notion_id"): task for task in notion_tasks}
+        # 取得に失敗して前回の結果を使っている場合は、差分を信用せずに全件更新する
+        compare = not getattr(notion_tasks, "stale", False)
         
         # ローカルタスクをNotionに同期
         for task in tasks:
             notion_id = task.get("notion_id")
             
             if notion_id and notion_id in notion_task_map:
+                name = task.get("text", task.get("name", ""))
+                completed = task.get("completed", False)
+                current = notion_task_map[notion_id]
+                if compare and current.get("name") == name and bool(current.get("completed")) == bool(completed):
+                    # Notion側と同じ内容なので更新しない
+                    result["skipped"] += 1
+                    continue
+                
                 # 既存タスクを更新
                 update_props = {
                     "Name": {
-                        "title": [{"text": {"content": task.get("text", task.get("name", ""))}}]
+                        "title": [{"text": {"content": name}}]
                     },
                     "Completed": {
-                        "checkbox": task.get("completed", False)
+                        "checkbox": completed
                     }
                 }
                 
@@ -180,6 +333,22 @@ class NotionUnifiedService(NotionService):
         
         return {"success": True, **result}
     
+    def _load_synced_pages(self, db_id: str, date_property: str, target: date) -> Optional[Tuple[List[Dict], Dict]]:
+        """差分同期で取り込んだページのうち、日付プロパティが target のものと取り込み結果を返す
+
+        差分同期が使えない場合はNone。
+        """
+        loaded = get_delta_sync().load_pages(self, db_id)
+        if loaded is None:
+            return None
+        pages, pull = loaded
+        target_iso = target.isoformat()
+        matched = [
+            page for page in pages
+            if (((page.get("properties", {}).get(date_property) or {}).get("date") or {}).get("start") or "")[:10] == target_iso
+        ]
+        return matched, pull
+    
     def _infer_category(self, task_text: str) -> str:
         """タスクテキストからカテゴリを推測"""
         text_lower = task_text.lower()
@@ -247,10 +416,6 @@ class NotionUnifiedService(NotionService):
             today = date.today()
             week_start = today - timedelta(days=today.weekday())
         
-        db_id = self._get_db_id("Weekly Goals", self.db_id_weekly_goals)
-        if not db_id:
-            return []
-        
         filter_conditions = {
             "property": "Week",
             "date": {
@@ -258,8 +423,10 @@ class NotionUnifiedService(NotionService):
             }
         }
         
-        results = self.query_database(db_id, filter_conditions)
-        return [self._parse_weekly_goal(result) for result in results]
+        return self._read_database(
+            ("weekly_goals", week_start.isoformat()), "Weekly Goals", self.db_id_weekly_goals,
+            lambda db_id: [self._parse_weekly_goal(result) for result in self.query_database(db_id, filter_conditions, raise_errors=True)]
+        )
     
     def sync_weekly_goals(self, goals: List[Dict]) -> Dict:
         """Weekly Goalsを双方向同期"""
@@ -269,27 +436,43 @@ class NotionUnifiedService(NotionService):
         
         today = date.today()
         week_start = today - timedelta(days=today.weekday())
-        result = {"created": 0, "updated": 0, "errors": []}
+        result = {"created": 0, "updated": 0, "skipped": 0, "errors": []}
         
-        # Notionから今週の目標を取得
-        notion_goals = self.get_weekly_goals(week_start)
+        # Notionから今週の目標を取得（差分同期が使えれば前回以降の変更分だけ取り込む）
+        loaded = self._load_synced_pages(db_id, "Week", week_start)
+        if loaded is not None:
+            notion_goals = [self._parse_weekly_goal(page) for page in loaded[0]]
+            result["pull"] = loaded[1]
+        else:
+            notion_goals = self.get_weekly_goals(week_start)
         notion_goal_map = {goal.get("notion_id"): goal for goal in notion_goals}
+        # 取得に失敗して前回の結果を使っている場合は、差分を信用せずに全件更新する
+        compare = not getattr(notion_goals, "stale", False)
         
         # ローカル目標をNotionに同期
         for goal in goals:
             notion_id = goal.get("notion_id")
             
             if notion_id and notion_id in notion_goal_map:
+                name = goal.get("text", goal.get("name", ""))
+                current_value = goal.get("current", 0)
+                target_value = goal.get("target", 0)
+                existing = notion_goal_map[notion_id]
+                if compare and (existing.get("name"), existing.get("current"), existing.get("target")) == (name, current_value, target_value):
+                    # Notion側と同じ内容なので更新しない
+                    result["skipped"] += 1
+                    continue
+                
                 # 既存目標を更新
                 update_props = {
                     "Name": {
-                        "title": [{"text": {"content": goal.get("text", goal.get("name", ""))}}]
+                        "title": [{"text": {"content": name}}]
                     },
                     "Current": {
-                        "number": goal.get("current", 0)
+                        "number": current_value
                     },
                     "Target": {
-                        "number": goal.get("target", 0)
+                        "number": target_value
                     }
                 }
                 
@@ -388,13 +571,14 @@ class NotionUnifiedService(NotionService):
             return None
         
         # 最新のエントリを取得（または特定のID）
-        results = self.query_database(db_id, sorts=[{
+        # 先頭の1件だけ必要なので1ページ目の1件で打ち切る
+        latest = next(self.iter_database_query(db_id, sorts=[{
             "property": "Created",
             "direction": "descending"
-        }])
+        }], page_size=1), None)
         
-        if results:
-            return self._parse_life_plan(results[0])
+        if latest:
+            return self._parse_life_plan(latest)
         return None
     
     def update_life_plan(self, life_plan_data: Dict) -> bool:
@@ -404,13 +588,13 @@ class NotionUnifiedService(NotionService):
             return False
         
         # 既存のエントリを取得
-        results = self.query_database(db_id)
-        if not results:
+        existing = next(self.iter_database_query(db_id, page_size=1), None)
+        if not existing:
             # 新規作成
             return self.create_life_plan_entry(life_plan_data) is not None
         else:
             # 既存を更新
-            page_id = results[0].get("id")
+            page_id = existing.get("id")
             properties = self._life_plan_to_notion_properties(life_plan_data)
             return self.update_page(page_id, properties)
     
@@ -456,12 +640,10 @@ class NotionUnifiedService(NotionService):
     
     def get_life_rules(self) -> List[Dict]:
         """LIFEルールデータベースからルールを取得"""
-        db_id = self._get_db_id("LIFEルール", self.db_id_life_rules)
-        if not db_id:
-            return []
-        
-        results = self.query_database(db_id)
-        return [self._parse_life_rule(result) for result in results]
+        return self._read_database(
+            ("life_rules",), "LIFEルール", self.db_id_life_rules,
+            lambda db_id: [self._parse_life_rule(result) for result in self.query_database(db_id, raise_errors=True)]
+        )
     
     def update_life_rule(self, rule_id: str, rule_data: Dict) -> bool:
         """LIFEルールを更新"""
@@ -504,7 +686,7 @@ class NotionUnifiedService(NotionService):
     def get_page(self, page_id: str) -> Optional[Dict]:
         """Notionページのプロパティ情報を取得"""
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/pages/{page_id}",
                 headers=self.headers
             )
@@ -523,42 +705,187 @@ class NotionUnifiedService(NotionService):
             recursive: Trueの場合、ネストされたブロックも再帰的に取得
         
         Returns:
-            ブロックのリスト
+            ブロックのリスト（文書順）
+        """
+        return self.fetch_block_tree(page_id, recursive=recursive)["blocks"]
+    
+    def fetch_block_tree(self, page_id: str, recursive: bool = True, max_concurrency: int = None) -> Dict:
+        """ブロックツリーを幅優先で取得
+        
+        同じ階層で子を持つブロックの子要素は、並行度の上限内で同時に取得する
+        （全体のレート制限は共有HTTPクライアントが適用する）。
+        結果は親→子→次の兄弟の文書順に並べ直して返す。
+        
+        Returns:
+            {
+                "blocks": [...],  # ブロックのリスト（文書順）
+                "api_calls": 5,   # Notion APIの呼び出し回数
+                "depth": 2,       # 取得した階層数
+                "complete": True  # 全ての子要素を取得できたか
+            }
         """
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("NOTION_BLOCK_FETCH_CONCURRENCY", "3"))
+        
+        top_blocks, api_calls, complete = self._get_block_children(page_id)
+        children_map = {}
+        depth = 1 if top_blocks else 0
+        level = [block for block in top_blocks if block.get("has_children")] if recursive else []
+        
+        async_service = AsyncNotionService(self, max_concurrency)
+        while level:
+            results = async_service.run(async_service.gather(*[
+                async_service.call(self._get_block_children, block["id"])
+                for block in level
+            ]))
+            next_level = []
+            for block, (children, calls, children_complete) in zip(level, results):
+                api_calls += calls
+                complete = complete and children_complete
+                children_map[block["id"]] = children
+                next_level.extend(child for child in children if child.get("has_children"))
+            level = next_level
+            depth += 1
+        
+        # 各ブロックの直後にその子孫が来るように並べる
+        ordered = []
+        stack = list(reversed(top_blocks))
+        while stack:
+            block = stack.pop()
+            ordered.append(block)
+            stack.extend(reversed(children_map.get(block.get("id"), [])))
+        
+        return {
+            "blocks": ordered,
+            "api_calls": api_calls,
+            "depth": depth,
+            "complete": complete
+        }
+    
+    def _get_block_children(self, block_id: str) -> Tuple[List[Dict], int, bool]:
+        """1ブロック直下の子要素をカーソルを辿って全件取得し、(ブロック, 呼び出し回数, 全件取得できたか)を返す"""
+        blocks = []
+        api_calls = 0
+        next_cursor = None
+        complete = False
+        
         try:
-            all_blocks = []
-            next_cursor = None
-            
             while True:
-                url = f"{self.base_url}/blocks/{page_id}/children"
                 params = {"page_size": 100}
                 if next_cursor:
                     params["start_cursor"] = next_cursor
                 
-                response = requests.get(url, headers=self.headers, params=params)
+                response = self.http.get(
+                    f"{self.base_url}/blocks/{block_id}/children",
+                    headers=self.headers,
+                    params=params
+                )
+                api_calls += 1
                 
                 if response.status_code != 200:
                     break
                 
                 data = response.json()
-                blocks = data.get("results", [])
-                all_blocks.extend(blocks)
-                
-                # 再帰的にネストされたブロックを取得
-                if recursive:
-                    for block in blocks:
-                        if block.get("has_children", False):
-                            child_blocks = self.get_page_blocks(block["id"], recursive=True)
-                            all_blocks.extend(child_blocks)
+                blocks.extend(data.get("results", []))
                 
                 next_cursor = data.get("next_cursor")
-                if not next_cursor:
+                if not data.get("has_more") or not next_cursor:
+                    complete = True
                     break
-            
-            return all_blocks
         except Exception as e:
             print(f"Error getting page blocks: {e}")
-            return []
+        
+        return blocks, api_calls, complete
+    
+    def iter_page_blocks(self, page_id: str, recursive: bool = True) -> Iterator[Dict]:
+        """ページのブロックを文書順に1件ずつ返す（ストリーミング用）
+        
+        子要素は1カーソルページ（最大100件）ずつ取得し、取得したそばから返す。
+        保持するのは辿っている途中の各階層の1カーソルページ分だけなので、
+        ページの大きさに関わらずメモリ使用量は一定に近い。
+        取得に失敗した場合は NotionApiError を送出する。
+        """
+        stack = [self._iter_block_children(page_id)]
+        while stack:
+            block = next(stack[-1], None)
+            if block is None:
+                stack.pop()
+                continue
+            yield block
+            if recursive and block.get("has_children"):
+                stack.append(self._iter_block_children(block["id"]))
+    
+    def _iter_block_children(self, block_id: str) -> Iterator[Dict]:
+        """1ブロック直下の子要素を、カーソルページを1つずつ取得しながら返す"""
+        next_cursor = None
+        while True:
+            params = {"page_size": 100}
+            if next_cursor:
+                params["start_cursor"] = next_cursor
+            
+            try:
+                response = self.http.get(
+                    f"{self.base_url}/blocks/{block_id}/children",
+                    headers=self.headers,
+                    params=params
+                )
+            except Exception as e:
+                raise NotionApiError(f"ブロック取得エラー: {e}") from e
+            if response.status_code != 200:
+                raise NotionApiError(f"ブロック取得エラー: {response.status_code}", response.status_code)
+            
+            data = response.json()
+            yield from data.get("results", [])
+            
+            next_cursor = data.get("next_cursor")
+            if not data.get("has_more") or not next_cursor:
+                return
+    
+    def iter_page_blocks_cached(self, page_id: str, page: Dict) -> Iterator[Dict]:
+        """ページが前回から変わっていなければキャッシュから、変わっていればNotionから順に返す
+        
+        Notionから取得した場合はツリー全体を保持しないため、キャッシュには保存しない。
+        """
+        blocks = get_block_tree_cache().get(page_id, page.get("last_edited_time"))
+        if blocks is not None:
+            return iter(blocks)
+        return self.iter_page_blocks(page_id)
+    
+    def get_page_blocks_cached(self, page_id: str, page: Dict = None, fetched_at: datetime = None) -> List[Dict]:
+        """ページのブロックを、ページが前回から変わっていなければディスクのキャッシュから返す
+        
+        変更の確認は GET /pages/{id} の last_edited_time で行う（page を渡せばそれを使う）。
+        fetched_at は page を取得する前の時刻。
+        """
+        return self.get_page_block_tree_cached(page_id, page, fetched_at)["blocks"]
+    
+    def get_page_block_tree_cached(self, page_id: str, page: Dict = None, fetched_at: datetime = None) -> Dict:
+        """get_page_blocks_cached と同じだが、全ての子要素を取得できたかも返す
+        
+        Returns:
+            {
+                "blocks": [...],  # ブロックのリスト（文書順）
+                "complete": True  # キャッシュから返した場合、または全ての子要素を取得できた場合にTrue
+            }
+        """
+        if page is None:
+            fetched_at = datetime.now(timezone.utc)
+            page = self.get_page(page_id)
+        if not page:
+            tree = self.fetch_block_tree(page_id, recursive=True)
+            return {"blocks": tree["blocks"], "complete": tree["complete"]}
+        
+        cache = get_block_tree_cache()
+        last_edited_time = page.get("last_edited_time")
+        blocks = cache.get(page_id, last_edited_time)
+        if blocks is not None:
+            return {"blocks": blocks, "complete": True}
+        
+        tree = self.fetch_block_tree(page_id, recursive=True)
+        if tree["complete"]:
+            # 取得に失敗した子要素があるツリーは保存しない
+            cache.put(page_id, last_edited_time, tree["blocks"], fetched_at)
+        return {"blocks": tree["blocks"], "complete": tree["complete"]}
     
     def get_page_full_content(self, page_id: str) -> Optional[Dict]:
         """ページのプロパティとブロックを含む完全なコンテンツを取得
@@ -569,11 +896,12 @@ class NotionUnifiedService(NotionService):
                 "blocks": [...]  # ブロックのリスト
             }
         """
+        fetched_at = datetime.now(timezone.utc)
         page = self.get_page(page_id)
         if not page:
             return None
         
-        blocks = self.get_page_blocks(page_id, recursive=True)
+        blocks = self.get_page_blocks_cached(page_id, page, fetched_at)
         
         return {
             "page": page,
@@ -612,7 +940,10 @@ class NotionUnifiedService(NotionService):
     
     def extract_page_text(self, page_id: str) -> str:
         """ページの全テキストコンテンツを抽出して結合"""
-        blocks = self.get_page_blocks(page_id, recursive=True)
+        return self.blocks_to_text(self.get_page_blocks_cached(page_id))
+    
+    def blocks_to_text(self, blocks: List[Dict]) -> str:
+        """ブロックのテキストを改行で結合"""
         texts = []
         
         for block in blocks:
@@ -622,36 +953,14 @@ class NotionUnifiedService(NotionService):
         
         return "\n".join(texts)
     
-    def search_pages(self, query: str = "") -> List[Dict]:
+    def search_pages(self, query: str = "", limit: int = None) -> List[Dict]:
         """Notionワークスペース内でページを検索
         
         Args:
             query: 検索キーワード（空の場合は全ページ）
+            limit: 最大件数（Noneの場合は全件）
         
         Returns:
             ページのリスト
         """
-        try:
-            payload = {
-                "filter": {
-                    "value": "page",
-                    "property": "object"
-                }
-            }
-            
-            if query:
-                payload["query"] = query
-            
-            response = requests.post(
-                f"{self.base_url}/search",
-                headers=self.headers,
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                return response.json().get("results", [])
-            return []
-        except Exception as e:
-            print(f"Error searching pages: {e}")
-            return []
-
+        return self.search(query, "page", limit)
@@ -0,0 +1,535 @@
+"""
+アウトボックス - タスク・目標の書き込みをローカルで即座に受け付け、バックグラウンドでNotionに反映する
+
+書き込みはローカルのテーブル（DailyTask / WeeklyGoal）を先に更新し、SyncLog にNotionへの
+反映内容を積む。OutboxWorker がそれを古い順に取り出してNotionに送る。
+
+短時間に同じページへ積まれた書き込みは送る前にまとめる（更新は1回のPATCHに、
+Notionに未作成のページの作成と削除は打ち消し合う）。
+
+複数のプロセスが同じ SyncLog を処理しても二重に送らないよう、送る前に1件ずつ
+IN_FLIGHT へ条件付きで更新して取得する。
+"""
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.services.dashboard_snapshot import get_dashboard_snapshot
+from src.services.local_read_cache import TAIKI_TASK, WEEKLY_GOALS, get_local_read_cache
+
+PENDING = "PENDING"
+SUCCESS = "SUCCESS"
+FAILED = "FAILED"
+DEAD = "DEAD"
+COALESCED = "COALESCED"  # 後続の書き込みにまとめられた・打ち消された
+IN_FLIGHT = "IN_FLIGHT"  # いずれかのワーカーが取得してNotionに送っている
+
+CREATE = "CREATE"
+UPDATE = "UPDATE"
+DELETE = "DELETE"
+
+# SyncLog.table_name に入れる値（ローカルのテーブル名）
+DAILY_TASKS_TABLE = "daily_tasks"
+WEEKLY_GOALS_TABLE = "weekly_goals"
+
+# 反映に成功したときに無効化するローカル読み取りキャッシュの種類
+_CACHE_KINDS = {DAILY_TASKS_TABLE: TAIKI_TASK, WEEKLY_GOALS_TABLE: WEEKLY_GOALS}
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() not in ("0", "false", "no")
+
+
+class OutboxWorker:
+    """SyncLog を使ったライトビハインドのワーカー
+
+    - 同じ対象（ローカルのレコード）への書き込みは積まれた順に反映する。
+      途中の書き込みが失敗したら、その対象の後続は再試行まで待たせる
+    - 失敗した書き込みは指数バックオフで再試行し、max_attempts 回失敗したら DEAD にする
+    - Notionへの流量は共有HTTPクライアントのレート制限に従う
+    - 同じ対象への最後の書き込みから coalesce_window 秒は送らずに待ち、その間の書き込みをまとめる。
+      書き込みが続いても、最初の書き込みから coalesce_window の5倍を過ぎたら送る
+    - 送る前に IN_FLIGHT として取得し、他のプロセスのワーカーが取得した書き込みは送らない。
+      claim_timeout 秒を過ぎても IN_FLIGHT のままの書き込み（送信中にプロセスが終了した）は取得し直す
+    """
+
+    def __init__(self, batch_size: int = None, interval: float = None, max_attempts: int = None,
+                 retry_base_delay: float = None, coalesce_window: float = None, claim_timeout: float = None):
+        self.batch_size = batch_size or int(os.getenv("NOTION_OUTBOX_BATCH_SIZE", "10"))
+        self.interval = interval if interval is not None else float(os.getenv("NOTION_OUTBOX_INTERVAL", "1.0"))
+        self.max_attempts = max_attempts or int(os.getenv("NOTION_OUTBOX_MAX_ATTEMPTS", "5"))
+        self.retry_base_delay = (
+            retry_base_delay if retry_base_delay is not None else float(os.getenv("NOTION_OUTBOX_RETRY_DELAY", "2.0"))
+        )
+        self.coalesce_window = (
+            coalesce_window if coalesce_window is not None else float(os.getenv("NOTION_OUTBOX_COALESCE_WINDOW", "2.0"))
+        )
+        self.claim_timeout = (
+            claim_timeout if claim_timeout is not None else float(os.getenv("NOTION_OUTBOX_CLAIM_TIMEOUT", "300"))
+        )
+        self.app = None
+        self._service_factory = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._thread is not None
+
+    def start(self, app, service_factory) -> bool:
+        """ワーカーを起動する。ローカルのDBが使えない場合は起動せず、書き込みは従来通り同期的に行う
+
+        service_factory はNotionUnifiedServiceを返す関数（バックグラウンドスレッドから呼ぶ）。
+        """
+        if self._thread is not None:
+            return True
+        if not _env_flag("NOTION_WRITE_BEHIND", "true") or not get_local_read_cache().enabled:
+            return False
+        self.app = app
+        self._service_factory = service_factory
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notion-outbox", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                while self.flush() >= self.batch_size:
+                    # 溜まっている間は待たずに次のバッチを処理する
+                    pass
+            except Exception as e:
+                print(f"アウトボックスの処理エラー: {e}")
+
+    # ===== 書き込みの受け付け =====
+
+    def queue_task_create(self, name: str, completed: bool, target_date: date, category: Optional[str]) -> Tuple[int, int]:
+        """タスク作成を受け付け、(SyncLog ID, ローカルのレコードID) を返す"""
+        from src.models.notion_models import DailyTask
+
+        db = get_local_read_cache().db
+        with self.app.app_context():
+            row = DailyTask(name=name, completed=completed, date=target_date, category=category)
+            db.session.add(row)
+            db.session.flush()
+            log_id = self._add(DAILY_TASKS_TABLE, CREATE, record_id=row.id, payload={
+                "name": name,
+                "completed": completed,
+                "date": target_date.isoformat(),
+                "category": category
+            })
+            db.session.commit()
+            record_id = row.id
+        get_dashboard_snapshot().invalidate()
+        self._wake.set()
+        return log_id, record_id
+
+    def queue_task_update(self, notion_id: str, fields: Dict, properties: Dict) -> int:
+        """タスク更新を受け付ける。fields はローカルのレコードに反映する値"""
+        from src.models.notion_models import DailyTask
+        return self._queue_change(DailyTask, DAILY_TASKS_TABLE, UPDATE, notion_id, fields, properties)
+
+    def queue_task_delete(self, notion_id: str) -> int:
+        from src.models.notion_models import DailyTask
+        return self._queue_change(DailyTask, DAILY_TASKS_TABLE, DELETE, notion_id)
+
+    def queue_goal_create(self, name: str, current: int, target: int, unit: str, week_start: date) -> Tuple[int, int]:
+        """週間目標の作成を受け付け、(SyncLog ID, ローカルのレコードID) を返す"""
+        from src.models.notion_models import WeeklyGoal
+
+        db = get_local_read_cache().db
+        with self.app.app_context():
+            row = WeeklyGoal(name=name, current=current, target=target, unit=unit, week_start=week_start)
+            db.session.add(row)
+            db.session.flush()
+            log_id = self._add(WEEKLY_GOALS_TABLE, CREATE, record_id=row.id, payload={
+                "name": name,
+                "current": current,
+                "target": target,
+                "unit": unit,
+                "week_start": week_start.isoformat()
+            })
+            db.session.commit()
+            record_id = row.id
+        get_dashboard_snapshot().invalidate()
+        self._wake.set()
+        return log_id, record_id
+
+    def queue_goal_update(self, notion_id: str, fields: Dict, properties: Dict) -> int:
+        from src.models.notion_models import WeeklyGoal
+        return self._queue_change(WeeklyGoal, WEEKLY_GOALS_TABLE, UPDATE, notion_id, fields, properties)
+
+    def queue_goal_delete(self, notion_id: str) -> int:
+        from src.models.notion_models import WeeklyGoal
+        return self._queue_change(WeeklyGoal, WEEKLY_GOALS_TABLE, DELETE, notion_id)
+
+    def _queue_change(self, model, table_name: str, operation: str, notion_id: str,
+                      fields: Dict = None, properties: Dict = None) -> int:
+        db = get_local_read_cache().db
+        with self.app.app_context():
+            row = model.query.filter_by(notion_id=notion_id).first()
+            if row is None and str(notion_id).isdigit():
+                # 作成を受け付けたばかりのレコードは、作成時に返したローカルのIDで指定される
+                row = db.session.get(model, int(notion_id))
+                if row is not None:
+                    notion_id = row.notion_id
+            record_id = row.id if row else None
+            if row is not None:
+                if operation == DELETE:
+                    db.session.delete(row)
+                else:
+                    for key, value in (fields or {}).items():
+                        setattr(row, key, value)
+            log_id = self._add(table_name, operation, notion_id=notion_id, record_id=record_id, payload=properties)
+            db.session.commit()
+        get_dashboard_snapshot().invalidate()
+        self._wake.set()
+        return log_id
+
+    def _add(self, table_name: str, operation: str, notion_id: str = None, record_id: int = None,
+             payload: Dict = None) -> int:
+        from src.models.notion_models import SyncLog
+
+        entry = SyncLog(
+            table_name=table_name,
+            operation=operation,
+            notion_id=notion_id,
+            record_id=record_id,
+            status=PENDING,
+            payload=json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+            attempts=0
+        )
+        get_local_read_cache().db.session.add(entry)
+        get_local_read_cache().db.session.flush()
+        return entry.id
+
+    # ===== Notionへの反映 =====
+
+    def flush(self) -> int:
+        """期限の来た書き込みを最大 batch_size 件反映し、処理した件数を返す"""
+        from src.models.notion_models import SyncLog
+
+        if self.app is None:
+            return 0
+        with self._flush_lock, self.app.app_context():
+            db = get_local_read_cache().db
+            now = datetime.utcnow()
+            claim_expired_at = now - timedelta(seconds=self.claim_timeout)
+            queued = SyncLog.query.filter(SyncLog.status.in_((PENDING, FAILED, IN_FLIGHT))).order_by(SyncLog.id).all()
+            # 他のワーカーが送っている書き込みは待ち、同じ対象の後続もそれを追い越さない
+            in_flight = [
+                entry for entry in queued
+                if entry.status == IN_FLIGHT and entry.processed_at and entry.processed_at > claim_expired_at
+            ]
+            in_flight_ids = {entry.id for entry in in_flight}
+            waiting = [entry for entry in queued if entry.id not in in_flight_ids]
+
+            # notion_id だけで積まれた書き込みも、同じページのレコードIDが分かれば同じ対象にまとめる
+            record_ids = {
+                (entry.table_name, entry.notion_id): entry.record_id
+                for entry in waiting if entry.notion_id and entry.record_id is not None
+            }
+            groups: Dict[Tuple[str, object], List] = {}
+            for entry in waiting:
+                groups.setdefault(self._target_key(entry, record_ids), []).append(entry)
+            blocked: Set[Tuple[str, object]] = {self._target_key(entry, record_ids) for entry in in_flight}
+            for key, entries in groups.items():
+                if key in blocked:
+                    continue
+                for segment in self._segments(entries):
+                    self._coalesce(segment)
+                if self._debouncing(entries, now):
+                    blocked.add(key)
+            db.session.commit()
+
+            service = None
+            touched = set()
+            processed = 0
+            for entry in waiting:
+                key = self._target_key(entry, record_ids)
+                if key in blocked or entry.status == COALESCED:
+                    continue
+                if entry.status == FAILED and entry.next_attempt_at and entry.next_attempt_at > now:
+                    # 再試行待ちの書き込みより後の同じ対象への書き込みは追い越さない
+                    blocked.add(key)
+                    continue
+                if processed >= self.batch_size:
+                    break
+                if not self._claim(entry, claim_expired_at):
+                    # 読み込んだ後に他のワーカーが取得した（またはまとめた）
+                    blocked.add(key)
+                    continue
+                if service is None:
+                    service = self._service_factory()
+
+                error = self._apply(service, entry)
+                entry.attempts = (entry.attempts or 0) + 1
+                entry.processed_at = datetime.utcnow()
+                if error is None:
+                    entry.status = SUCCESS
+                    entry.error_message = None
+                    entry.next_attempt_at = None
+                    touched.add(entry.table_name)
+                else:
+                    blocked.add(key)
+                    entry.error_message = error
+                    if entry.attempts >= self.max_attempts:
+                        entry.status = DEAD
+                    else:
+                        entry.status = FAILED
+                        delay = self.retry_base_delay * (2 ** (entry.attempts - 1))
+                        entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                db.session.commit()
+                processed += 1
+
+        for table_name in touched:
+            get_local_read_cache().invalidate(_CACHE_KINDS[table_name])
+        return processed
+
+    def _claim(self, entry, claim_expired_at: datetime) -> bool:
+        """書き込みを IN_FLIGHT に条件付きで更新して取得する。他のワーカーが先に取得していたら False
+
+        取得できたら、他のワーカーがまとめた内容を反映するためDBから読み直す。
+        """
+        from src.models.notion_models import SyncLog
+
+        db = get_local_read_cache().db
+        claimed = SyncLog.query.filter(
+            SyncLog.id == entry.id,
+            db.or_(
+                SyncLog.status.in_((PENDING, FAILED)),
+                db.and_(SyncLog.status == IN_FLIGHT, SyncLog.processed_at <= claim_expired_at)
+            )
+        ).update({"status": IN_FLIGHT, "processed_at": datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        db.session.refresh(entry)
+        return claimed == 1
+
+    def _segments(self, entries: List) -> List[List]:
+        """作成ごとに区切る（作成より前の書き込みは別のページに対するもの）"""
+        segments: List[List] = []
+        for entry in entries:
+            if entry.operation == CREATE or not segments:
+                segments.append([])
+            segments[-1].append(entry)
+        return segments
+
+    def _coalesce(self, entries: List):
+        """同じ対象への未送信の書き込みをまとめる（entries は積まれた順）
+
+        - 未作成のページの作成と削除: どちらも送らない
+        - 未作成のページの作成とその後の更新: ローカルのレコードの最新の値で作成する
+        - 既存のページへの連続した更新: 先頭の更新に後続のプロパティを上書きでまとめる
+        - 削除の前の更新: 送らない
+        """
+        from src.models.notion_models import DailyTask, WeeklyGoal
+
+        head = entries[0]
+        if head.operation == CREATE:
+            if any(entry.operation == DELETE for entry in entries[1:]):
+                for entry in entries:
+                    self._mark_coalesced(entry, "作成前に削除されたため取り消しました")
+                return
+            model = DailyTask if head.table_name == DAILY_TASKS_TABLE else WeeklyGoal
+            row = get_local_read_cache().db.session.get(model, head.record_id) if head.record_id is not None else None
+            followers = [entry for entry in entries[1:] if entry.operation == UPDATE and entry.status == PENDING]
+            if row is not None and followers:
+                head.payload = json.dumps(self._create_payload(head.table_name, row), ensure_ascii=False)
+                for entry in followers:
+                    self._mark_coalesced(entry, f"作成（#{head.id}）にまとめました")
+            return
+
+        merged = None
+        for entry in entries:
+            if entry.operation == UPDATE:
+                if merged is None:
+                    merged = entry
+                    properties = json.loads(entry.payload) if entry.payload else {}
+                elif entry.status == PENDING:
+                    properties.update(json.loads(entry.payload) if entry.payload else {})
+                    merged.payload = json.dumps(properties, ensure_ascii=False)
+                    self._mark_coalesced(entry, f"更新（#{merged.id}）にまとめました")
+            elif entry.operation == DELETE:
+                for earlier in entries[:entries.index(entry)]:
+                    if earlier.operation == UPDATE and earlier.status != COALESCED:
+                        self._mark_coalesced(earlier, f"削除（#{entry.id}）されるため送りません")
+                return
+
+    def _debouncing(self, entries: List, now: datetime) -> bool:
+        """最後の書き込みから coalesce_window 秒経つまで送らない（最初の書き込みから長く待たせすぎない）"""
+        if self.coalesce_window <= 0:
+            return False
+        active = [entry for entry in entries if entry.status != COALESCED and entry.created_at]
+        if not active:
+            return False
+        newest = max(entry.created_at for entry in active)
+        oldest = min(entry.created_at for entry in active)
+        window = timedelta(seconds=self.coalesce_window)
+        return now - newest < window and now - oldest < window * 5
+
+    def _mark_coalesced(self, entry, message: str):
+        entry.status = COALESCED
+        entry.error_message = message
+        entry.next_attempt_at = None
+        entry.processed_at = datetime.utcnow()
+
+    def _create_payload(self, table_name: str, row) -> Dict:
+        """ローカルのレコードから作成時の内容を作る"""
+        if table_name == DAILY_TASKS_TABLE:
+            return {
+                "name": row.name,
+                "completed": bool(row.completed),
+                "date": row.date.isoformat(),
+                "category": row.category
+            }
+        return {
+            "name": row.name,
+            "current": row.current,
+            "target": row.target,
+            "unit": row.unit,
+            "week_start": row.week_start.isoformat()
+        }
+
+    def _target_key(self, entry, record_ids: Dict[Tuple[str, str], int]) -> Tuple[str, object]:
+        """同じページへの書き込みをまとめるキー
+
+        作成前にローカルのIDで積まれた書き込みと、作成後にnotion_idで積まれた書き込みが
+        同じ対象になるよう、ローカルのレコードIDが分かればそれで識別する。
+        record_ids は (テーブル名, notion_id) からレコードIDへの対応。
+        """
+        record_id = entry.record_id
+        if record_id is None and entry.notion_id:
+            record_id = record_ids.get((entry.table_name, entry.notion_id))
+        if record_id is not None:
+            return entry.table_name, record_id
+        return entry.table_name, entry.notion_id
+
+    def _resolve_notion_id(self, entry) -> Optional[str]:
+        """作成を待っていた書き込みのために、作成済みページのIDを探す"""
+        from src.models.notion_models import SyncLog
+
+        if entry.notion_id or entry.record_id is None:
+            return entry.notion_id
+        created = SyncLog.query.filter(
+            SyncLog.table_name == entry.table_name,
+            SyncLog.record_id == entry.record_id,
+            SyncLog.operation == CREATE,
+            SyncLog.status == SUCCESS,
+            SyncLog.id < entry.id
+        ).order_by(SyncLog.id.desc()).first()
+        return created.notion_id if created else None
+
+    def _apply(self, service, entry) -> Optional[str]:
+        """1件をNotionに反映する。失敗時はエラーメッセージを返す"""
+        from src.models.notion_models import DailyTask, WeeklyGoal
+
+        payload = json.loads(entry.payload) if entry.payload else {}
+        model = DailyTask if entry.table_name == DAILY_TASKS_TABLE else WeeklyGoal
+        try:
+            if entry.operation == CREATE:
+                if entry.table_name == DAILY_TASKS_TABLE:
+                    page_id = service.create_taiki_task(
+                        name=payload.get("name", ""),
+                        completed=payload.get("completed", False),
+                        target_date=datetime.fromisoformat(payload["date"]).date(),
+                        category=payload.get("category")
+                    )
+                else:
+                    page_id = service.create_weekly_goal(
+                        name=payload.get("name", ""),
+                        current=payload.get("current", 0),
+                        target=payload.get("target", 0),
+                        unit=payload.get("unit", "回"),
+                        week_start=datetime.fromisoformat(payload["week_start"]).date()
+                    )
+                if not page_id:
+                    return "Notionでの作成に失敗しました"
+                entry.notion_id = page_id
+                row = get_local_read_cache().db.session.get(model, entry.record_id) if entry.record_id is not None else None
+                if row is not None:
+                    row.notion_id = page_id
+                    row.synced_at = datetime.utcnow()
+                return None
+
+            notion_id = self._resolve_notion_id(entry)
+            if not notion_id:
+                return "対象ページが作成されていません"
+            entry.notion_id = notion_id
+
+            if entry.operation == UPDATE:
+                if entry.table_name == DAILY_TASKS_TABLE:
+                    success = service.update_taiki_task(notion_id, payload)
+                else:
+                    success = service.update_page(notion_id, payload)
+            elif entry.operation == DELETE:
+                if entry.table_name == DAILY_TASKS_TABLE:
+                    success = service.delete_taiki_task(notion_id)
+                else:
+                    success = service.delete_page(notion_id)
+            else:
+                return f"不明な操作です: {entry.operation}"
+            return None if success else "Notionへの反映に失敗しました"
+        except Exception as e:
+            return str(e)
+
+    def get_stats(self) -> Dict:
+        """状態ごとの件数"""
+        from src.models.notion_models import SyncLog
+
+        if self.app is None:
+            return {"enabled": False}
+        with self.app.app_context():
+            db = get_local_read_cache().db
+            counts = dict(db.session.query(SyncLog.status, db.func.count(SyncLog.id)).group_by(SyncLog.status).all())
+        return {
+            "enabled": self.enabled,
+            **{status: counts.get(status, 0) for status in (PENDING, IN_FLIGHT, FAILED, DEAD, SUCCESS, COALESCED)}
+        }
+
+
+def pending_targets(table_name: str) -> Tuple[Set[str], Set[int]]:
+    """Notionへの反映待ちの書き込みがある (notion_id, ローカルのレコードID) の集合
+
+    アプリのコンテキスト内で呼ぶこと。
+    """
+    from src.models.notion_models import SyncLog
+
+    notion_ids: Set[str] = set()
+    record_ids: Set[int] = set()
+    for notion_id, record_id in SyncLog.query.with_entities(SyncLog.notion_id, SyncLog.record_id).filter(
+        SyncLog.table_name == table_name, SyncLog.status.in_((PENDING, IN_FLIGHT, FAILED))
+    ):
+        if notion_id:
+            notion_ids.add(notion_id)
+        if record_id is not None:
+            record_ids.add(record_id)
+    return notion_ids, record_ids
+
+
+_worker: Optional[OutboxWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_outbox_worker() -> OutboxWorker:
+    """プロセス共有のアウトボックスワーカーを取得"""
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = OutboxWorker()
+    return _worker
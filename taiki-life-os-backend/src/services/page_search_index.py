@@ -0,0 +1,229 @@
+"""
+ページ全文検索インデックス - Notionページの本文をローカルのSQLite FTS5に保持し、Notionに問い合わせずに検索する
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from src.services.local_storage import get_cache_dir
+
+SNIPPET_LENGTH = 64
+
+
+def _page_title(page: Dict) -> str:
+    """ページのタイトルプロパティの文字列"""
+    for prop in (page.get("properties") or {}).values():
+        if prop.get("type") == "title" or "title" in prop:
+            return "".join(
+                part.get("plain_text") or part.get("text", {}).get("content", "")
+                for part in prop.get("title") or []
+            )
+    return ""
+
+
+class PageSearchIndex:
+    """ページのタイトルと本文（ブロックのテキスト）の全文検索インデックス
+
+    日本語を部分一致で検索できるよう trigram トークナイザを使う（使えないSQLiteでは unicode61）。
+    trigram では3文字未満の語を MATCH で検索できないため、その場合は LIKE で探す。
+    再インデックスはページの last_edited_time が変わったページだけ本文を取り直す。
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(get_cache_dir(), "page_search.db")
+        self._lock = threading.Lock()
+        self._tokenizer: Optional[str] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    self._tokenizer = self._create_tables(conn)
+        return conn
+
+    def _create_tables(self, conn: sqlite3.Connection) -> str:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS indexed_pages (
+                page_id TEXT PRIMARY KEY,
+                title TEXT,
+                url TEXT,
+                last_edited_time TEXT,
+                indexed_at TEXT
+            )
+        """)
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'page_text'").fetchone()
+        if row is not None:
+            return "trigram" if "trigram" in row["sql"] else "unicode61"
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE page_text USING fts5(page_id UNINDEXED, title, body, tokenize='{tokenizer}')"
+                )
+                conn.commit()
+                return tokenizer
+            except sqlite3.OperationalError:
+                continue
+        raise RuntimeError("SQLiteでFTS5が使えません")
+
+    # ===== インデックスの更新 =====
+
+    def reindex(self, service, pages: Iterable[Dict], full: bool = False) -> Dict:
+        """pages（/search の結果など）のうち、前回から更新されたページの本文を取り込む
+
+        full=True の場合は更新の有無に関わらず全ページを取り込み直し、pages に含まれない
+        ページ（削除・共有解除されたページ）をインデックスから外す。
+        """
+        started = time.perf_counter()
+        result = {"indexed": 0, "skipped": 0, "removed": 0, "errors": []}
+        seen = set()
+        conn = self._connect()
+        try:
+            indexed = {
+                row["page_id"]: row["last_edited_time"]
+                for row in conn.execute("SELECT page_id, last_edited_time FROM indexed_pages")
+            }
+            for page in pages:
+                page_id = page.get("id")
+                if not page_id or page.get("archived") or page.get("in_trash"):
+                    continue
+                seen.add(page_id)
+                last_edited_time = page.get("last_edited_time")
+                if not full and last_edited_time and indexed.get(page_id) == last_edited_time:
+                    result["skipped"] += 1
+                    continue
+                try:
+                    # page は /search の結果なので、last_edited_time の確認に GET /pages/{id} は要らない
+                    tree = service.get_page_block_tree_cached(page_id, page)
+                except Exception as e:
+                    result["errors"].append(f"{page_id}: {e}")
+                    continue
+                if not tree["complete"]:
+                    # 途中までの本文を取り込むと、ページが次に編集されるまで取り直されなくなる
+                    result["errors"].append(f"{page_id}: ブロックを全て取得できませんでした")
+                    continue
+                body = service.blocks_to_text(tree["blocks"])
+                self._upsert(conn, page_id, _page_title(page), page.get("url"), last_edited_time, body)
+                result["indexed"] += 1
+
+            if full:
+                for page_id in set(indexed) - seen:
+                    self._remove(conn, page_id)
+                    result["removed"] += 1
+        finally:
+            conn.close()
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def _upsert(self, conn: sqlite3.Connection, page_id: str, title: str, url: Optional[str],
+                last_edited_time: Optional[str], body: str):
+        with self._lock:
+            conn.execute("DELETE FROM page_text WHERE page_id = ?", (page_id,))
+            conn.execute("INSERT INTO page_text (page_id, title, body) VALUES (?, ?, ?)", (page_id, title, body))
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_pages (page_id, title, url, last_edited_time, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (page_id, title, url, last_edited_time, datetime.utcnow().isoformat())
+            )
+            conn.commit()
+
+    def _remove(self, conn: sqlite3.Connection, page_id: str):
+        with self._lock:
+            conn.execute("DELETE FROM page_text WHERE page_id = ?", (page_id,))
+            conn.execute("DELETE FROM indexed_pages WHERE page_id = ?", (page_id,))
+            conn.commit()
+
+    # ===== 検索 =====
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """タイトル・本文に query の語を全て含むページを関連度順に返す（スニペット付き）"""
+        terms = query.split()
+        if not terms:
+            return []
+        conn = self._connect()
+        try:
+            if self._tokenizer == "trigram" and any(len(term) < 3 for term in terms):
+                return self._search_like(conn, terms, limit)
+            match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            rows = conn.execute("""
+                SELECT t.page_id, p.title, p.url, p.last_edited_time,
+                       snippet(page_text, 2, '<mark>', '</mark>', '…', 32) AS snippet,
+                       bm25(page_text, 0.0, 5.0, 1.0) AS rank
+                FROM page_text t JOIN indexed_pages p ON p.page_id = t.page_id
+                WHERE page_text MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            """, (match, limit)).fetchall()
+            return [self._to_result(row, row["snippet"], -row["rank"]) for row in rows]
+        finally:
+            conn.close()
+
+    def _search_like(self, conn: sqlite3.Connection, terms: List[str], limit: int) -> List[Dict]:
+        """MATCHで扱えない短い語の検索（タイトルに含むページを優先する）"""
+        conditions = " AND ".join("(t.title LIKE ? ESCAPE '\\' OR t.body LIKE ? ESCAPE '\\')" for _ in terms)
+        params = []
+        for term in terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params.extend([pattern, pattern])
+        rows = conn.execute(
+            f"""
+            SELECT t.page_id, p.title, p.url, p.last_edited_time, t.body
+            FROM page_text t JOIN indexed_pages p ON p.page_id = t.page_id
+            WHERE {conditions}
+            """,
+            params
+        ).fetchall()
+        results = []
+        for row in rows:
+            score = sum((row["title"] or "").count(term) * 5 + (row["body"] or "").count(term) for term in terms)
+            results.append(self._to_result(row, self._make_snippet(row["body"] or "", terms[0]), score))
+        results.sort(key=lambda result: result["score"], reverse=True)
+        return results[:limit]
+
+    def _make_snippet(self, body: str, term: str) -> str:
+        position = body.find(term)
+        if position < 0:
+            return body[:SNIPPET_LENGTH]
+        start = max(0, position - SNIPPET_LENGTH // 2)
+        end = position + len(term) + SNIPPET_LENGTH // 2
+        return (
+            ("…" if start > 0 else "")
+            + body[start:position] + "<mark>" + term + "</mark>" + body[position + len(term):end]
+            + ("…" if end < len(body) else "")
+        )
+
+    def _to_result(self, row: sqlite3.Row, snippet: str, score: float) -> Dict:
+        return {
+            "page_id": row["page_id"],
+            "title": row["title"],
+            "url": row["url"],
+            "last_edited_time": row["last_edited_time"],
+            "snippet": snippet,
+            "score": round(score, 4)
+        }
+
+    def get_stats(self) -> Dict:
+        conn = self._connect()
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM indexed_pages").fetchone()[0]
+            last = conn.execute("SELECT MAX(indexed_at) FROM indexed_pages").fetchone()[0]
+        finally:
+            conn.close()
+        return {"pages": count, "tokenizer": self._tokenizer, "last_indexed_at": last}
+
+
+_index: Optional[PageSearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_page_search_index() -> PageSearchIndex:
+    """プロセス共有のページ全文検索インデックスを取得"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PageSearchIndex()
+    return _index
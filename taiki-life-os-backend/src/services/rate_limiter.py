@@ -0,0 +1,95 @@
+"""
+Notion APIのレート制限（平均3リクエスト/秒）に合わせたトークンバケット
+"""
+import threading
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """スレッドセーフなトークンバケット
+
+    rate: 1秒あたりに補充されるトークン数（0以下なら制限なし）
+    capacity: バースト時に連続で使えるトークンの上限
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        # 待機時間のメトリクス
+        self._acquired = 0
+        self._waited = 0
+        self._wait_seconds_total = 0.0
+        self._max_wait_seconds = 0.0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def acquire(self, tokens: float = 1) -> float:
+        """トークンを取得できるまでブロックし、待機した秒数を返す"""
+        if self.rate <= 0:
+            return 0.0
+
+        started_at = time.monotonic()
+        slept = False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                paused = self._paused_until - now
+                if paused <= 0 and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    waited = now - started_at if slept else 0.0
+                    self._record(waited)
+                    return waited
+                delay = paused if paused > 0 else (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            slept = True
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """待たずにトークンの取得を試み、取得できたかを返す"""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._paused_until <= now and self._tokens >= tokens:
+                self._tokens -= tokens
+                self._record(0.0)
+                return True
+            return False
+
+    def pause(self, seconds: float):
+        """429を受けた時など、全スレッドの送信を指定秒数止める"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0
+            self._updated_at = now
+
+    def _record(self, waited: float):
+        self._acquired += 1
+        if waited > 0:
+            self._waited += 1
+            self._wait_seconds_total += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+    def get_stats(self) -> Dict:
+        """待機時間の統計を取得"""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "acquired": self._acquired,
+                "waited": self._waited,
+                "wait_seconds_total": round(self._wait_seconds_total, 6),
+                "max_wait_seconds": round(self._max_wait_seconds, 6)
+            }
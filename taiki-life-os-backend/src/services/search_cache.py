@@ -0,0 +1,113 @@
+"""
+検索結果キャッシュ - /search の結果をクエリごとに短時間保持し、ルート間で共有する
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.services.notion_http_client import has_request_deadline
+from src.services.single_flight import get_single_flight
+
+
+class SearchCache:
+    """(APIキー, 対象の種類, クエリ) ごとの検索結果のTTLキャッシュ
+
+    limit 付きで取得した結果は、それ以下の limit の検索にも使う。
+    全件を読み切った結果はどの limit の検索にも使える。
+    同じ検索が同時に来た場合はシングルフライトで1回の取得にまとめる。
+    """
+
+    def __init__(self, ttl_seconds: float = None, max_entries: int = None):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("NOTION_SEARCH_CACHE_TTL", "30"))
+        if max_entries is None:
+            max_entries = int(os.getenv("NOTION_SEARCH_CACHE_MAX_ENTRIES", "128"))
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        # key -> (取得時刻, 結果, 全件を読み切ったか)
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict], bool]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def _key(self, api_key: Optional[str], object_type: Optional[str], query: str) -> Tuple:
+        namespace = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+        return namespace, object_type, query
+
+    def search(self, service, query: str = "", object_type: str = None, limit: int = None) -> List[Dict]:
+        """service.iter_search の結果を最大 limit 件（Noneなら全件）返す。失敗時は空のリスト"""
+        key = self._key(service.api_key, object_type, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                fetched_at, results, complete = entry
+                if time.monotonic() - fetched_at < self.ttl_seconds and (complete or (limit and len(results) >= limit)):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return list(results[:limit] if limit else results)
+            self._misses += 1
+
+        try:
+            if has_request_deadline():
+                # 期限切れの失敗を期限のない呼び出し元と共有しない
+                results, complete = self._fetch(service, query, object_type, limit)
+            else:
+                results, complete = get_single_flight().do(
+                    ("search",) + key + (limit,), lambda: self._fetch(service, query, object_type, limit)
+                )
+        except Exception as e:
+            print(f"Error searching {object_type or 'all'}: {e}")
+            return []
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._replaceable(entry, results, complete):
+                self._entries[key] = (time.monotonic(), results, complete)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return list(results)
+
+    def _replaceable(self, entry: Tuple[float, List[Dict], bool], results: List[Dict], complete: bool) -> bool:
+        """保持している結果を新しい結果で置き換えるか（有効な結果を件数の少ない結果で上書きしない）"""
+        fetched_at, cached, cached_complete = entry
+        if time.monotonic() - fetched_at >= self.ttl_seconds:
+            return True
+        if cached_complete:
+            return False
+        return complete or len(results) > len(cached)
+
+    def _fetch(self, service, query: str, object_type: Optional[str], limit: Optional[int]) -> Tuple[List[Dict], bool]:
+        results = []
+        page_size = min(limit, 100) if limit else 100
+        for item in service.iter_search(query, object_type, page_size=page_size, raise_errors=True):
+            results.append(item)
+            if limit and len(results) >= limit:
+                # 次のページは取得しないので、続きがあるかは分からない
+                return results, False
+        return results, True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """プロセス共有の検索結果キャッシュを取得"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SearchCache()
+    return _cache
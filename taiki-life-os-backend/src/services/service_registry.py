@@ -0,0 +1,65 @@
+"""
+サービスレジストリ - Notionサービスをプロセスごと（APIキーごと）に1度だけ生成して共有する
+"""
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple, Type
+
+from src.services.notion_enhanced_service import NotionEnhancedService
+from src.services.notion_unified_service import NotionUnifiedService
+
+_services: Dict[Tuple[Type, str], Any] = {}
+_lock = threading.Lock()
+
+
+def get_service(service_class: Type, api_key: Optional[str] = None) -> Any:
+    """service_classのインスタンスを取得（未生成なら生成して登録）
+
+    インスタンスは全リクエストスレッドで共有されるため、
+    データベースIDのキャッシュや接続状態がリクエスト間で引き継がれる。
+    """
+    if api_key is None:
+        api_key = os.getenv('NOTION_API_KEY')
+    if not api_key:
+        raise ValueError("NOTION_API_KEY environment variable is required")
+
+    key = (service_class, api_key)
+    service = _services.get(key)
+    if service is None:
+        with _lock:
+            service = _services.get(key)
+            if service is None:
+                service = service_class(api_key)
+                _services[key] = service
+    return service
+
+
+def warm_up(api_key: Optional[str] = None) -> Dict:
+    """主要サービスを生成し、接続の確立とデータベースIDの解決を先に済ませる"""
+    unified = get_service(NotionUnifiedService, api_key)
+    get_service(NotionEnhancedService, api_key)
+
+    return {
+        "connected": unified.test_connection(),
+        "database_ids": unified.resolve_database_ids()
+    }
+
+
+def warm_up_in_background(api_key: Optional[str] = None) -> threading.Thread:
+    """起動をブロックしないよう、ウォームアップを別スレッドで実行"""
+    def run():
+        try:
+            result = warm_up(api_key)
+            print(f"Notionサービスのウォームアップ完了: {result}")
+        except Exception as e:
+            print(f"Notionサービスのウォームアップに失敗しました: {e}")
+
+    thread = threading.Thread(target=run, name="notion-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def clear():
+    """登録済みのサービスを破棄（APIキーの入れ替え時など）"""
+    with _lock:
+        _services.clear()
@@ -0,0 +1,76 @@
+"""
+シングルフライト - 同じキーの読み取りが同時に走ったとき、上流への呼び出しを1回にまとめる
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """実行中の呼び出し1件"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """同一キーの同時呼び出しを1回の実行に合流させる
+
+    最初の呼び出し（リーダー）だけが fn を実行し、実行中に来た同じキーの呼び出しは
+    その完了を待って同じ結果（または例外）を受け取る。完了後のキャッシュはしない。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"executed": self._executed, "shared": self._shared, "in_flight": len(self._calls)}
+
+
+_group: Optional[SingleFlight] = None
+_group_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """プロセス共有のシングルフライトを取得"""
+    global _group
+    if _group is None:
+        with _group_lock:
+            if _group is None:
+                _group = SingleFlight()
+    return _group
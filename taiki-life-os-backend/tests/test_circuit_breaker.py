@@ -0,0 +1,75 @@
+"""
+CircuitBreaker の状態遷移のテスト
+"""
+import time
+
+import pytest
+
+from src.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _open_breaker(reset_timeout: float = 0.05) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=1.0, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.get_stats()["opened"] == 1
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success(0.01)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_slow_call_counts_as_failure():
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_seconds=0.5, reset_timeout=10)
+    breaker.record_success(0.6)
+    assert breaker.state == OPEN
+
+
+def test_open_breaker_rejects_calls():
+    breaker = _open_breaker(reset_timeout=10)
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_in > 0
+    assert breaker.get_stats()["rejected"] == 1
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_successful_trial_closes():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_success(0.01)
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_trial_reopens():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
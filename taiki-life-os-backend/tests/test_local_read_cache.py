@@ -0,0 +1,107 @@
+"""
+LocalReadCache._read のテスト（テーブルの読み書きは関数で差し替える）
+"""
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from src.services.local_read_cache import TAIKI_TASK, LocalReadCache
+
+KEY = (TAIKI_TASK, "2025-01-01")
+
+
+class StaleList(list):
+    stale = True
+
+
+class FakeTable:
+    """load/store の代わり。store した内容に、反映待ちの行を足したものを load で返す"""
+
+    def __init__(self, rows=None, synced_at=None, pending=None):
+        self.rows = rows or []
+        self.synced_at = synced_at
+        self.pending = pending or []
+        self.stored = []
+
+    def load(self):
+        return self.rows + self.pending, self.synced_at
+
+    def store(self, items):
+        self.stored.append(items)
+        self.rows = list(items)
+        self.synced_at = datetime.utcnow()
+
+
+@pytest.fixture
+def cache():
+    cache = LocalReadCache(ttl_seconds=60)
+    cache.app = Flask(__name__)
+    cache.db = MagicMock()
+    return cache
+
+
+def test_disabled_cache_reads_from_notion():
+    cache = LocalReadCache()
+    assert cache._read(KEY, lambda: ["notion"], None, None) == ["notion"]
+
+
+def test_empty_table_is_filled_synchronously(cache):
+    table = FakeTable()
+    assert cache._read(KEY, lambda: [{"name": "a"}], table.load, table.store) == [{"name": "a"}]
+    assert table.stored == [[{"name": "a"}]]
+    cache.db.session.commit.assert_called_once()
+
+
+def test_fresh_rows_are_served_without_fetching(cache):
+    table = FakeTable([{"name": "local"}], datetime.utcnow())
+    fetch = MagicMock()
+    assert cache._read(KEY, fetch, table.load, table.store) == [{"name": "local"}]
+    fetch.assert_not_called()
+
+
+def test_expired_rows_are_served_and_refreshed_in_background(cache):
+    table = FakeTable([{"name": "old"}], datetime.utcnow() - timedelta(seconds=120))
+    assert cache._read(KEY, lambda: [{"name": "new"}], table.load, table.store) == [{"name": "old"}]
+    for _ in range(50):
+        if table.stored:
+            break
+        time.sleep(0.01)
+    assert table.stored == [[{"name": "new"}]]
+
+
+def test_invalidate_forces_synchronous_refresh(cache):
+    table = FakeTable([{"name": "old"}], datetime.utcnow() - timedelta(seconds=1))
+    cache.invalidate(TAIKI_TASK)
+    assert cache._read(KEY, lambda: [{"name": "new"}], table.load, table.store) == [{"name": "new"}]
+
+
+def test_refresh_keeps_pending_local_rows(cache):
+    # 反映待ちの作成はNotionの結果に含まれないが、読み取り結果には残る
+    table = FakeTable(pending=[{"name": "queued", "notion_id": None}])
+    result = cache._read(KEY, lambda: [{"name": "a"}], table.load, table.store)
+    assert result == [{"name": "a"}, {"name": "queued", "notion_id": None}]
+
+
+def test_stale_notion_result_is_not_stored(cache):
+    table = FakeTable()
+    result = cache._read(KEY, lambda: StaleList([{"name": "fallback"}]), table.load, table.store)
+    assert result == [{"name": "fallback"}]
+    assert table.stored == []
+
+
+def test_load_error_falls_back_to_notion(cache):
+    def broken_load():
+        raise RuntimeError("no such table")
+
+    assert cache._read(KEY, lambda: ["notion"], broken_load, MagicMock()) == ["notion"]
+
+
+def test_store_error_returns_notion_result(cache):
+    def broken_store(items):
+        raise RuntimeError("disk full")
+
+    assert cache._read(KEY, lambda: ["notion"], lambda: ([], None), broken_store) == ["notion"]
+    cache.db.session.rollback.assert_called_once()
@@ -0,0 +1,181 @@
+"""
+OutboxWorker の書き込みのまとめ（_coalesce / _segments / _target_key）と取得（_claim）のテスト
+"""
+import json
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from src.services.local_read_cache import get_local_read_cache
+from src.services.outbox import (
+    COALESCED, CREATE, DAILY_TASKS_TABLE, DELETE, IN_FLIGHT, PENDING, SUCCESS, UPDATE, OutboxWorker
+)
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    cache = get_local_read_cache()
+    if not cache.enabled:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path_factory.mktemp('outbox') / 'outbox.db'}"
+        assert cache.init_app(app)
+    return cache.app
+
+
+@pytest.fixture
+def db(app):
+    from src.models.notion_models import DailyTask, SyncLog
+
+    db = get_local_read_cache().db
+    with app.app_context():
+        yield db
+        db.session.rollback()
+        SyncLog.query.delete()
+        DailyTask.query.delete()
+        db.session.commit()
+
+
+@pytest.fixture
+def worker(app):
+    worker = OutboxWorker(coalesce_window=0)
+    worker.app = app
+    return worker
+
+
+def _task(db, name="task", notion_id=None):
+    from src.models.notion_models import DailyTask
+
+    row = DailyTask(name=name, completed=False, date=date(2025, 1, 1), notion_id=notion_id)
+    db.session.add(row)
+    db.session.flush()
+    return row
+
+
+def _entry(db, operation, record_id=None, notion_id=None, payload=None):
+    from src.models.notion_models import SyncLog
+
+    entry = SyncLog(
+        table_name=DAILY_TASKS_TABLE, operation=operation, record_id=record_id, notion_id=notion_id,
+        status=PENDING, payload=json.dumps(payload) if payload is not None else None, attempts=0
+    )
+    db.session.add(entry)
+    db.session.flush()
+    return entry
+
+
+def test_consecutive_updates_merge_into_the_first(db, worker):
+    row = _task(db, notion_id="page-1")
+    first = _entry(db, UPDATE, row.id, "page-1", {"Completed": {"checkbox": True}})
+    second = _entry(db, UPDATE, row.id, "page-1", {"Completed": {"checkbox": False}, "Name": {"title": []}})
+    worker._coalesce([first, second])
+    assert first.status == PENDING
+    assert json.loads(first.payload) == {"Completed": {"checkbox": False}, "Name": {"title": []}}
+    assert second.status == COALESCED
+
+
+def test_create_then_delete_cancels_both(db, worker):
+    row = _task(db)
+    create = _entry(db, CREATE, row.id, payload={"name": "task"})
+    update = _entry(db, UPDATE, row.id, payload={"Completed": {"checkbox": True}})
+    delete = _entry(db, DELETE, row.id)
+    worker._coalesce([create, update, delete])
+    assert [entry.status for entry in (create, update, delete)] == [COALESCED] * 3
+
+
+def test_updates_fold_into_unsent_create(db, worker):
+    row = _task(db, name="before")
+    create = _entry(db, CREATE, row.id, payload={"name": "before", "completed": False})
+    row.name = "after"
+    row.completed = True
+    update = _entry(db, UPDATE, row.id, payload={"Completed": {"checkbox": True}})
+    worker._coalesce([create, update])
+    payload = json.loads(create.payload)
+    assert (payload["name"], payload["completed"]) == ("after", True)
+    assert update.status == COALESCED
+
+
+def test_updates_before_delete_are_dropped(db, worker):
+    row = _task(db, notion_id="page-1")
+    update = _entry(db, UPDATE, row.id, "page-1", {"Completed": {"checkbox": True}})
+    delete = _entry(db, DELETE, row.id, "page-1")
+    worker._coalesce([update, delete])
+    assert update.status == COALESCED
+    assert delete.status == PENDING
+
+
+def test_segments_split_at_each_create(db, worker):
+    row = _task(db)
+    entries = [
+        _entry(db, UPDATE, row.id, "page-1", {}),
+        _entry(db, CREATE, row.id, payload={}),
+        _entry(db, UPDATE, row.id, payload={})
+    ]
+    assert [len(segment) for segment in worker._segments(entries)] == [1, 2]
+
+
+def test_local_id_and_notion_id_updates_share_a_target(db, worker):
+    row = _task(db, notion_id="page-1")
+    by_local_id = _entry(db, UPDATE, record_id=row.id)
+    by_notion_id = _entry(db, UPDATE, notion_id="page-1")
+    record_ids = {(DAILY_TASKS_TABLE, "page-1"): row.id}
+    assert worker._target_key(by_local_id, record_ids) == worker._target_key(by_notion_id, record_ids)
+
+
+def test_flush_sends_one_create_for_create_and_updates(db, worker):
+    row = _task(db, name="draft")
+    _entry(db, CREATE, row.id, payload={"name": "draft", "completed": False, "date": "2025-01-01", "category": None})
+    row.name = "final"
+    _entry(db, UPDATE, row.id, payload={"Name": {"title": [{"text": {"content": "final"}}]}})
+    db.session.commit()
+
+    service = MagicMock()
+    service.create_taiki_task.return_value = "page-new"
+    worker._service_factory = lambda: service
+    assert worker.flush() == 1
+    service.create_taiki_task.assert_called_once()
+    assert service.create_taiki_task.call_args.kwargs["name"] == "final"
+    service.update_taiki_task.assert_not_called()
+    assert row.notion_id == "page-new"
+
+
+def test_claim_fails_when_another_worker_took_the_entry(db, worker):
+    from src.models.notion_models import SyncLog
+
+    entry = _entry(db, CREATE, payload={})
+    db.session.commit()
+    SyncLog.query.filter_by(id=entry.id).update({"status": IN_FLIGHT, "processed_at": datetime.utcnow()})
+    db.session.commit()
+
+    assert not worker._claim(entry, datetime.utcnow() - timedelta(seconds=60))
+    assert entry.status == IN_FLIGHT
+
+
+def test_flush_skips_entries_in_flight_elsewhere(db, worker):
+    row = _task(db, notion_id="page-1")
+    sending = _entry(db, UPDATE, row.id, "page-1", {"Completed": {"checkbox": True}})
+    sending.status = IN_FLIGHT
+    sending.processed_at = datetime.utcnow()
+    _entry(db, UPDATE, row.id, "page-1", {"Completed": {"checkbox": False}})
+    db.session.commit()
+
+    service = MagicMock()
+    worker._service_factory = lambda: service
+    assert worker.flush() == 0
+    service.update_taiki_task.assert_not_called()
+
+
+def test_flush_reclaims_entries_left_in_flight(db, worker):
+    row = _task(db, notion_id="page-1")
+    abandoned = _entry(db, UPDATE, row.id, "page-1", {"Completed": {"checkbox": True}})
+    abandoned.status = IN_FLIGHT
+    abandoned.processed_at = datetime.utcnow() - timedelta(seconds=worker.claim_timeout + 1)
+    db.session.commit()
+
+    service = MagicMock()
+    service.update_taiki_task.return_value = True
+    worker._service_factory = lambda: service
+    assert worker.flush() == 1
+    service.update_taiki_task.assert_called_once()
+    assert abandoned.status == SUCCESS
@@ -0,0 +1,47 @@
+"""
+query_database のページ送り（has_more/next_cursor）のテスト
+"""
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from src.services.notion_service import NotionApiError, NotionService
+
+
+def _response(status_code: int, payload: dict = None) -> MagicMock:
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = payload or {}
+    return response
+
+
+def _service(*responses) -> NotionService:
+    service = NotionService(api_key="test")
+    service.http = MagicMock()
+    service.http.post.side_effect = list(responses)
+    return service
+
+
+FIRST_PAGE = _response(200, {"results": [{"id": "a"}], "has_more": True, "next_cursor": "c1"})
+
+
+def test_follows_next_cursor_until_the_last_page():
+    service = _service(FIRST_PAGE, _response(200, {"results": [{"id": "b"}], "has_more": False}))
+
+    assert service.query_database("db") == [{"id": "a"}, {"id": "b"}]
+    assert service.http.post.call_args.kwargs["json"]["start_cursor"] == "c1"
+
+
+def test_first_page_failure_returns_empty_list():
+    service = _service(_response(500))
+
+    assert service.query_database("db") == []
+
+
+@pytest.mark.parametrize("failure", [_response(500), _response(404), requests.ConnectionError()])
+def test_continuation_page_failure_is_not_returned_as_complete(failure):
+    service = _service(FIRST_PAGE, failure)
+    service._on_database_not_found = MagicMock()
+
+    with pytest.raises(NotionApiError):
+        service.query_database("db")
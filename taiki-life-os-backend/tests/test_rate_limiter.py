@@ -0,0 +1,97 @@
+"""
+TokenBucket と NotionHttpClient の429再送のテスト
+"""
+import time
+from unittest.mock import MagicMock
+
+import requests
+
+from src.services.circuit_breaker import CircuitBreaker
+from src.services.notion_http_client import NotionHttpClient
+from src.services.notion_metrics import NotionMetrics
+from src.services.rate_limiter import TokenBucket
+
+
+def _response(status_code: int, headers: dict = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return response
+
+
+def _client(responses, max_retries: int = 3) -> NotionHttpClient:
+    client = NotionHttpClient(
+        rate_limiter=TokenBucket(0),
+        max_retries=max_retries,
+        metrics=NotionMetrics(),
+        circuit_breaker=CircuitBreaker(failure_threshold=100)
+    )
+    client.backoff_base = 0
+    client.session = MagicMock()
+    client.session.request.side_effect = responses
+    return client
+
+
+def test_burst_up_to_capacity_without_waiting():
+    bucket = TokenBucket(rate=10, capacity=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.get_stats()["waited"] == 0
+
+
+def test_acquire_waits_for_refill():
+    bucket = TokenBucket(rate=20, capacity=1)
+    bucket.acquire()
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.04
+    assert bucket.get_stats()["waited"] == 1
+
+
+def test_try_acquire_does_not_block():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_pause_blocks_all_tokens():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.pause(0.05)
+    assert not bucket.try_acquire()
+    assert bucket.acquire() >= 0.04
+
+
+def test_zero_rate_is_unlimited():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.acquire() == 0.0 for _ in range(100))
+
+
+def test_429_is_retried_after_retry_after():
+    client = _client([_response(429, {"Retry-After": "0"}), _response(200)])
+    response = client.post("https://api.notion.com/v1/pages", json={})
+    assert response.status_code == 200
+    assert client.session.request.call_count == 2
+    assert client.get_stats()["throttled"] == 1
+
+
+def test_429_gives_up_after_max_retries():
+    client = _client([_response(429, {"Retry-After": "0"})] * 3, max_retries=2)
+    response = client.get("https://api.notion.com/v1/pages/abc")
+    assert response.status_code == 429
+    assert client.session.request.call_count == 3
+
+
+def test_5xx_is_retried_only_for_idempotent_requests():
+    client = _client([_response(503), _response(200)])
+    assert client.get("https://api.notion.com/v1/pages/abc").status_code == 200
+    assert client.session.request.call_count == 2
+
+    client = _client([_response(503), _response(200)])
+    assert client.post("https://api.notion.com/v1/pages", json={}).status_code == 503
+    assert client.session.request.call_count == 1
+
+
+def test_retry_after_http_date_is_parsed():
+    client = _client([])
+    assert client._retry_after(_response(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert client._retry_after(_response(429, {"Retry-After": "1.5"})) == 1.5
+    assert client._retry_after(_response(429)) is None
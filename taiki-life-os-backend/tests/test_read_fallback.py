@@ -0,0 +1,61 @@
+"""
+DB IDの解決に失敗した時の読み取りフォールバックのテスト
+"""
+from datetime import date
+from unittest.mock import MagicMock
+
+import requests
+
+from src.services.notion_unified_service import NotionUnifiedService, StaleList
+
+TARGET_DATE = date(2024, 1, 1)
+
+
+def _response(status_code: int, payload: dict = None) -> MagicMock:
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = payload or {}
+    return response
+
+
+def _service() -> NotionUnifiedService:
+    service = NotionUnifiedService("test-key")
+    service.db_id_taiki_task = None
+    service._database_id_cache = MagicMock()
+    service._database_id_cache.get.return_value = None
+    service.http = MagicMock()
+    service.query_database = MagicMock(return_value=[{"id": "task-1"}])
+    service._parse_task = lambda result: {"id": result["id"]}
+    return service
+
+
+def test_search_failure_returns_last_good_results_as_stale():
+    service = _service()
+    service.http.post.return_value = _response(200, {
+        "results": [{"id": "db-1", "title": [{"text": {"content": "Taiki Task"}}]}]
+    })
+    assert service.get_taiki_tasks(TARGET_DATE) == [{"id": "task-1"}]
+
+    service._database_cache.clear()
+    service.http.post.side_effect = requests.ConnectionError()
+    tasks = service.get_taiki_tasks(TARGET_DATE)
+
+    assert isinstance(tasks, StaleList)
+    assert tasks == [{"id": "task-1"}]
+
+
+def test_search_error_status_is_not_treated_as_not_found():
+    service = _service()
+    service.http.post.return_value = _response(500)
+
+    assert isinstance(service.get_taiki_tasks(TARGET_DATE), StaleList)
+    service.query_database.assert_not_called()
+
+
+def test_database_not_found_returns_plain_empty_list():
+    service = _service()
+    service.http.post.return_value = _response(200, {"results": []})
+
+    tasks = service.get_taiki_tasks(TARGET_DATE)
+
+    assert tasks == []
+    assert not isinstance(tasks, StaleList)
@@ -0,0 +1,76 @@
+"""
+request_deadline() とサーキットブレーカー・シングルフライトの関係のテスト
+"""
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from src.services.circuit_breaker import CLOSED, CircuitBreaker
+from src.services.notion_http_client import NotionHttpClient, request_deadline
+from src.services.notion_metrics import NotionMetrics
+from src.services.notion_service import NotionService
+from src.services.rate_limiter import TokenBucket
+
+URL = "https://api.notion.com/v1/pages/abc"
+
+
+def _response(status_code: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+
+def _client(breaker: CircuitBreaker) -> NotionHttpClient:
+    client = NotionHttpClient(rate_limiter=TokenBucket(0), max_retries=0, metrics=NotionMetrics(),
+                              circuit_breaker=breaker)
+    client.session = MagicMock()
+    return client
+
+
+def test_expired_deadline_does_not_hold_the_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    client = _client(breaker)
+    client.session.request.return_value = _response(200)
+
+    with request_deadline(0), pytest.raises(requests.Timeout):
+        client.get(URL)
+    assert client.get(URL).status_code == 200
+    assert breaker.state == CLOSED
+
+
+def test_timeout_caused_by_the_deadline_is_not_an_upstream_failure():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    client = _client(breaker)
+    client.session.request.side_effect = requests.ReadTimeout()
+
+    with request_deadline(0.5), pytest.raises(requests.Timeout):
+        client.get(URL)
+    assert breaker.state == CLOSED
+    assert breaker.get_stats()["consecutive_failures"] == 0
+
+
+def test_timeout_without_deadline_counts_as_failure():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    client = _client(breaker)
+    client.session.request.side_effect = requests.ReadTimeout()
+
+    with pytest.raises(requests.Timeout):
+        client.get(URL)
+    assert breaker.get_stats()["consecutive_failures"] == 1
+
+
+def test_deadline_bound_queries_are_not_coalesced():
+    service = NotionService(api_key="test")
+    service.single_flight = MagicMock()
+    service.iter_database_query = MagicMock(return_value=iter([{"id": "a"}]))
+
+    with request_deadline(1):
+        assert service.query_database("db") == [{"id": "a"}]
+    service.single_flight.do.assert_not_called()
+
+    service.query_database("db")
+    service.single_flight.do.assert_called_once()
@@ -0,0 +1,77 @@
+"""
+SingleFlight のテスト
+"""
+import threading
+import time
+
+import pytest
+
+from src.services.single_flight import SingleFlight
+
+
+def _run_concurrently(count: int, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return ["result"]
+
+    results, errors = _run_concurrently(5, lambda: group.do("key", fetch))
+    assert calls == [1]
+    assert results == [["result"]] * 5
+    assert errors == [None] * 5
+    assert group.get_stats() == {"executed": 1, "shared": 4, "in_flight": 0}
+
+
+def test_error_is_shared_with_waiters():
+    group = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError("upstream failed")
+
+    results, errors = _run_concurrently(3, lambda: group.do("key", fail))
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert group.get_stats()["executed"] == 1
+
+
+def test_different_keys_run_separately():
+    group = SingleFlight()
+    assert group.do("a", lambda: 1) == 1
+    assert group.do("b", lambda: 2) == 2
+    assert group.get_stats()["executed"] == 2
+
+
+def test_result_is_not_cached_after_completion():
+    group = SingleFlight()
+    values = iter([1, 2])
+    assert group.do("key", lambda: next(values)) == 1
+    assert group.do("key", lambda: next(values)) == 2
+
+
+def test_key_is_released_after_error():
+    group = SingleFlight()
+    with pytest.raises(RuntimeError):
+        group.do("key", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    assert group.get_stats()["in_flight"] == 0
+    assert group.do("key", lambda: "ok") == "ok"
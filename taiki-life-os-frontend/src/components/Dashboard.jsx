@@ -102,7 +102,8 @@ export default function Dashboard() {
           completed: task.completed || false,
           icon: getIconFromCategory(task.category),
           color: 'gray',
-          notionId: task.notion_id
+          notionId: task.notion_id,
+          localId: task.id
         }))
         
         // Notionからデータが取得できた場合は、それを優先
@@ -139,7 +140,8 @@ export default function Dashboard() {
           target: goal.target || 0,
           unit: goal.unit || '回',
           color: 'green',
-          notionId: goal.notion_id
+          notionId: goal.notion_id,
+          localId: goal.id
         }))
         
         // Notionからデータが取得できた場合は、それを優先
@@ -225,11 +227,38 @@ export default function Dashboard() {
     return categoryMap[category] || 'Circle'
   }
   
+  // Notionに反映済み（または反映待ち）のタスク・目標のID
+  const getRemoteId = (item) => item?.notionId || item?.localId
+
   const toggleTask = async (taskId) => {
+    const target = tasks.find(task => task.id === taskId)
     const updatedTasks = tasks.map(task => 
       task.id === taskId ? { ...task, completed: !task.completed } : task
     )
     setTasks(updatedTasks)
+    if (getRemoteId(target)) {
+      // 1件だけ更新（サーバーがローカルで受け付け、Notionへはバックグラウンドで反映）
+      try {
+        const response = await fetch(`${API_BASE}/tasks/daily/${getRemoteId(target)}`, {
+          method: 'PUT',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ completed: !target.completed }),
+        })
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`)
+        }
+        setLastSync(new Date())
+      } catch (error) {
+        console.error('Failed to update task:', error)
+        // 受け付けられなかった変更は画面からも取り消す
+        setTasks(current => current.map(task =>
+          task.id === taskId ? { ...task, completed: target.completed } : task
+        ))
+      }
+      return
+    }
     // Notionに即座に同期
     await syncTasksToNotion()
   }
@@ -266,10 +295,33 @@ export default function Dashboard() {
   }
   
   const updateWeeklyTask = async (taskId, field, value) => {
+    const target = weeklyTasks.find(task => task.id === taskId)
     const updatedWeeklyTasks = weeklyTasks.map(task =>
       task.id === taskId ? { ...task, [field]: Math.max(0, value) } : task
     )
     setWeeklyTasks(updatedWeeklyTasks)
+    if (getRemoteId(target) && (field === 'current' || field === 'target')) {
+      try {
+        const response = await fetch(`${API_BASE}/tasks/weekly/${getRemoteId(target)}`, {
+          method: 'PUT',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ [field]: Math.max(0, value) }),
+        })
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`)
+        }
+        setLastSync(new Date())
+      } catch (error) {
+        console.error('Failed to update weekly goal:', error)
+        // 受け付けられなかった変更は画面からも取り消す
+        setWeeklyTasks(current => current.map(task =>
+          task.id === taskId ? { ...task, [field]: target[field] } : task
+        ))
+      }
+      return
+    }
     // Notionに同期
     await syncWeeklyGoalsToNotion()
   }